@@ -1,5 +1,4 @@
 import os
-import tempfile
 
 from fastapi import UploadFile
 from fastapi.templating import Jinja2Templates
@@ -9,9 +8,13 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse
 
 from backend.app.admin.custom_converter import GeometryWKTField, format_coordinates
+from backend.app.config import UPLOAD_MAX_BYTES
+from backend.app.database import AsyncSessionLocal
 from backend.app.models import Flight, Region
-from backend.app.utils.csv_load import main as csv_load
-from backend.app.utils.parser.flight_data_processor import main as xlsx_load
+from backend.app.services.export_cache import bump_dataset_version
+from backend.app.services.ingest_jobs import ingest_jobs
+from backend.app.services.rollup_service import refresh_rollup_days
+from backend.app.utils.upload import UploadTooLargeError, save_upload
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -97,6 +100,30 @@ class FlightAdmin(ModelView, model=Flight):
         "region_rel": "Регион",
     }
 
+    async def on_model_change(self, data, model, is_created, request) -> None:
+        # Ключ сводной таблицы до изменения: полет мог сменить регион или дату
+        request.state.rollup_days = set()
+        if not is_created:
+            request.state.rollup_days.add((model.region_id, model.flight_date))
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        days = getattr(request.state, "rollup_days", set())
+        days.add((model.region_id, model.flight_date))
+        await self._refresh_rollup(days)
+
+    async def on_model_delete(self, model, request) -> None:
+        request.state.rollup_days = {(model.region_id, model.flight_date)}
+
+    async def after_model_delete(self, model, request) -> None:
+        await self._refresh_rollup(getattr(request.state, "rollup_days", set()))
+
+    @staticmethod
+    async def _refresh_rollup(days: set) -> None:
+        async with AsyncSessionLocal() as session:
+            await refresh_rollup_days(session, days)
+            await session.commit()
+        bump_dataset_version()
+
 
 class RegionAdmin(ModelView, model=Region):
     name = "Регион"
@@ -149,6 +176,17 @@ class UploadFileView(BaseView):
     async def upload_file(self, request: Request):
         """Обработчик загрузки файла"""
         try:
+            # Заведомо большой файл отклоняется до разбора тела запроса
+            content_length = request.headers.get("content-length")
+            if content_length and int(content_length) > UPLOAD_MAX_BYTES:
+                return JSONResponse(
+                    {
+                        "success": False,
+                        "message": f"Файл больше допустимых {UPLOAD_MAX_BYTES / 1024 / 1024:.0f} MB",
+                    },
+                    status_code=413,
+                )
+
             form = await request.form()
             file = form.get("file")
 
@@ -174,7 +212,7 @@ class UploadFileView(BaseView):
 
             result = await self.process_uploaded_file(file)
 
-            return JSONResponse(result)
+            return JSONResponse(result, status_code=result.pop("status_code"))
 
         except Exception as e:
             return JSONResponse(
@@ -184,55 +222,48 @@ class UploadFileView(BaseView):
 
     async def process_uploaded_file(self, file: UploadFile):
         """
-        Обрабатывает файл и загружает данные в базу.
-        Возвращает результат обработки.
+        Сохраняет файл на диск потоково и ставит его обработку в фоновую очередь.
+        Возвращает id задачи, статус доступен по /admin/upload-status/{job_id}.
+        Повторная загрузка того же файла возвращает id уже существующей задачи.
         """
         try:
-            suffix = file.filename.rsplit(".", 1)[-1]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-                tmp_path = tmp_file.name
-
-                contents = await file.read()
-                tmp_file.write(contents)
-
+            suffix = file.filename.rsplit(".", 1)[-1].lower()
+            tmp_path, size, file_hash = await save_upload(file, f".{suffix}")
             print(f"Файл сохранен во временное расположение: {tmp_path}")
 
-            try:
-                if suffix in ["xlsx", "xls"]:
-                    ready_csv = xlsx_load(tmp_path)
-                    await csv_load(ready_csv)
-                else:
-                    await csv_load(tmp_path)
-
-                result = {
-                    "success": True,
-                    "message": f"Файл '{file.filename}' успешно обработан и данные загружены в базу!",
-                    "file_info": {
-                        "filename": file.filename,
-                        "size": f"{len(contents) / 1024 / 1024:.2f} MB",
-                        "type": "CSV",
-                    },
-                }
-
-                return result
-
-            except Exception as e:
-                print(f"Ошибка в функции main(): {e}")
-                return {
-                    "success": False,
-                    "message": f"Ошибка при обработке данных: {str(e)}",
-                }
-
-            finally:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-                    print(f"Временный файл удален: {tmp_path}")
+            job_id, duplicate = await ingest_jobs.submit_async(
+                tmp_path, file.filename, size, file_hash
+            )
+            message = f"Файл '{file.filename}' принят в обработку"
+            if duplicate:
+                message = f"Файл '{file.filename}' уже загружается или загружен"
+            return {
+                "success": True,
+                "message": message,
+                "job_id": job_id,
+                "duplicate": duplicate,
+                "status_code": 202,
+            }
 
+        except UploadTooLargeError as e:
+            return {"success": False, "message": str(e), "status_code": 413}
         except Exception as e:
             print(f"Ошибка при сохранении файла: {e}")
             return {
                 "success": False,
                 "message": f"Ошибка при сохранении файла: {str(e)}",
+                "status_code": 500,
             }
         finally:
             await file.close()
+
+    @expose("/upload-status/{job_id}", methods=["GET"])
+    async def upload_status(self, request: Request):
+        """Статус фоновой обработки загруженного файла"""
+        job = await ingest_jobs.get_async(request.path_params["job_id"])
+        if job is None:
+            return JSONResponse(
+                {"success": False, "message": "Задача не найдена"},
+                status_code=404,
+            )
+        return JSONResponse(job)
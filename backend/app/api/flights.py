@@ -1,19 +1,257 @@
 from time import time
 from datetime import date
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.api.responses import (
     get_all_flights_gzip_responses,
     get_flights_by_region_gzip_responses,
 )
-from backend.app.database import get_db
+from backend.app.constants import (
+    EXPORT_STREAM_CHUNK_SIZE,
+    FLIGHTS_PAGE_DEFAULT_LIMIT,
+    FLIGHTS_PAGE_MAX_LIMIT,
+)
+from backend.app.database import AsyncSessionLocal, get_db
+from backend.app.schemas.flight import PaginatedFlightResponse
+from backend.app.services.export_cache import (
+    etag_matches,
+    export_cache,
+    get_dataset_version,
+    make_etag,
+)
 from backend.app.services.flight_service import FlightService
+from backend.app.services.single_flight import SingleFlight
 from backend.app.logging import log_function, logger
+from backend.app.utils.compression import Codec, negotiate_codec
+from backend.app.utils.cursor import decode_cursor, encode_cursor
+from backend.app.utils.export_arrow import BINARY_FORMATS, pa
 
 router = APIRouter(tags=["Полеты БПЛА"])
 
+export_single_flight = SingleFlight()
+
+
+def resolve_codec(
+    codec: Optional[str], level: Optional[int], accept_encoding: Optional[str]
+) -> Codec:
+    """Выбирает кодек по параметру запроса или Accept-Encoding и проверяет уровень"""
+    try:
+        selected = negotiate_codec(codec, accept_encoding)
+        selected.validate_level(level)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return selected
+
+
+def resolve_format(export_format: str) -> str:
+    """Проверяет, что бинарный формат выгрузки доступен"""
+    if export_format in BINARY_FORMATS and pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Формат {export_format} недоступен: не установлен pyarrow",
+        )
+    return export_format
+
+
+def conditions_key(conditions: Sequence) -> tuple:
+    """
+    Ключ кеша выгрузки для дополнительных условий WHERE: текст SQL
+    и значения параметров (координаты области, GeoJSON полигона)
+    """
+    key = []
+    for condition in conditions:
+        compiled = condition.compile()
+        key.append((str(compiled), tuple(sorted(compiled.params.items()))))
+    return tuple(key)
+
+
+def export_headers(filename: str, etag: str) -> dict:
+    """Заголовки ответа для скачивания выгрузки"""
+    return {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Vary": "Accept-Encoding",
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+    }
+
+
+async def stream_flights_csv(
+    db: AsyncSession,
+    headers: dict,
+    codec: Codec,
+    level: Optional[int] = None,
+    region_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    conditions: Sequence = (),
+) -> Optional[StreamingResponse]:
+    """
+    Отдает сжатый CSV потоком через серверный курсор.
+    Возвращает None, если по фильтрам нет ни одного полета.
+    """
+    flights_result = await FlightService.stream_data(
+        db,
+        region_id=region_id,
+        from_date=from_date,
+        to_date=to_date,
+        conditions=conditions,
+    )
+    first_chunk = await flights_result.fetchmany(EXPORT_STREAM_CHUNK_SIZE)
+    if not first_chunk:
+        await flights_result.close()
+        return None
+
+    return StreamingResponse(
+        FlightService.stream_csv_gzip(flights_result, first_chunk, codec, level),
+        media_type=codec.media_type,
+        headers=headers,
+    )
+
+
+async def build_flights_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str],
+    conditions: Sequence = (),
+    region_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> PaginatedFlightResponse:
+    """
+    Собирает страницу полетов по курсору.
+    Общее количество считается по сводной таблице, поэтому при
+    дополнительных условиях (например, пространственных) оно не заполняется.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filters = {"region_id": region_id, "from_date": from_date, "to_date": to_date}
+    rows = await FlightService.get_flights_page(
+        db, limit, after, conditions=conditions, **filters
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.flight_date, last.id)
+
+    total = None
+    if not conditions:
+        total = await FlightService.count_flights(db, **filters)
+
+    return PaginatedFlightResponse(
+        data=[FlightService.format_flight(row) for row in rows],
+        total=total,
+        limit=limit,
+        has_more=has_more,
+        next_cursor=next_cursor,
+    )
+
+
+async def export_flights(
+    db: AsyncSession,
+    filename: str,
+    export_format: str,
+    codec: Codec,
+    level: Optional[int],
+    stream: bool,
+    if_none_match: Optional[str],
+    region_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    conditions: Sequence = (),
+) -> Optional[Response]:
+    """
+    Готовит ответ с выгрузкой полетов.
+    conditions - дополнительные условия WHERE (например, пространственные),
+    входят в ключ кеша и ETag.
+
+    Повторный запрос с актуальным If-None-Match получает 304 без обращения
+    к базе, готовая выгрузка отдается из кеша. Ключ кеша включает версию
+    данных, которую меняет каждая загрузка. Одинаковые конкурентные запросы
+    ждут одно общее вычисление (запрос к базе и сжатие).
+    Arrow и Parquet всегда собираются целиком: кодек и stream к ним не применяются.
+    Возвращает None, если полеты не найдены.
+    """
+    filters_key = (region_id, from_date, to_date, *conditions_key(conditions))
+    if export_format == "csv":
+        export_key = (
+            *filters_key,
+            export_format,
+            codec.name,
+            codec.validate_level(level),
+        )
+        media_type, extension = codec.media_type, f".csv{codec.extension}"
+    else:
+        export_key = (*filters_key, export_format)
+        media_type, extension = BINARY_FORMATS[export_format]
+        stream = False
+
+    version = get_dataset_version()
+    etag = make_etag(export_key, version)
+    headers = export_headers(f"{filename}{extension}", etag)
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache_key = (version, *export_key)
+    payload = export_cache.get(cache_key)
+    if payload is None:
+        if stream:
+            return await stream_flights_csv(
+                db,
+                headers,
+                codec,
+                level,
+                region_id=region_id,
+                from_date=from_date,
+                to_date=to_date,
+                conditions=conditions,
+            )
+
+        async def build_export() -> Optional[bytes]:
+            # Своя сессия: вычисление переживает отключение первого клиента
+            async with AsyncSessionLocal() as session:
+                result = await FlightService.get_data(
+                    session,
+                    region_id=region_id,
+                    from_date=from_date,
+                    to_date=to_date,
+                    conditions=conditions,
+                )
+                # Как и при потоковой выгрузке, пустой результат - 404,
+                # а не файл с одним заголовком
+                flights_data = result.all()
+                if not flights_data:
+                    return None
+                if export_format == "csv":
+                    data = await FlightService.create_csv_gzip_async(
+                        flights_data, codec, level
+                    )
+                else:
+                    data = await FlightService.create_binary_export_async(
+                        flights_data, export_format
+                    )
+            export_cache.put(cache_key, data)
+            return data
+
+        payload = await export_single_flight.do(cache_key, build_export)
+        if payload is None:
+            return None
+    else:
+        logger.info("Выгрузка отдана из кеша")
+
+    return Response(content=payload, media_type=media_type, headers=headers)
+
 
 @router.get(
     "/regions",
@@ -31,33 +269,54 @@ async def get_all_flights_gzip(
         description="Дата конца периода в формате YYYY-MM-DD",
         example="2025-08-01",
     ),
+    stream: bool = Query(
+        False,
+        description="Потоковая выгрузка: данные сжимаются и отправляются пачками",
+    ),
+    codec: Optional[str] = Query(
+        None,
+        description="Кодек сжатия: gzip, zstd или br. По умолчанию выбирается "
+        "по Accept-Encoding и настройкам сервера",
+    ),
+    level: Optional[int] = Query(None, description="Уровень сжатия кодека"),
+    export_format: str = Query(
+        "csv",
+        alias="format",
+        pattern="^(csv|arrow|parquet)$",
+        description="Формат выгрузки: сжатый CSV, Arrow IPC stream или Parquet",
+    ),
+    accept_encoding: Optional[str] = Header(None, include_in_schema=False),
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
     db: AsyncSession = Depends(get_db),
 ):
     """Получить все полеты в виде GZIP с CSV"""
     try:
         time_before = time()
         logger.info(f"Запрос на получение полетов с {from_date} по {to_date}")
-        flights_data = await FlightService.get_data(
-            db, from_date=from_date, to_date=to_date
+        selected_codec = resolve_codec(codec, level, accept_encoding)
+        response = await export_flights(
+            db,
+            "all_flights",
+            resolve_format(export_format),
+            selected_codec,
+            level,
+            stream,
+            if_none_match,
+            from_date=from_date,
+            to_date=to_date,
         )
 
-        if not flights_data:
+        if response is None:
             logger.warning("Полеты не найдены")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No flights found"
             )
-
-        gzip_data = await FlightService.create_csv_gzip_async(flights_data)
-        logger.info("Данные успешно подготовлены и сжаты")
+        logger.info(f"Данные успешно подготовлены ({export_format}, {selected_codec.name})")
 
         time_after = time()
         logger.info(f"Время обработки запроса: {time_after - time_before} секунд")
 
-        return Response(
-            content=gzip_data,
-            media_type="application/gzip",
-            headers={"Content-Disposition": "attachment; filename=all_flights.csv.gz"},
-        )
+        return response
 
     except HTTPException:
         raise
@@ -86,6 +345,24 @@ async def get_flights_by_region_gzip(
         description="Дата конца периода в формате YYYY-MM-DD",
         example="2025-08-01",
     ),
+    stream: bool = Query(
+        False,
+        description="Потоковая выгрузка: данные сжимаются и отправляются пачками",
+    ),
+    codec: Optional[str] = Query(
+        None,
+        description="Кодек сжатия: gzip, zstd или br. По умолчанию выбирается "
+        "по Accept-Encoding и настройкам сервера",
+    ),
+    level: Optional[int] = Query(None, description="Уровень сжатия кодека"),
+    export_format: str = Query(
+        "csv",
+        alias="format",
+        pattern="^(csv|arrow|parquet)$",
+        description="Формат выгрузки: сжатый CSV, Arrow IPC stream или Parquet",
+    ),
+    accept_encoding: Optional[str] = Header(None, include_in_schema=False),
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
     db: AsyncSession = Depends(get_db),
 ):
     """Получить полеты региона в виде GZIP с CSV"""
@@ -93,24 +370,29 @@ async def get_flights_by_region_gzip(
         logger.info(
             f"Запрос на получение полетов для региона {region_id} с {from_date} по {to_date}"
         )
-        flights_data = await FlightService.get_data(
-            db, region_id=region_id, from_date=from_date, to_date=to_date
+        selected_codec = resolve_codec(codec, level, accept_encoding)
+        response = await export_flights(
+            db,
+            f"region_{region_id}_flights",
+            resolve_format(export_format),
+            selected_codec,
+            level,
+            stream,
+            if_none_match,
+            region_id=region_id,
+            from_date=from_date,
+            to_date=to_date,
         )
-        if not flights_data:
+        if response is None:
             logger.warning(f"Полеты не найдены для региона {region_id}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No flights found for region ID {region_id} in the specified date range",
             )
-        gzip_data = await FlightService.create_csv_gzip_async(flights_data)
-        logger.info(f"Данные для региона {region_id} успешно подготовлены и сжаты")
-        return Response(
-            content=gzip_data,
-            media_type="application/gzip",
-            headers={
-                "Content-Disposition": f"attachment; filename=region_{region_id}_flights.csv.gz"
-            },
+        logger.info(
+            f"Данные для региона {region_id} успешно подготовлены ({export_format}, {selected_codec.name})"
         )
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -121,3 +403,53 @@ async def get_flights_by_region_gzip(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating GZIP file for region {region_id}: {str(e)}",
         )
+
+
+@router.get("/flights", response_model=PaginatedFlightResponse)
+@log_function(logger)
+async def get_flights_page(
+    limit: int = Query(
+        FLIGHTS_PAGE_DEFAULT_LIMIT,
+        ge=1,
+        le=FLIGHTS_PAGE_MAX_LIMIT,
+        description="Количество полетов на странице",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Курсор следующей страницы (next_cursor предыдущего ответа)",
+    ),
+    region_id: Optional[int] = Query(None, description="ID региона"),
+    from_date: Optional[date] = Query(
+        None,
+        description="Дата начала периода в формате YYYY-MM-DD",
+        example="2025-01-01",
+    ),
+    to_date: Optional[date] = Query(
+        None,
+        description="Дата конца периода в формате YYYY-MM-DD",
+        example="2025-08-01",
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Получить полеты постранично в JSON.
+    Полеты упорядочены по дате и id, полеты без даты идут последними.
+    Фильтры нужно передавать одинаковыми для всех страниц.
+    """
+    try:
+        return await build_flights_page(
+            db,
+            limit,
+            cursor,
+            region_id=region_id,
+            from_date=from_date,
+            to_date=to_date,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при получении страницы полетов: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting flights page: {str(e)}",
+        )
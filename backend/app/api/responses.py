@@ -2,7 +2,15 @@ get_all_flights_gzip_responses = {
     200: {
         "description": "Successful Response",
         "content": {
-            "application/gzip": {"schema": {"type": "string", "format": "binary"}}
+            "application/gzip": {"schema": {"type": "string", "format": "binary"}},
+            "application/zstd": {"schema": {"type": "string", "format": "binary"}},
+            "application/x-brotli": {"schema": {"type": "string", "format": "binary"}},
+            "application/vnd.apache.arrow.stream": {
+                "schema": {"type": "string", "format": "binary"}
+            },
+            "application/vnd.apache.parquet": {
+                "schema": {"type": "string", "format": "binary"}
+            },
         },
         "headers": {
             "Content-Disposition": {
@@ -15,7 +23,16 @@ get_all_flights_gzip_responses = {
             },
             "Content-Type": {
                 "description": "The media type of the response body",
-                "schema": {"type": "string", "enum": ["application/gzip"]},
+                "schema": {
+                    "type": "string",
+                    "enum": [
+                        "application/gzip",
+                        "application/zstd",
+                        "application/x-brotli",
+                        "application/vnd.apache.arrow.stream",
+                        "application/vnd.apache.parquet",
+                    ],
+                },
             },
             "Date": {
                 "description": "The date and time at which the response was generated",
@@ -27,6 +44,13 @@ get_all_flights_gzip_responses = {
             },
         },
     },
+    304: {"description": "Not Modified: data has not changed since the ETag was issued"},
+    400: {
+        "description": "Unsupported codec, compression level or export format",
+        "content": {
+            "application/json": {"example": {"detail": "Кодек 'lz4' не поддерживается"}}
+        },
+    },
     404: {
         "description": "No flights found",
         "content": {"application/json": {"example": {"detail": "No flights found"}}},
@@ -43,7 +67,15 @@ get_flights_by_region_gzip_responses = {
     200: {
         "description": "Successful Response",
         "content": {
-            "application/gzip": {"schema": {"type": "string", "format": "binary"}}
+            "application/gzip": {"schema": {"type": "string", "format": "binary"}},
+            "application/zstd": {"schema": {"type": "string", "format": "binary"}},
+            "application/x-brotli": {"schema": {"type": "string", "format": "binary"}},
+            "application/vnd.apache.arrow.stream": {
+                "schema": {"type": "string", "format": "binary"}
+            },
+            "application/vnd.apache.parquet": {
+                "schema": {"type": "string", "format": "binary"}
+            },
         },
         "headers": {
             "Content-Disposition": {
@@ -56,7 +88,16 @@ get_flights_by_region_gzip_responses = {
             },
             "Content-Type": {
                 "description": "The media type of the response body",
-                "schema": {"type": "string", "enum": ["application/gzip"]},
+                "schema": {
+                    "type": "string",
+                    "enum": [
+                        "application/gzip",
+                        "application/zstd",
+                        "application/x-brotli",
+                        "application/vnd.apache.arrow.stream",
+                        "application/vnd.apache.parquet",
+                    ],
+                },
             },
             "Date": {
                 "description": "The date and time at which the response was generated",
@@ -68,6 +109,13 @@ get_flights_by_region_gzip_responses = {
             },
         },
     },
+    304: {"description": "Not Modified: data has not changed since the ETag was issued"},
+    400: {
+        "description": "Unsupported codec, compression level or export format",
+        "content": {
+            "application/json": {"example": {"detail": "Кодек 'lz4' не поддерживается"}}
+        },
+    },
     404: {
         "description": "No flights found for region ID",
         "content": {
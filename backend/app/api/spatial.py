@@ -0,0 +1,217 @@
+from datetime import date
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from sqlalchemy import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.api.flights import (
+    build_flights_page,
+    export_flights,
+    resolve_codec,
+    resolve_format,
+)
+from backend.app.api.responses import get_all_flights_gzip_responses
+from backend.app.constants import (
+    FLIGHTS_PAGE_DEFAULT_LIMIT,
+    FLIGHTS_PAGE_MAX_LIMIT,
+    SPATIAL_MAX_RADIUS_METERS,
+)
+from backend.app.database import get_db
+from backend.app.logging import log_function, logger
+from backend.app.schemas.flight import PaginatedFlightResponse
+from backend.app.services.spatial_service import SpatialService
+
+router = APIRouter(prefix="/spatial", tags=["Пространственные запросы"])
+
+spatial_responses = {
+    200: {
+        "content": {
+            "application/json": {
+                "schema": {"$ref": "#/components/schemas/PaginatedFlightResponse"}
+            },
+            **get_all_flights_gzip_responses[200]["content"],
+        }
+    },
+    304: get_all_flights_gzip_responses[304],
+    400: {"description": "Некорректная область поиска, курсор, кодек или формат"},
+    404: get_all_flights_gzip_responses[404],
+}
+
+
+class SpatialParams:
+    """Общие параметры пространственных запросов"""
+
+    def __init__(
+        self,
+        point: str = Query(
+            "any",
+            pattern="^(takeoff|landing|any)$",
+            description="По какой точке искать: взлет, посадка или любая из них",
+        ),
+        export_format: str = Query(
+            "json",
+            alias="format",
+            pattern="^(json|csv|arrow|parquet)$",
+            description="json - постранично; csv, arrow, parquet - весь результат "
+            "выгрузкой, как /regions",
+        ),
+        stream: bool = Query(
+            False,
+            description="Потоковая выгрузка CSV: данные сжимаются и отправляются пачками",
+        ),
+        codec: Optional[str] = Query(
+            None,
+            description="Кодек сжатия CSV: gzip, zstd или br. По умолчанию выбирается "
+            "по Accept-Encoding и настройкам сервера",
+        ),
+        level: Optional[int] = Query(None, description="Уровень сжатия кодека"),
+        limit: int = Query(
+            FLIGHTS_PAGE_DEFAULT_LIMIT,
+            ge=1,
+            le=FLIGHTS_PAGE_MAX_LIMIT,
+            description="Количество полетов на странице (для json)",
+        ),
+        cursor: Optional[str] = Query(
+            None, description="Курсор следующей страницы (для json)"
+        ),
+        region_id: Optional[int] = Query(None, description="ID региона"),
+        from_date: Optional[date] = Query(
+            None,
+            description="Дата начала периода в формате YYYY-MM-DD",
+            example="2025-01-01",
+        ),
+        to_date: Optional[date] = Query(
+            None,
+            description="Дата конца периода в формате YYYY-MM-DD",
+            example="2025-08-01",
+        ),
+        accept_encoding: Optional[str] = Header(None, include_in_schema=False),
+        if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    ):
+        self.point = point
+        self.export_format = export_format
+        self.stream = stream
+        self.codec = codec
+        self.level = level
+        self.accept_encoding = accept_encoding
+        self.if_none_match = if_none_match
+        self.limit = limit
+        self.cursor = cursor
+        self.filters = {
+            "region_id": region_id,
+            "from_date": from_date,
+            "to_date": to_date,
+        }
+
+
+async def spatial_response(
+    db: AsyncSession, condition: ColumnElement, params: SpatialParams, filename: str
+):
+    """
+    Страница полетов в JSON или весь результат выгрузкой через export_flights:
+    выбор кодека, ETag и 304, кеш, потоковая отдача и 404, как у /regions
+    """
+    if params.export_format == "json":
+        return await build_flights_page(
+            db, params.limit, params.cursor, conditions=[condition], **params.filters
+        )
+
+    response = await export_flights(
+        db,
+        filename,
+        resolve_format(params.export_format),
+        resolve_codec(params.codec, params.level, params.accept_encoding),
+        params.level,
+        params.stream,
+        params.if_none_match,
+        conditions=[condition],
+        **params.filters,
+    )
+    if response is None:
+        logger.warning("Полеты в заданной области не найдены")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No flights found")
+    return response
+
+
+def spatial_error(name: str, e: Exception) -> HTTPException:
+    logger.error(f"Ошибка пространственного запроса {name}: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Error in {name} spatial query: {str(e)}",
+    )
+
+
+@router.get("/bbox", response_model=PaginatedFlightResponse, responses=spatial_responses)
+@log_function(logger)
+async def get_flights_in_bbox(
+    min_lon: float = Query(..., ge=-180, le=180, description="Минимальная долгота"),
+    min_lat: float = Query(..., ge=-90, le=90, description="Минимальная широта"),
+    max_lon: float = Query(..., ge=-180, le=180, description="Максимальная долгота"),
+    max_lat: float = Query(..., ge=-90, le=90, description="Максимальная широта"),
+    params: SpatialParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Полеты внутри прямоугольника"""
+    try:
+        if min_lon > max_lon or min_lat > max_lat:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Минимальные координаты bbox больше максимальных",
+            )
+        condition = SpatialService.bbox_condition(
+            min_lon, min_lat, max_lon, max_lat, params.point
+        )
+        return await spatial_response(db, condition, params, "bbox_flights")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise spatial_error("bbox", e)
+
+
+@router.post("/polygon", response_model=PaginatedFlightResponse, responses=spatial_responses)
+@log_function(logger)
+async def get_flights_in_polygon(
+    geojson: Dict[str, Any] = Body(
+        ...,
+        description="GeoJSON Polygon/MultiPolygon или Feature, координаты lon, lat",
+        example={
+            "type": "Polygon",
+            "coordinates": [[[37.3, 55.5], [37.9, 55.5], [37.9, 55.9], [37.3, 55.9], [37.3, 55.5]]],
+        },
+    ),
+    params: SpatialParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Полеты внутри произвольного полигона"""
+    try:
+        try:
+            condition = SpatialService.polygon_condition(geojson, params.point)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return await spatial_response(db, condition, params, "polygon_flights")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise spatial_error("polygon", e)
+
+
+@router.get("/radius", response_model=PaginatedFlightResponse, responses=spatial_responses)
+@log_function(logger)
+async def get_flights_in_radius(
+    lat: float = Query(..., ge=-90, le=90, description="Широта центра"),
+    lon: float = Query(..., ge=-180, le=180, description="Долгота центра"),
+    radius_m: float = Query(
+        ..., gt=0, le=SPATIAL_MAX_RADIUS_METERS, description="Радиус в метрах"
+    ),
+    params: SpatialParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Полеты в радиусе от точки"""
+    try:
+        condition = SpatialService.radius_condition(lat, lon, radius_m, params.point)
+        return await spatial_response(db, condition, params, "radius_flights")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise spatial_error("radius", e)
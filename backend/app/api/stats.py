@@ -0,0 +1,148 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.constants import STATS_DURATION_BUCKET_MINUTES, STATS_PERCENTILES
+from backend.app.database import get_db
+from backend.app.logging import log_function, logger
+from backend.app.schemas.stats import (
+    DailyStatsResponse,
+    DroneTypeStatsResponse,
+    DurationBucketResponse,
+    DurationStatsResponse,
+    HourlyStatsResponse,
+    RegionStatsResponse,
+)
+from backend.app.services.flight_service import FlightService
+
+router = APIRouter(prefix="/stats", tags=["Статистика полетов"])
+
+
+class StatsFilters:
+    """Общие фильтры статистики: период и необязательный регион"""
+
+    def __init__(
+        self,
+        from_date: Optional[date] = Query(
+            None,
+            description="Дата начала периода в формате YYYY-MM-DD",
+            example="2025-01-01",
+        ),
+        to_date: Optional[date] = Query(
+            None,
+            description="Дата конца периода в формате YYYY-MM-DD",
+            example="2025-08-01",
+        ),
+        region_id: Optional[int] = Query(None, description="ID региона"),
+    ):
+        self.from_date = from_date
+        self.to_date = to_date
+        self.region_id = region_id
+
+    def as_kwargs(self) -> dict:
+        return {
+            "region_id": self.region_id,
+            "from_date": self.from_date,
+            "to_date": self.to_date,
+        }
+
+
+def stats_error(name: str, e: Exception) -> HTTPException:
+    logger.error(f"Ошибка при расчете статистики {name}: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Error calculating {name} statistics: {str(e)}",
+    )
+
+
+@router.get("/regions", response_model=List[RegionStatsResponse])
+@log_function(logger)
+async def get_region_stats(
+    filters: StatsFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Количество и длительность полетов по регионам"""
+    try:
+        return await FlightService.get_region_stats(db, **filters.as_kwargs())
+    except Exception as e:
+        raise stats_error("regions", e)
+
+
+@router.get("/hourly", response_model=List[HourlyStatsResponse])
+@log_function(logger)
+async def get_hourly_stats(
+    filters: StatsFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Гистограмма взлетов по часам суток (UTC)"""
+    try:
+        return await FlightService.get_hourly_stats(db, **filters.as_kwargs())
+    except Exception as e:
+        raise stats_error("hourly", e)
+
+
+@router.get("/durations", response_model=DurationStatsResponse)
+@log_function(logger)
+async def get_duration_stats(
+    bucket_minutes: int = Query(
+        STATS_DURATION_BUCKET_MINUTES,
+        ge=1,
+        le=24 * 60,
+        description="Ширина интервала гистограммы в минутах",
+    ),
+    filters: StatsFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Гистограмма и перцентили длительности полетов"""
+    try:
+        summary = await FlightService.get_duration_summary(db, **filters.as_kwargs())
+        histogram = await FlightService.get_duration_histogram(
+            db, bucket_minutes, **filters.as_kwargs()
+        )
+        return DurationStatsResponse(
+            flights_count=summary.flights_count,
+            avg_minutes=summary.avg_minutes,
+            max_minutes=summary.max_minutes,
+            percentiles={
+                f"p{round(p * 100)}": getattr(summary, f"p{round(p * 100)}")
+                for p in STATS_PERCENTILES
+            },
+            histogram=[
+                DurationBucketResponse(
+                    from_minutes=int(row.from_minutes),
+                    to_minutes=int(row.from_minutes) + bucket_minutes,
+                    flights_count=row.flights_count,
+                )
+                for row in histogram
+            ],
+        )
+    except Exception as e:
+        raise stats_error("durations", e)
+
+
+@router.get("/drone_types", response_model=List[DroneTypeStatsResponse])
+@log_function(logger)
+async def get_drone_type_stats(
+    filters: StatsFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Количество полетов по типам БПЛА"""
+    try:
+        return await FlightService.get_drone_type_stats(db, **filters.as_kwargs())
+    except Exception as e:
+        raise stats_error("drone types", e)
+
+
+@router.get("/daily", response_model=List[DailyStatsResponse])
+@log_function(logger)
+async def get_daily_stats(
+    filters: StatsFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Количество и длительность полетов по дням"""
+    try:
+        return await FlightService.get_daily_stats(db, **filters.as_kwargs())
+    except Exception as e:
+        raise stats_error("daily", e)
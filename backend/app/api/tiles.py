@@ -0,0 +1,113 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Path, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.constants import TILE_LAYERS, TILE_MAX_ZOOM
+from backend.app.database import get_db
+from backend.app.logging import log_function, logger
+from backend.app.services.export_cache import (
+    etag_matches,
+    export_cache,
+    get_dataset_version,
+    make_etag,
+)
+from backend.app.services.tile_service import TileService
+
+router = APIRouter(prefix="/tiles", tags=["Векторные тайлы"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+def resolve_layers(layers: Optional[str]) -> tuple:
+    """Разбирает список слоев через запятую"""
+    if not layers:
+        return TILE_LAYERS
+    selected = tuple(layer.strip() for layer in layers.split(",") if layer.strip())
+    unknown = [layer for layer in selected if layer not in TILE_LAYERS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные слои: {', '.join(unknown)}. Доступные: {', '.join(TILE_LAYERS)}",
+        )
+    return selected
+
+
+@router.get(
+    "/{z}/{x}/{y}.mvt",
+    responses={
+        200: {"content": {MVT_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}},
+        304: {"description": "Тайл не изменился"},
+        400: {"description": "Некорректные координаты тайла или слои"},
+    },
+)
+@log_function(logger)
+async def get_tile(
+    z: int = Path(..., ge=0, le=TILE_MAX_ZOOM, description="Зум"),
+    x: int = Path(..., ge=0, description="Номер тайла по X"),
+    y: int = Path(..., ge=0, description="Номер тайла по Y"),
+    layers: Optional[str] = Query(
+        None,
+        description="Слои через запятую: takeoff, landing. По умолчанию оба",
+    ),
+    region_id: Optional[int] = Query(None, description="ID региона"),
+    from_date: Optional[date] = Query(
+        None,
+        description="Дата начала периода в формате YYYY-MM-DD",
+        example="2025-01-01",
+    ),
+    to_date: Optional[date] = Query(
+        None,
+        description="Дата конца периода в формате YYYY-MM-DD",
+        example="2025-08-01",
+    ),
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Векторный тайл (Mapbox Vector Tile) с точками взлета и посадки.
+    На мелких зумах точки агрегированы по сетке, у каждой ячейки
+    есть атрибут flights_count.
+    """
+    try:
+        if x >= 2 ** z or y >= 2 ** z:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Тайл {z}/{x}/{y} вне сетки зума {z}",
+            )
+        selected_layers = resolve_layers(layers)
+
+        tile_key = ("tile", z, x, y, selected_layers, region_id, from_date, to_date)
+        version = get_dataset_version()
+        etag = make_etag(tile_key, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache_key = (version, *tile_key)
+        tile = export_cache.get(cache_key)
+        if tile is None:
+            tile = await TileService.get_tile(
+                db,
+                z,
+                x,
+                y,
+                selected_layers,
+                region_id=region_id,
+                from_date=from_date,
+                to_date=to_date,
+            )
+            export_cache.put(cache_key, tile)
+
+        return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при построении тайла {z}/{x}/{y}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building tile {z}/{x}/{y}: {str(e)}",
+        )
@@ -1,4 +1,92 @@
 import os
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# Настройки сжатия выгрузок полетов
+
+EXPORT_DEFAULT_CODEC = os.getenv("EXPORT_DEFAULT_CODEC", "gzip")
+EXPORT_NEGOTIATED_CODECS = [
+    codec.strip().lower()
+    for codec in os.getenv("EXPORT_NEGOTIATED_CODECS", "gzip").split(",")
+    if codec.strip()
+]
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+EXPORT_ZSTD_LEVEL = int(os.getenv("EXPORT_ZSTD_LEVEL", "3"))
+EXPORT_BROTLI_LEVEL = int(os.getenv("EXPORT_BROTLI_LEVEL", "5"))
+EXPORT_COMPRESSION_THREADS = int(
+    os.getenv("EXPORT_COMPRESSION_THREADS", str(os.cpu_count() or 1))
+)
+EXPORT_PARALLEL_THRESHOLD = int(os.getenv("EXPORT_PARALLEL_THRESHOLD", str(4 * 1024 * 1024)))
+EXPORT_PARALLEL_BLOCK_SIZE = int(os.getenv("EXPORT_PARALLEL_BLOCK_SIZE", str(1024 * 1024)))
+
+# Кеш выгрузок полетов
+
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DATASET_VERSION_FILE = os.getenv(
+    "DATASET_VERSION_FILE",
+    os.path.join(tempfile.gettempdir(), "bpla_viewer_dataset_version"),
+)
+
+# Загрузка полетов
+
+# Строк CSV в одной транзакции; после каждой пачки сохраняется чекпоинт
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "10000"))
+# Процессы для фоновой обработки загруженных файлов
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+# Сколько завершенных задач загрузки хранить для страницы статуса
+INGEST_JOBS_KEEP = int(os.getenv("INGEST_JOBS_KEEP", "100"))
+# Через сколько секунд без обновления незавершенная загрузка файла
+# считается брошенной (упал процесс) и ее может продолжить другой воркер
+INGEST_CLAIM_TIMEOUT = int(os.getenv("INGEST_CLAIM_TIMEOUT", "600"))
+# Обрабатывать XLSX прежней цепочкой CSV файлов и оставлять их для отладки
+# вместо потоковой обработки без промежуточных файлов
+INGEST_FILE_STAGES = os.getenv("INGEST_FILE_STAGES", "false").lower() == "true"
+
+# Разбор сообщений о полетах из XLSX
+
+# Чтение листа: openpyxl - построчно в режиме read_only, память не растет
+# с размером файла; calamine - в разы быстрее, но загружает лист целиком
+# (нужен python-calamine)
+XLSX_READER = os.getenv("XLSX_READER", "openpyxl").lower()
+
+# Процессы для разбора; 1 - разбор в текущем процессе
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", "1"))
+# Строк исходного файла в одной порции для процесса
+PARSER_CHUNK_SIZE = int(os.getenv("PARSER_CHUNK_SIZE", "2000"))
+
+# Загрузка файлов через админку
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(500 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Логирование
+
+LOG_FILE = os.getenv("LOG_FILE", "bpla_viewer.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Записей в очереди к потоку записи; при переполнении новые отбрасываются
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Лимит записей с одного места вызова: burst подряд, дальше rate в секунду
+# (0 - без лимита); сверх лимита проходит каждая LOG_SAMPLE_EVERY-я запись
+LOG_RATE_PER_SECOND = float(os.getenv("LOG_RATE_PER_SECOND", "20"))
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", "100"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "1000"))
+
+# Поиск регионов по координатам
+
+# Шаг сетки поиска регионов в градусах; 0 - без сетки, только геометрия
+REGION_GRID_CELL_SIZE = float(os.getenv("REGION_GRID_CELL_SIZE", "0.1"))
+# Каталог для подготовленных по GeoJSON регионов файлов: полигоны (WKB),
+# region_id регионов и сетка поиска
+REGION_CACHE_DIR = os.getenv(
+    "REGION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bpla_viewer_regions")
+)
+# Записей в LRU-кеше координаты -> регион у поиска регионов; 0 - без кеша
+REGION_MEMO_SIZE = int(os.getenv("REGION_MEMO_SIZE", "200000"))
+# Сохранять кеш координат в REGION_CACHE_DIR между загрузками
+REGION_MEMO_PERSIST = os.getenv("REGION_MEMO_PERSIST", "false").lower() == "true"
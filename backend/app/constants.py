@@ -7,3 +7,33 @@ WORD_NAME_OF_REGION = "O"
 WORD_COUNT_OF_FLIGHT = "P"
 PATH_TO_TEMPLATE_EXCEL = "export_template.xlsx"
 NUMBER_OF_ROW = 2
+
+# Constants for flight export
+
+EXPORT_STREAM_CHUNK_SIZE = 5000
+
+# Constants for flight statistics
+
+STATS_PERCENTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+STATS_DURATION_BUCKET_MINUTES = 15
+
+# Constants for flights pagination
+
+FLIGHTS_PAGE_DEFAULT_LIMIT = 100
+FLIGHTS_PAGE_MAX_LIMIT = 1000
+
+# Constants for vector tiles
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_MAX_ZOOM = 22
+# До этого зума включительно точки агрегируются по сетке
+TILE_CLUSTER_MAX_ZOOM = 9
+# Число ячеек сетки агрегации по стороне тайла
+TILE_CLUSTER_GRID = 64
+TILE_LAYERS = ("takeoff", "landing")
+
+# Constants for spatial queries
+
+SPATIAL_POINT_KINDS = ("takeoff", "landing", "any")
+SPATIAL_MAX_RADIUS_METERS = 500_000
@@ -2,6 +2,7 @@ from os import getenv
 from typing import Any, AsyncGenerator
 
 from dotenv import load_dotenv
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from sqlalchemy.orm import declarative_base
@@ -14,6 +15,9 @@ DB_USER = getenv("DB_USER", "postgres")
 DB_PASS = getenv("DB_PASS", "password")
 DB_NAME = getenv("DB_NAME", "flight_db")
 
+# UNIQUE ... NULLS NOT DISTINCT в flight_rollups появился в PostgreSQL 15
+MIN_POSTGRES_VERSION_NUM = 150000
+
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 Base = declarative_base()
@@ -37,4 +41,21 @@ async def create_tables():
     """Создает все таблицы в базе данных"""
 
     async with async_engine.begin() as conn:
+        version = int(await conn.scalar(text("SHOW server_version_num")))
+        if version < MIN_POSTGRES_VERSION_NUM:
+            raise RuntimeError(
+                f"Нужен PostgreSQL 15 или новее (NULLS NOT DISTINCT в flight_rollups), "
+                f"сервер: {version // 10000}"
+            )
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+
+
+def _create_missing_indexes(connection) -> None:
+    """
+    create_all создает индексы только вместе с новыми таблицами,
+    поэтому индексы, добавленные в модели позже, досоздаются отдельно
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
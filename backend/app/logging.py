@@ -1,31 +1,210 @@
 import asyncio
+import atexit
+import copy
 from functools import wraps
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import sys
+import threading
+from time import perf_counter
 import traceback
-from typing import Callable
+from typing import Callable, Dict, Optional
+
+from backend.app.config import (
+    LOG_FILE,
+    LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_RATE_BURST,
+    LOG_RATE_PER_SECOND,
+    LOG_SAMPLE_EVERY,
+)
 
 log_format = (
     '%(asctime)s - [%(levelname)s] -  %(name)s - '
     '(%(filename)s).%(funcName)s(%(lineno)d) - %(message)s'
 )
+
+
+class CallSiteLimiter(logging.Filter):
+    """
+    Ограничивает число записей с одного места вызова (файл и строка).
+
+    На каждое место вызова - token bucket: burst записей подряд, дальше
+    rate записей в секунду. Сверх лимита проходит каждая sample_every-я
+    запись (0 - ни одной), остальные отбрасываются, а их число дописывается
+    к следующей прошедшей записи. rate <= 0 отключает ограничение.
+    """
+
+    def __init__(self, rate: float, burst: int, sample_every: int = 0):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.sample_every = sample_every
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            # [токены, время последней записи, отброшено, пропущено с последней записи]
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [float(self.burst), record.created, 0, 0]
+            tokens = min(self.burst, site[0] + (record.created - site[1]) * self.rate)
+            site[1] = record.created
+            if tokens >= 1:
+                site[0] = tokens - 1
+            else:
+                site[0] = tokens
+                site[2] += 1
+                if not self.sample_every or site[2] % self.sample_every:
+                    site[3] += 1
+                    return False
+            suppressed, site[3] = site[3], 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} [пропущено похожих записей: {suppressed}]"
+            record.args = None
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладет записи в очередь, запись в файл и консоль делает QueueListener
+    в своем потоке. При переполненной очереди запись отбрасывается,
+    а не блокирует вызывающий поток (и event loop).
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение собирается сразу, пока аргументы не изменились;
+        # время, строку формата и traceback форматирует поток записи
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+logger.setLevel(LOG_LEVEL)
 
 stream_handler = logging.StreamHandler(stream=sys.stdout)
 stream_handler.setFormatter(logging.Formatter(log_format))
 
 file_handler = RotatingFileHandler(
-    'bpla_viewer.log',
+    LOG_FILE,
     maxBytes=5 * 1024 * 1024,
     backupCount=5,
     encoding='UTF-8',
 )
 file_handler.setFormatter(logging.Formatter(log_format))
 
-logger.addHandler(stream_handler)
-logger.addHandler(file_handler)
+queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+queue_handler.addFilter(
+    CallSiteLimiter(LOG_RATE_PER_SECOND, LOG_RATE_BURST, LOG_SAMPLE_EVERY)
+)
+listener = QueueListener(
+    queue_handler.queue, stream_handler, file_handler, respect_handler_level=True
+)
+
+logger.addHandler(queue_handler)
+
+_listener_started = False
+
+
+def start_logging() -> None:
+    """Запускает поток записи из очереди; повторный вызов ничего не делает"""
+    global _listener_started
+    if not _listener_started:
+        listener.start()
+        _listener_started = True
+
+
+def stop_logging() -> None:
+    """Дописывает записи из очереди и останавливает поток записи"""
+    global _listener_started
+    if _listener_started:
+        listener.stop()
+        _listener_started = False
+    if queue_handler.dropped:
+        sys.stderr.write(
+            f"Очередь логов переполнялась, отброшено записей: {queue_handler.dropped}\n"
+        )
+
+
+start_logging()
+atexit.register(stop_logging)
+
+
+class CallCounter:
+    """Счетчики вызовов функции: число вызовов, исключений и суммарное время"""
+
+    __slots__ = ("name", "calls", "errors", "seconds")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+
+call_counters: Dict[str, CallCounter] = {}
+
+
+def count_calls(func: Optional[Callable] = None, *, name: Optional[str] = None):
+    """
+    Для часто вызываемых функций вместо записи в лог на каждый вызов:
+    накапливает счетчики, которые выводит log_call_stats.
+    Счетчики не защищены блокировкой и при вызовах из нескольких потоков
+    приблизительны.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        counter = call_counters.setdefault(
+            name or func.__qualname__, CallCounter(name or func.__qualname__)
+        )
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                counter.errors += 1
+                raise
+            finally:
+                counter.calls += 1
+                counter.seconds += perf_counter() - started
+
+        wrapper.counter = counter
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+def log_call_stats(logger, reset: bool = True) -> None:
+    """Одна запись в лог на функцию со счетчиками count_calls"""
+    for counter in call_counters.values():
+        if not counter.calls:
+            continue
+        logger.info(
+            "%s: вызовов %d, исключений %d, время %.3f с",
+            counter.name,
+            counter.calls,
+            counter.errors,
+            counter.seconds,
+        )
+        if reset:
+            counter.calls, counter.errors, counter.seconds = 0, 0, 0.0
 
 
 def logging_decorator(func: callable) -> callable:
@@ -34,7 +213,7 @@ def logging_decorator(func: callable) -> callable:
     @wraps(func)
     def wrapper(*args, **kwargs) -> callable:
         result = func(*args, **kwargs)
-        logger.info(f'Отработала функция: {func.__name__}')
+        logger.info('Отработала функция: %s', func.__name__)
         return result
 
     return wrapper
@@ -42,18 +221,28 @@ def logging_decorator(func: callable) -> callable:
 
 def log_function(logger):
     def decorator(func: callable) -> callable:
+        if not asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                logger.info("Вызвана %s с аргументами: %s, и: %s", func.__name__, args, kwargs)
+                try:
+                    result = func(*args, **kwargs)
+                    logger.info("%s успешно отработала", func.__name__)
+                    return result
+                except Exception as e:
+                    logger.error("Ошибка в %s: %s\n%s", func.__name__, e, traceback.format_exc())
+                    raise
+            return sync_wrapper
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            logger.info(f"Вызвана {func.__name__} с аргументами: {args}, и: {kwargs}")
+            logger.info("Вызвана %s с аргументами: %s, и: %s", func.__name__, args, kwargs)
             try:
-                if asyncio.iscoroutinefunction(func):
-                    result = await func(*args, **kwargs)
-                else:
-                    result = func(*args, **kwargs)
-                logger.info(f"{func.__name__} успешно отработала")
+                result = await func(*args, **kwargs)
+                logger.info("%s успешно отработала", func.__name__)
                 return result
             except Exception as e:
-                logger.error(f"Ошибка в {func.__name__}: {str(e)}\n{traceback.format_exc()}")
+                logger.error("Ошибка в %s: %s\n%s", func.__name__, e, traceback.format_exc())
                 raise
         return async_wrapper
-    return decorator
\ No newline at end of file
+    return decorator
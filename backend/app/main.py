@@ -4,11 +4,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqladmin import Admin
 
-from .database import create_tables, async_engine
+from .database import create_tables, async_engine, AsyncSessionLocal
 from backend.app.admin.admin import FlightAdmin, RegionAdmin, UploadView, UploadFileView
 from backend.app.api.flights import router as flight_router
 from backend.app.api.polygons import router as polygon_router
 from backend.app.api.export import router as export_router
+from backend.app.api.spatial import router as spatial_router
+from backend.app.api.stats import router as stats_router
+from backend.app.api.tiles import router as tiles_router
+from backend.app.services.ingest_jobs import ingest_jobs
+from backend.app.services.rollup_service import rebuild_rollup_if_empty
 
 
 @asynccontextmanager
@@ -16,7 +21,15 @@ async def lifespan(app: FastAPI):
     print("Creating database tables...")
     await create_tables()
     print("Database tables created successfully!")
+    async with AsyncSessionLocal() as session:
+        if await rebuild_rollup_if_empty(session):
+            await session.commit()
+            print("Flight rollup table rebuilt")
+    # Пул и процесс Manager для фоновых загрузок запускаются до приема
+    # запросов, а не при первой загрузке файла в обработчике
+    ingest_jobs.start()
     yield
+    ingest_jobs.shutdown()
 
 
 app = FastAPI(
@@ -65,6 +78,9 @@ admin.add_view(RegionAdmin)
 app.include_router(flight_router)
 app.include_router(polygon_router)
 app.include_router(export_router)
+app.include_router(stats_router)
+app.include_router(tiles_router)
+app.include_router(spatial_router)
 
 
 @app.get("/health", description="Health check", tags=["Health check"])
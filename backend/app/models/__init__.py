@@ -1,2 +1,4 @@
 from .region import Region
 from .flight import Flight
+from .flight_rollup import FlightRollup
+from .ingest_run import IngestRun
@@ -10,7 +10,9 @@ from sqlalchemy import (
     DateTime,
     Interval,
     ForeignKey,
+    Index,
     func,
+    text,
 )
 from sqlalchemy.orm import relationship, Mapped
 
@@ -19,12 +21,43 @@ from backend.app.database import Base
 
 class Flight(Base):
     __tablename__ = "flights"
+    __table_args__ = (
+        # Ключ сортировки постраничной выдачи /flights
+        Index("idx_flights_flight_date_id", "flight_date", "id"),
+        # GiST-индексы для ST_Intersects по bbox и полигону. Имена совпадают
+        # с теми, что GeoAlchemy2 создавал автоматически
+        Index(
+            "idx_flights_takeoff_coordinates",
+            "takeoff_coordinates",
+            postgresql_using="gist",
+        ),
+        Index(
+            "idx_flights_landing_coordinates",
+            "landing_coordinates",
+            postgresql_using="gist",
+        ),
+        # Индексы по geography для ST_DWithin с радиусом в метрах
+        Index(
+            "idx_flights_takeoff_geography",
+            func.geography(text("takeoff_coordinates")),
+            postgresql_using="gist",
+        ),
+        Index(
+            "idx_flights_landing_geography",
+            func.geography(text("landing_coordinates")),
+            postgresql_using="gist",
+        ),
+    )
 
     id: Mapped[int] = Column(Integer, primary_key=True, index=True, unique=True)
     flight_id: Mapped[Optional[str]] = Column(String, unique=True, index=True, nullable=True)
     drone_type: Mapped[Optional[str]] = Column(String, nullable=True)
-    takeoff_coordinates: Mapped[Optional[Geometry]] = Column(Geometry("POINT", srid=4326), nullable=True)
-    landing_coordinates: Mapped[Optional[Geometry]] = Column(Geometry("POINT", srid=4326), nullable=True)
+    takeoff_coordinates: Mapped[Optional[Geometry]] = Column(
+        Geometry("POINT", srid=4326, spatial_index=False), nullable=True
+    )
+    landing_coordinates: Mapped[Optional[Geometry]] = Column(
+        Geometry("POINT", srid=4326, spatial_index=False), nullable=True
+    )
     flight_date: Mapped[Optional[date]] = Column(Date, nullable=True)
     takeoff_time: Mapped[Optional[time]] = Column(Time, nullable=True)
     landing_time: Mapped[Optional[time]] = Column(Time, nullable=True)
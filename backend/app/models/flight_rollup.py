@@ -0,0 +1,52 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    ForeignKey,
+    Integer,
+    SmallInteger,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped
+
+from backend.app.database import Base
+
+
+class FlightRollup(Base):
+    """
+    Предрасчитанные агрегаты полетов: регион x дата x час взлета x тип БПЛА.
+    Обновляется вместе с загрузкой полетов, полностью пересчитывается
+    командой python -m backend.app.utils.rebuild_rollup.
+    """
+
+    __tablename__ = "flight_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "region_id",
+            "flight_date",
+            "takeoff_hour",
+            "drone_type",
+            name="uq_flight_rollups_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id: Mapped[int] = Column(Integer, primary_key=True)
+    region_id: Mapped[int] = Column(
+        Integer, ForeignKey("regions.region_id"), nullable=False, index=True
+    )
+    flight_date: Mapped[Optional[date]] = Column(Date, nullable=True, index=True)
+    takeoff_hour: Mapped[Optional[int]] = Column(SmallInteger, nullable=True)
+    drone_type: Mapped[Optional[str]] = Column(String, nullable=True)
+
+    flights_count: Mapped[int] = Column(Integer, nullable=False, default=0)
+    duration_count: Mapped[int] = Column(Integer, nullable=False, default=0)
+    duration_sum_seconds: Mapped[int] = Column(BigInteger, nullable=False, default=0)
+    duration_min_seconds: Mapped[Optional[int]] = Column(Integer, nullable=True)
+    duration_max_seconds: Mapped[Optional[int]] = Column(Integer, nullable=True)
+    missing_takeoff_coordinates: Mapped[int] = Column(Integer, nullable=False, default=0)
+    missing_landing_coordinates: Mapped[int] = Column(Integer, nullable=False, default=0)
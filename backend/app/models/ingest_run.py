@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, func
+from sqlalchemy.orm import Mapped
+
+from backend.app.database import Base
+
+
+class IngestRun(Base):
+    """
+    Загрузка файла с полетами. Ключ - SHA-256 содержимого файла,
+    rows_committed - сколько строк файла уже зафиксировано в базе.
+    Повторная загрузка того же файла продолжается с этой строки.
+    """
+
+    __tablename__ = "ingest_runs"
+
+    STATUS_RUNNING = "running"
+    STATUS_FAILED = "failed"
+    STATUS_COMPLETED = "completed"
+
+    id: Mapped[int] = Column(Integer, primary_key=True)
+    file_hash: Mapped[str] = Column(String(64), unique=True, index=True, nullable=False)
+    file_name: Mapped[Optional[str]] = Column(String, nullable=True)
+    status: Mapped[str] = Column(String(16), nullable=False, default=STATUS_RUNNING)
+
+    rows_committed: Mapped[int] = Column(Integer, nullable=False, default=0)
+    total: Mapped[int] = Column(Integer, nullable=False, default=0)
+    inserted: Mapped[int] = Column(Integer, nullable=False, default=0)
+    skipped: Mapped[int] = Column(Integer, nullable=False, default=0)
+    invalid: Mapped[int] = Column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = Column(Text, nullable=True)
+
+    started_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at: Mapped[Optional[datetime]] = Column(DateTime(timezone=True), nullable=True)
+
+    def report(self) -> dict:
+        return {
+            "total": self.total,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "rows_committed": self.rows_committed,
+            "status": self.status,
+        }
+
+    def __str__(self) -> str:
+        return f"{self.file_name} ({self.status})"
@@ -4,8 +4,9 @@ from pydantic import BaseModel
 
 
 class FlightResponse(BaseModel):
-    flight_id: str
-    drone_type: str
+    id: int
+    flight_id: Optional[str] = None
+    drone_type: Optional[str] = None
     takeoff_lat: Optional[float] = None
     takeoff_lon: Optional[float] = None
     landing_lat: Optional[float] = None
@@ -22,7 +23,8 @@ class FlightResponse(BaseModel):
 
 class PaginatedFlightResponse(BaseModel):
     data: List[FlightResponse]
-    total: int
-    skip: int
+    total: Optional[int] = None
+    skip: int = 0
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None
@@ -0,0 +1,54 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class RegionStatsResponse(BaseModel):
+    region_id: int
+    region_name: Optional[str] = None
+    flights_count: int
+    total_duration_minutes: float
+    avg_duration_minutes: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class HourlyStatsResponse(BaseModel):
+    hour: int
+    flights_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class DurationBucketResponse(BaseModel):
+    from_minutes: int
+    to_minutes: int
+    flights_count: int
+
+
+class DurationStatsResponse(BaseModel):
+    flights_count: int
+    avg_minutes: Optional[float] = None
+    max_minutes: Optional[float] = None
+    percentiles: Dict[str, Optional[float]]
+    histogram: List[DurationBucketResponse]
+
+
+class DroneTypeStatsResponse(BaseModel):
+    drone_type: Optional[str] = None
+    flights_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class DailyStatsResponse(BaseModel):
+    flight_date: date
+    flights_count: int
+    total_duration_minutes: float
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+from typing import Hashable, Optional
+import uuid
+
+from backend.app.config import DATASET_VERSION_FILE, EXPORT_CACHE_MAX_BYTES
+from backend.app.logging import logger
+
+
+def _write_dataset_version(version: str) -> None:
+    """Атомарно записывает версию данных в файл"""
+    tmp_path = f"{DATASET_VERSION_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, DATASET_VERSION_FILE)
+
+
+def get_dataset_version() -> str:
+    """
+    Текущая версия данных о полетах.
+
+    Версия хранится в файле, поэтому общая для всех воркеров uvicorn
+    и читается без обращения к базе. Если файла нет (например, после
+    очистки /tmp), создается новая случайная версия, чтобы старые ETag
+    гарантированно перестали совпадать.
+    """
+    try:
+        with open(DATASET_VERSION_FILE, "r", encoding="utf-8") as f:
+            version = f.read().strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    return bump_dataset_version()
+
+
+def bump_dataset_version() -> str:
+    """Меняет версию данных. Вызывается после каждого изменения полетов"""
+    version = uuid.uuid4().hex[:16]
+    _write_dataset_version(version)
+    logger.info(f"Версия данных о полетах обновлена: {version}")
+    return version
+
+
+def make_etag(key: Hashable, version: str) -> str:
+    """Строгий ETag для выгрузки с ключом key при версии данных version"""
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверяет заголовок If-None-Match (слабое сравнение, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ExportCache:
+    """
+    LRU-кеш сжатых выгрузок, ограниченный суммарным размером в байтах.
+    Ключ должен включать версию данных, поэтому устаревшие записи
+    просто перестают запрашиваться и вытесняются новыми.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: Hashable, payload: bytes) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = payload
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+export_cache = ExportCache(EXPORT_CACHE_MAX_BYTES)
@@ -1,66 +1,46 @@
-import csv
-from datetime import timedelta, date, time
-import gzip
-from io import StringIO, BytesIO
-from typing import Optional, Any
+from datetime import date
+from typing import Optional, AsyncIterator, Sequence, Tuple
 
 import asyncio
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncResult
+from sqlalchemy import select, func, Select, literal_column, tuple_
 from sqlalchemy.engine.result import ChunkedIteratorResult
 
+from backend.app.constants import EXPORT_STREAM_CHUNK_SIZE, STATS_PERCENTILES
 from backend.app.models.flight import Flight
+from backend.app.models.flight_rollup import FlightRollup
 from backend.app.models.region import Region
+from backend.app.utils.compression import Codec, CODECS
+from backend.app.utils.csv_format import CsvFormatter, format_duration
+from backend.app.utils.export_arrow import BINARY_BUILDERS
 
 
 class FlightService:
-    @staticmethod
-    def _format_csv_value(value: Any) -> str:
-        """Форматирует значение для CSV"""
-        if value is None:
-            return "Нет данных"
-        return str(value)
-
-    @staticmethod
-    def _format_coordinates(lat: Optional[float], lon: Optional[float]) -> str:
-        """Форматирует координаты в строку 'lat lon'"""
-        if lat is None or lon is None:
-            return "Нет данных"
-        return f"{lat} {lon}"
-
-    @staticmethod
-    def _format_date_for_csv(flight_date: Optional[date]) -> str:
-        """Форматирует дату в DD.MM.YY для CSV"""
-        if not flight_date:
-            return "Нет данных"
-        return flight_date.strftime("%d.%m.%y")
+    CSV_HEADER = [
+        "flight_id",
+        "drone_type",
+        "takeoff_coords",
+        "landing_coords",
+        "flight_date",
+        "takeoff_time",
+        "landing_time",
+        "flight_duration",
+        "region_name",
+    ]
 
     @staticmethod
-    def _format_time_for_csv(time_obj: Optional[time]) -> str:
-        """Форматирует время в HH:MM для CSV"""
-        if not time_obj:
-            return "Нет данных"
-        return time_obj.strftime("%H:%M")
-
-    @staticmethod
-    def _format_duration(duration: Optional[timedelta]) -> str:
-        """Форматирует продолжительность в HH:MM для CSV"""
-        if not duration:
-            return "Нет данных"
-        total_seconds = int(duration.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        return f"{hours:01d}:{minutes:02d}"
-
-    @staticmethod
-    async def get_data(
-        db: AsyncSession,
+    def _build_query(
         skip: Optional[int] = None,
         limit: Optional[int] = None,
         region_id: Optional[int] = None,
         from_date: Optional[date] = None,
         to_date: Optional[date] = None,
-    ) -> ChunkedIteratorResult:
+        conditions: Sequence = (),
+    ) -> Select:
+        """
+        Собирает запрос выгрузки полетов с фильтрами.
+        conditions - дополнительные условия WHERE, например пространственные
+        """
         query = (
             select(
                 Flight.flight_id,
@@ -76,20 +56,140 @@ class FlightService:
                 Region.name.label("region_name"),
             ).join(Region, Flight.region_id == Region.region_id, isouter=True)
         ).order_by(Flight.flight_date)
-        if from_date:
-            query = query.where(Flight.flight_date >= from_date)
-        if to_date:
-            query = query.where(Flight.flight_date <= to_date)
+        query = FlightService._filter_flights(query, region_id, from_date, to_date)
+        if conditions:
+            query = query.where(*conditions)
         if skip:
             query = query.offset(skip)
         if limit:
             query = query.limit(limit)
-        if region_id:
-            query = query.where(Flight.region_id == region_id)
+        return query
 
+    @staticmethod
+    async def get_data(
+        db: AsyncSession,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        conditions: Sequence = (),
+    ) -> ChunkedIteratorResult:
+        query = FlightService._build_query(
+            skip=skip,
+            limit=limit,
+            region_id=region_id,
+            from_date=from_date,
+            to_date=to_date,
+            conditions=conditions,
+        )
         result = await db.execute(query)
         return result
 
+    @staticmethod
+    async def get_flights_page(
+        db: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[Optional[date], int]] = None,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        conditions: Sequence = (),
+    ) -> list:
+        """
+        Страница полетов в порядке (flight_date, id) по ключу, а не через OFFSET.
+
+        after - позиция последнего полета предыдущей страницы. Сравнение
+        кортежей идет по индексу idx_flights_flight_date_id, поэтому любая
+        страница стоит как первая. Полеты без даты идут в конце отдельной
+        фазой по id. Возвращает до limit + 1 строк: лишняя означает,
+        что есть следующая страница.
+        """
+        query = (
+            FlightService._build_query(
+                region_id=region_id,
+                from_date=from_date,
+                to_date=to_date,
+                conditions=conditions,
+            )
+            .add_columns(Flight.id)
+            .order_by(None)
+        )
+        last_date, last_id = after if after else (None, None)
+        rows = []
+
+        if after is None or last_date is not None:
+            dated = query.where(Flight.flight_date.is_not(None))
+            if last_date is not None:
+                dated = dated.where(
+                    tuple_(Flight.flight_date, Flight.id) > tuple_(last_date, last_id)
+                )
+            dated = dated.order_by(Flight.flight_date, Flight.id).limit(limit + 1)
+            rows = (await db.execute(dated)).all()
+            last_id = None
+
+        # Фильтр по периоду отсекает полеты без даты
+        if len(rows) <= limit and not (from_date or to_date):
+            undated = query.where(Flight.flight_date.is_(None))
+            if last_id is not None:
+                undated = undated.where(Flight.id > last_id)
+            undated = undated.order_by(Flight.id).limit(limit + 1 - len(rows))
+            rows.extend((await db.execute(undated)).all())
+
+        return rows
+
+    @staticmethod
+    async def count_flights(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> int:
+        """Количество полетов по сводной таблице"""
+        query = select(func.coalesce(func.sum(FlightRollup.flights_count), 0))
+        query = FlightService._filter_rollup(query, region_id, from_date, to_date)
+        return int(await db.scalar(query))
+
+    @staticmethod
+    def format_flight(flight) -> dict:
+        """Строка полета для JSON-ответа"""
+        return {
+            "id": flight.id,
+            "flight_id": flight.flight_id,
+            "drone_type": flight.drone_type,
+            "takeoff_lat": flight.takeoff_lat,
+            "takeoff_lon": flight.takeoff_lon,
+            "landing_lat": flight.landing_lat,
+            "landing_lon": flight.landing_lon,
+            "flight_date": flight.flight_date.isoformat() if flight.flight_date else None,
+            "takeoff_time": flight.takeoff_time.strftime("%H:%M") if flight.takeoff_time else None,
+            "landing_time": flight.landing_time.strftime("%H:%M") if flight.landing_time else None,
+            "flight_duration": (
+                format_duration(flight.flight_duration)
+                if flight.flight_duration
+                else None
+            ),
+            "region_name": flight.region_name,
+        }
+
+    @staticmethod
+    async def stream_data(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        chunk_size: int = EXPORT_STREAM_CHUNK_SIZE,
+        conditions: Sequence = (),
+    ) -> AsyncResult:
+        """Открывает серверный курсор по тому же запросу, что и get_data"""
+        query = FlightService._build_query(
+            region_id=region_id,
+            from_date=from_date,
+            to_date=to_date,
+            conditions=conditions,
+        ).execution_options(yield_per=chunk_size)
+        return await db.stream(query)
+
     @staticmethod
     async def get_data_to_excel(
             db: AsyncSession,
@@ -99,73 +199,276 @@ class FlightService:
         query = (
             select(
                 Region.name.label("region_name"),
-                func.count(Flight.flight_id).label("count_flights"),
-            ).join(Region, Flight.region_id == Region.region_id, isouter=True)
+                func.sum(FlightRollup.flights_count).label("count_flights"),
+            ).join(Region, FlightRollup.region_id == Region.region_id, isouter=True)
         ).group_by(Region.name.label("region_name"))
+        query = FlightService._filter_rollup(query, from_date=from_date, to_date=to_date)
+
+        result = await db.execute(query)
+        return result.all()
+
+    @staticmethod
+    def _filter_flights(
+        query: Select,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> Select:
+        """Добавляет к запросу фильтры по региону и периоду"""
         if from_date:
             query = query.where(Flight.flight_date >= from_date)
         if to_date:
             query = query.where(Flight.flight_date <= to_date)
+        if region_id:
+            query = query.where(Flight.region_id == region_id)
+        return query
+
+    @staticmethod
+    def _filter_rollup(
+        query: Select,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> Select:
+        """Фильтры по региону и периоду для сводной таблицы"""
+        if from_date:
+            query = query.where(FlightRollup.flight_date >= from_date)
+        if to_date:
+            query = query.where(FlightRollup.flight_date <= to_date)
+        if region_id:
+            query = query.where(FlightRollup.region_id == region_id)
+        return query
+
+    @staticmethod
+    def _rollup_duration_minutes():
+        """Суммарная длительность полетов группы в минутах"""
+        return func.coalesce(func.sum(FlightRollup.duration_sum_seconds), 0) / 60.0
+
+    @staticmethod
+    def _duration_minutes():
+        """Длительность полета в минутах"""
+        # Литерал вместо параметра: выражение повторяется в GROUP BY
+        return func.extract("epoch", Flight.flight_duration) / literal_column("60")
+
+    @staticmethod
+    async def get_region_stats(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> list:
+        """Количество и суммарная длительность полетов по регионам"""
+        flights_count = func.sum(FlightRollup.flights_count)
+        total_duration = FlightService._rollup_duration_minutes()
+        query = (
+            select(
+                FlightRollup.region_id,
+                Region.name.label("region_name"),
+                flights_count.label("flights_count"),
+                total_duration.label("total_duration_minutes"),
+                (
+                    total_duration
+                    / func.nullif(func.sum(FlightRollup.duration_count), 0)
+                ).label("avg_duration_minutes"),
+            )
+            .join(Region, FlightRollup.region_id == Region.region_id, isouter=True)
+            .group_by(FlightRollup.region_id, Region.name)
+            .order_by(flights_count.desc())
+        )
+        query = FlightService._filter_rollup(query, region_id, from_date, to_date)
+        result = await db.execute(query)
+        return result.all()
+
+    @staticmethod
+    async def get_hourly_stats(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> list:
+        """Гистограмма количества взлетов по часам суток"""
+        query = (
+            select(
+                FlightRollup.takeoff_hour.label("hour"),
+                func.sum(FlightRollup.flights_count).label("flights_count"),
+            )
+            .where(FlightRollup.takeoff_hour.is_not(None))
+            .group_by(FlightRollup.takeoff_hour)
+            .order_by(FlightRollup.takeoff_hour)
+        )
+        query = FlightService._filter_rollup(query, region_id, from_date, to_date)
+        result = await db.execute(query)
+        return result.all()
+
+    @staticmethod
+    async def get_duration_histogram(
+        db: AsyncSession,
+        bucket_minutes: int,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> list:
+        """Гистограмма длительностей полетов с шагом bucket_minutes"""
+        width = literal_column(str(int(bucket_minutes)))
+        bucket = func.floor(FlightService._duration_minutes() / width)
+        query = (
+            select(
+                (bucket * width).label("from_minutes"),
+                func.count(Flight.id).label("flights_count"),
+            )
+            .where(Flight.flight_duration.is_not(None))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        query = FlightService._filter_flights(query, region_id, from_date, to_date)
+        result = await db.execute(query)
+        return result.all()
+
+    @staticmethod
+    async def get_duration_summary(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ):
+        """Количество, среднее, максимум и перцентили длительности полетов"""
+        duration = FlightService._duration_minutes()
+        percentiles = [
+            func.percentile_cont(p).within_group(duration).label(f"p{round(p * 100)}")
+            for p in STATS_PERCENTILES
+        ]
+        query = select(
+            func.count(Flight.id).label("flights_count"),
+            func.avg(duration).label("avg_minutes"),
+            func.max(duration).label("max_minutes"),
+            *percentiles,
+        ).where(Flight.flight_duration.is_not(None))
+        query = FlightService._filter_flights(query, region_id, from_date, to_date)
+        result = await db.execute(query)
+        return result.one()
+
+    @staticmethod
+    async def get_drone_type_stats(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> list:
+        """Количество полетов по типам БПЛА"""
+        flights_count = func.sum(FlightRollup.flights_count)
+        query = (
+            select(
+                FlightRollup.drone_type,
+                flights_count.label("flights_count"),
+            )
+            .group_by(FlightRollup.drone_type)
+            .order_by(flights_count.desc())
+        )
+        query = FlightService._filter_rollup(query, region_id, from_date, to_date)
+        result = await db.execute(query)
+        return result.all()
 
+    @staticmethod
+    async def get_daily_stats(
+        db: AsyncSession,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> list:
+        """Количество и суммарная длительность полетов по дням"""
+        query = (
+            select(
+                FlightRollup.flight_date,
+                func.sum(FlightRollup.flights_count).label("flights_count"),
+                FlightService._rollup_duration_minutes().label("total_duration_minutes"),
+            )
+            .where(FlightRollup.flight_date.is_not(None))
+            .group_by(FlightRollup.flight_date)
+            .order_by(FlightRollup.flight_date)
+        )
+        query = FlightService._filter_rollup(query, region_id, from_date, to_date)
         result = await db.execute(query)
         return result.all()
 
     @staticmethod
-    async def create_csv_gzip_async(flights_data: ChunkedIteratorResult) -> bytes:
+    async def create_csv_gzip_async(
+        flights_data: ChunkedIteratorResult,
+        codec: Optional[Codec] = None,
+        level: Optional[int] = None,
+    ) -> bytes:
         """Асинхронное создание CSV и сжатие"""
 
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
-            None, FlightService.create_csv_gzip_sync, flights_data
+            None, FlightService.create_csv_gzip_sync, flights_data, codec, level
         )
 
     @staticmethod
-    def create_csv_gzip_sync(flights_data) -> bytes:
-        """Синхронная версия для executor"""
-        csv_buffer = StringIO()
-        writer = csv.writer(csv_buffer)
-
-        writer.writerow(
-            [
-                "flight_id",
-                "drone_type",
-                "takeoff_coords",
-                "landing_coords",
-                "flight_date",
-                "takeoff_time",
-                "landing_time",
-                "flight_duration",
-                "region_name",
-            ]
+    async def create_binary_export_async(
+        flights_data: ChunkedIteratorResult, export_format: str
+    ) -> bytes:
+        """Асинхронное создание выгрузки Arrow IPC или Parquet"""
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, BINARY_BUILDERS[export_format], flights_data
         )
 
-        for flight in flights_data:
-            takeoff_coords = FlightService._format_coordinates(
-                float(flight.takeoff_lat) if flight.takeoff_lat else None,
-                float(flight.takeoff_lon) if flight.takeoff_lon else None,
-            )
+    @staticmethod
+    def _format_csv_chunk(
+        rows: Sequence,
+        with_header: bool = False,
+        formatter: Optional[CsvFormatter] = None,
+    ) -> bytes:
+        """
+        Форматирует пачку строк в CSV и кодирует в UTF-8.
+        Пачки одной выгрузки передают общий formatter
+        """
+        header = FlightService.CSV_HEADER if with_header else None
+        return (formatter or CsvFormatter()).write_csv(rows, header).encode("utf-8")
 
-            landing_coords = FlightService._format_coordinates(
-                float(flight.landing_lat) if flight.landing_lat else None,
-                float(flight.landing_lon) if flight.landing_lon else None,
-            )
+    @staticmethod
+    def create_csv_gzip_sync(
+        flights_data,
+        codec: Optional[Codec] = None,
+        level: Optional[int] = None,
+    ) -> bytes:
+        """Синхронная версия для executor. По умолчанию сжимает в gzip"""
+        codec = codec or CODECS["gzip"]
+        data = FlightService._format_csv_chunk(list(flights_data), with_header=True)
+        return codec.compress(data, level)
 
-            writer.writerow(
-                [
-                    FlightService._format_csv_value(flight.flight_id),
-                    FlightService._format_csv_value(flight.drone_type),
-                    takeoff_coords,
-                    landing_coords,
-                    FlightService._format_date_for_csv(flight.flight_date),
-                    FlightService._format_time_for_csv(flight.takeoff_time),
-                    FlightService._format_time_for_csv(flight.landing_time),
-                    FlightService._format_duration(flight.flight_duration),
-                    FlightService._format_csv_value(flight.region_name),
-                ]
-            )
+    @staticmethod
+    async def stream_csv_gzip(
+        flights_result: AsyncResult,
+        first_chunk: Sequence,
+        codec: Optional[Codec] = None,
+        level: Optional[int] = None,
+        chunk_size: int = EXPORT_STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """
+        Потоково формирует CSV и сжимает его пачками по chunk_size строк.
+        Форматирование и сжатие каждой пачки выполняются в executor,
+        поэтому в памяти одновременно находится только одна пачка.
+        """
+        loop = asyncio.get_event_loop()
+        compressor = (codec or CODECS["gzip"]).compressobj(level)
+        # Пачки обрабатываются по очереди, поэтому formatter не используется
+        # из двух потоков одновременно
+        formatter = CsvFormatter()
 
-        gz_buffer = BytesIO()
-        with gzip.GzipFile(fileobj=gz_buffer, mode="wb", compresslevel=9) as f_out:
-            f_out.write(csv_buffer.getvalue().encode("utf-8"))
+        def encode(rows: Sequence, with_header: bool) -> bytes:
+            return compressor.compress(
+                FlightService._format_csv_chunk(rows, with_header, formatter)
+            )
 
-        return gz_buffer.getvalue()
+        try:
+            rows, with_header = first_chunk, True
+            while rows:
+                data = await loop.run_in_executor(None, encode, rows, with_header)
+                if data:
+                    yield data
+                rows, with_header = await flights_result.fetchmany(chunk_size), False
+            yield compressor.flush()
+        finally:
+            await flights_result.close()
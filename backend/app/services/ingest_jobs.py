@@ -0,0 +1,277 @@
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+from functools import partial
+import multiprocessing
+import os
+import threading
+from time import time
+from typing import Optional, Tuple
+import uuid
+
+from backend.app.config import INGEST_FILE_STAGES, INGEST_JOBS_KEEP, INGEST_WORKERS
+from backend.app.logging import logger
+from backend.app.models.ingest_run import IngestRun
+
+STAGE_QUEUED = "queued"
+STAGE_PARSING = "parsing"
+STAGE_LOADING = "loading"
+STAGE_DONE = "done"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+def _update_job(jobs, job_id: str, **fields) -> None:
+    # Вложенный словарь в DictProxy не синхронизируется, его нужно переприсвоить
+    job = jobs[job_id]
+    job.update(fields)
+    jobs[job_id] = job
+
+
+def _start_stage(jobs, job_id: str, stage: str) -> None:
+    _update_job(
+        jobs,
+        job_id,
+        stage=stage,
+        stage_started_at=time(),
+        rows_processed=0,
+        rows_total=None,
+    )
+
+
+def run_ingest_job(
+    jobs, job_id: str, path: str, filename: str, size: int, file_hash: Optional[str]
+) -> None:
+    """
+    Выполняется в процессе пула: разбор XLSX и загрузка CSV в базу.
+    Прогресс пишется в общий словарь jobs, временные файлы удаляются.
+    """
+    from backend.app.utils.csv_load import main as csv_load
+    from backend.app.utils.parser.flight_data_processor import flight_rows
+    from backend.app.utils.parser.flight_data_processor import main as xlsx_load
+
+    files_to_remove = [path]
+    _update_job(jobs, job_id, status=STATUS_RUNNING, started_at=time())
+    try:
+
+        def progress(rows_processed: int, rows_total: int) -> None:
+            _update_job(
+                jobs, job_id, rows_processed=rows_processed, rows_total=rows_total
+            )
+
+        region_stats = {}
+        is_xlsx = path.lower().endswith((".xlsx", ".xls"))
+        if is_xlsx and not INGEST_FILE_STAGES:
+            # Строки листа разбираются и загружаются пачками по мере чтения
+            _start_stage(jobs, job_id, STAGE_LOADING)
+
+            # Строки до чекпоинта прошлой попытки не разбираются заново
+            def rows_from(start_row: int):
+                return flight_rows(path, region_stats=region_stats, start_row=start_row)
+
+            report = asyncio.run(
+                csv_load(path, progress=progress, file_hash=file_hash, rows_from=rows_from)
+            )
+        else:
+            csv_path, csv_hash = path, file_hash
+            if is_xlsx:
+                # Отладочный режим: файлы всех этапов остаются на диске
+                _start_stage(jobs, job_id, STAGE_PARSING)
+                csv_path = xlsx_load(path, keep_files=True, region_stats=region_stats)
+                csv_hash = None
+
+            _start_stage(jobs, job_id, STAGE_LOADING)
+            report = asyncio.run(
+                csv_load(csv_path, progress=progress, file_hash=csv_hash)
+            )
+        if report is None:
+            raise RuntimeError("Ошибка при загрузке данных в базу, подробности в логе")
+
+        if report["status"] == IngestRun.STATUS_RUNNING:
+            # Тот же файл в это время загружает другой воркер приложения
+            message = f"Файл '{filename}' уже загружается другой задачей"
+        else:
+            message = (
+                f"Файл '{filename}' успешно обработан: добавлено полетов "
+                f"{report['inserted']}, пропущено {report['skipped']}, "
+                f"некорректных строк {report['invalid']}"
+            )
+        result = {
+            "success": True,
+            "message": message,
+            "processed_records": report["total"],
+            "report": report,
+            # Попадания в кеш регионов по координатам (только для XLSX)
+            "region_cache": region_stats or None,
+            "file_info": {
+                "filename": filename,
+                "size": f"{size / 1024 / 1024:.2f} MB",
+                "type": os.path.splitext(filename)[1].lstrip(".").upper() or None,
+            },
+        }
+        _update_job(
+            jobs,
+            job_id,
+            status=STATUS_COMPLETED,
+            stage=STAGE_DONE,
+            finished_at=time(),
+            result=result,
+        )
+    except Exception as e:
+        logger.error(f"Ошибка фоновой загрузки {filename}: {str(e)}")
+        job = jobs[job_id]
+        _update_job(
+            jobs,
+            job_id,
+            status=STATUS_FAILED,
+            finished_at=time(),
+            errors=job["errors"] + [str(e)],
+        )
+    finally:
+        for file_path in files_to_remove:
+            if file_path and os.path.exists(file_path):
+                os.unlink(file_path)
+
+
+class IngestJobs:
+    """
+    Очередь фоновых загрузок файлов в пуле процессов.
+
+    Разбор файла - синхронная нагрузка на CPU, поэтому он выполняется
+    вне процесса uvicorn и не блокирует event loop API. Статус задач хранится
+    в словаре multiprocessing.Manager и доступен в процессе, принявшем файл.
+    Повтор файла внутри процесса отсекает find_by_hash; между воркерами
+    uvicorn одновременную загрузку одного файла исключает захват записи
+    ingest_runs в базе (csv_load.claim_ingest_run).
+
+    Пул и процесс Manager запускает start() при старте приложения. Каждое
+    обращение к словарю задач - IPC-вызов к процессу Manager, поэтому из
+    обработчиков запросов используются submit_async и get_async, которые
+    выполняют такие вызовы в потоке executor, а не в event loop.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS, keep: int = INGEST_JOBS_KEEP):
+        self.workers = workers
+        self.keep = keep
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._jobs = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Запускает процесс Manager и пул; повторный вызов ничего не делает"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._jobs = self._manager.dict()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context
+            )
+
+    def _prune(self) -> None:
+        finished = [
+            (job["finished_at"], job_id)
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None
+        ]
+        for _, job_id in sorted(finished)[: max(0, len(finished) - self.keep)]:
+            self._jobs.pop(job_id, None)
+
+    def find_by_hash(self, file_hash: str) -> Optional[str]:
+        """Незавершившаяся ошибкой задача с тем же содержимым файла"""
+        for job_id, job in self._jobs.items():
+            if job["file_hash"] == file_hash and job["status"] != STATUS_FAILED:
+                return job_id
+        return None
+
+    def submit_sync(
+        self, path: str, filename: str, size: int, file_hash: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """
+        Ставит файл в очередь и сразу возвращает (id задачи, повтор ли это).
+        Если такой же файл уже в очереди, обрабатывается или загружен,
+        новый файл удаляется и возвращается id существующей задачи.
+        """
+        self.start()
+        self._prune()
+        if file_hash:
+            existing = self.find_by_hash(file_hash)
+            if existing is not None:
+                os.unlink(path)
+                logger.info(f"Файл {filename} уже загружается, задача {existing}")
+                return existing, True
+
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "filename": filename,
+            "file_hash": file_hash,
+            "status": STATUS_QUEUED,
+            "stage": STAGE_QUEUED,
+            "rows_processed": 0,
+            "rows_total": None,
+            "created_at": time(),
+            "started_at": None,
+            "stage_started_at": None,
+            "finished_at": None,
+            "errors": [],
+            "result": None,
+        }
+        future = self._executor.submit(
+            run_ingest_job, self._jobs, job_id, path, filename, size, file_hash
+        )
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        logger.info(f"Файл {filename} поставлен в очередь загрузки, задача {job_id}")
+        return job_id, False
+
+    def _on_done(self, job_id: str, future) -> None:
+        # Падение самого процесса пула (например, нехватка памяти)
+        error = future.exception()
+        if error is not None and job_id in self._jobs:
+            job = self._jobs[job_id]
+            _update_job(
+                self._jobs,
+                job_id,
+                status=STATUS_FAILED,
+                finished_at=time(),
+                errors=job["errors"] + [str(error)],
+            )
+
+    async def submit_async(
+        self, path: str, filename: str, size: int, file_hash: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """submit_sync в потоке executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self.submit_sync, path, filename, size, file_hash)
+        )
+
+    def get_sync(self, job_id: str) -> Optional[dict]:
+        """Статус задачи со скоростью обработки строк в секунду"""
+        if self._jobs is None or job_id not in self._jobs:
+            return None
+        job = dict(self._jobs[job_id])
+        rows_per_sec = None
+        if job["stage_started_at"] and job["rows_processed"]:
+            elapsed = (job["finished_at"] or time()) - job["stage_started_at"]
+            rows_per_sec = round(job["rows_processed"] / max(elapsed, 1e-6), 1)
+        job["rows_per_sec"] = rows_per_sec
+        return job
+
+    async def get_async(self, job_id: str) -> Optional[dict]:
+        """get_sync в потоке executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_sync, job_id)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = self._manager = self._jobs = None
+
+
+ingest_jobs = IngestJobs()
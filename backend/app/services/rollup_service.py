@@ -0,0 +1,128 @@
+from typing import Iterable, Optional, Tuple
+from datetime import date
+
+from sqlalchemy import Integer, SmallInteger, cast, delete, func, or_, and_, select, Select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.logging import logger
+from backend.app.models.flight import Flight
+from backend.app.models.flight_rollup import FlightRollup
+
+ROLLUP_KEY = ("region_id", "flight_date", "takeoff_hour", "drone_type")
+ROLLUP_VALUES = (
+    "flights_count",
+    "duration_count",
+    "duration_sum_seconds",
+    "duration_min_seconds",
+    "duration_max_seconds",
+    "missing_takeoff_coordinates",
+    "missing_landing_coordinates",
+)
+
+
+def aggregate_flights(*conditions, source=None) -> Select:
+    """
+    SELECT с агрегатами полетов в разрезе ключа сводной таблицы.
+    source - таблица или CTE с колонками flights, по умолчанию сама flights
+    """
+    columns = (source if source is not None else Flight.__table__).c
+    hour = cast(func.extract("hour", columns.takeoff_time), SmallInteger)
+    duration = cast(func.extract("epoch", columns.flight_duration), Integer)
+    return (
+        select(
+            columns.region_id,
+            columns.flight_date,
+            hour.label("takeoff_hour"),
+            columns.drone_type,
+            func.count().label("flights_count"),
+            func.count(columns.flight_duration).label("duration_count"),
+            func.coalesce(func.sum(duration), 0).label("duration_sum_seconds"),
+            func.min(duration).label("duration_min_seconds"),
+            func.max(duration).label("duration_max_seconds"),
+            func.count().filter(columns.takeoff_coordinates.is_(None)).label(
+                "missing_takeoff_coordinates"
+            ),
+            func.count().filter(columns.landing_coordinates.is_(None)).label(
+                "missing_landing_coordinates"
+            ),
+        )
+        .where(*conditions)
+        .group_by(columns.region_id, columns.flight_date, hour, columns.drone_type)
+    )
+
+
+def insert_aggregates(aggregates: Select, merge: bool):
+    """INSERT агрегатов в сводную таблицу, при merge - со сложением счетчиков"""
+    stmt = insert(FlightRollup).from_select(ROLLUP_KEY + ROLLUP_VALUES, aggregates)
+    if not merge:
+        return stmt
+    current, new = FlightRollup.__table__.c, stmt.excluded
+    return stmt.on_conflict_do_update(
+        constraint="uq_flight_rollups_key",
+        set_={
+            "flights_count": current.flights_count + new.flights_count,
+            "duration_count": current.duration_count + new.duration_count,
+            "duration_sum_seconds": current.duration_sum_seconds
+            + new.duration_sum_seconds,
+            # LEAST/GREATEST в PostgreSQL пропускают NULL
+            "duration_min_seconds": func.least(
+                current.duration_min_seconds, new.duration_min_seconds
+            ),
+            "duration_max_seconds": func.greatest(
+                current.duration_max_seconds, new.duration_max_seconds
+            ),
+            "missing_takeoff_coordinates": current.missing_takeoff_coordinates
+            + new.missing_takeoff_coordinates,
+            "missing_landing_coordinates": current.missing_landing_coordinates
+            + new.missing_landing_coordinates,
+        },
+    )
+
+
+async def refresh_rollup_days(
+    session: AsyncSession, days: Iterable[Tuple[int, Optional[date]]]
+) -> None:
+    """Пересчитывает агрегаты для пар (регион, дата), например после правки в админке"""
+    days = set(days)
+    if not days:
+        return
+    flight_filter = or_(
+        *(
+            and_(
+                Flight.region_id == region_id,
+                Flight.flight_date.is_not_distinct_from(flight_date),
+            )
+            for region_id, flight_date in days
+        )
+    )
+    rollup_filter = or_(
+        *(
+            and_(
+                FlightRollup.region_id == region_id,
+                FlightRollup.flight_date.is_not_distinct_from(flight_date),
+            )
+            for region_id, flight_date in days
+        )
+    )
+    await session.execute(delete(FlightRollup).where(rollup_filter))
+    await session.execute(insert_aggregates(aggregate_flights(flight_filter), merge=False))
+
+
+async def rebuild_rollup(session: AsyncSession) -> None:
+    """Полностью пересчитывает сводную таблицу по таблице полетов"""
+    logger.info("Пересчет сводной таблицы полетов")
+    await session.execute(delete(FlightRollup))
+    await session.execute(insert_aggregates(aggregate_flights(), merge=False))
+
+
+async def rebuild_rollup_if_empty(session: AsyncSession) -> bool:
+    """Заполняет сводную таблицу, если она пуста, а полеты уже есть"""
+    has_rollup = await session.scalar(select(FlightRollup.id).limit(1))
+    if has_rollup is not None:
+        return False
+    has_flights = await session.scalar(select(Flight.id).limit(1))
+    if has_flights is None:
+        return False
+    await rebuild_rollup(session)
+    return True
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Объединяет одинаковые конкурентные вычисления.
+
+    Пока вычисление по ключу выполняется, остальные запросы с тем же ключом
+    ждут его результат, а не запускают свое. Вычисление выполняется в
+    отдельной задаче и не отменяется, если первый запросивший клиент
+    отключился: его результат нужен остальным. Ошибку получают все ожидающие,
+    следующий запрос запустит вычисление заново.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Помечаем исключение как полученное, даже если ждущих не осталось
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
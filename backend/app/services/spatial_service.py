@@ -0,0 +1,79 @@
+import json
+from typing import Any, Dict
+
+from shapely.geometry import shape
+from sqlalchemy import ColumnElement, Float, bindparam, func, or_
+
+from backend.app.models.flight import Flight
+
+
+class SpatialService:
+    @staticmethod
+    def _columns(point: str) -> list:
+        """Колонки координат, по которым ищутся полеты: взлет, посадка или любая"""
+        if point == "takeoff":
+            return [Flight.takeoff_coordinates]
+        if point == "landing":
+            return [Flight.landing_coordinates]
+        return [Flight.takeoff_coordinates, Flight.landing_coordinates]
+
+    @staticmethod
+    def bbox_condition(
+        min_lon: float, min_lat: float, max_lon: float, max_lat: float, point: str
+    ) -> ColumnElement:
+        """Полеты, точка которых попадает в прямоугольник (ST_Intersects по GiST)"""
+        envelope = func.ST_MakeEnvelope(
+            bindparam("min_lon", min_lon, type_=Float),
+            bindparam("min_lat", min_lat, type_=Float),
+            bindparam("max_lon", max_lon, type_=Float),
+            bindparam("max_lat", max_lat, type_=Float),
+            4326,
+        )
+        return or_(
+            *(func.ST_Intersects(column, envelope) for column in SpatialService._columns(point))
+        )
+
+    @staticmethod
+    def polygon_condition(geojson: Dict[str, Any], point: str) -> ColumnElement:
+        """
+        Полеты, точка которых попадает в полигон GeoJSON (ST_Intersects по GiST).
+        Принимает геометрию Polygon/MultiPolygon или Feature с такой геометрией,
+        координаты в порядке lon, lat. При ошибке бросает ValueError.
+        """
+        geometry = geojson.get("geometry") if geojson.get("type") == "Feature" else geojson
+        try:
+            polygon = shape(geometry)
+        except Exception as e:
+            raise ValueError(f"Некорректный GeoJSON: {e}")
+        if polygon.geom_type not in ("Polygon", "MultiPolygon"):
+            raise ValueError(f"Ожидается Polygon или MultiPolygon, получен {polygon.geom_type}")
+        if not polygon.is_valid or polygon.is_empty:
+            raise ValueError("Полигон пустой или самопересекающийся")
+
+        area = func.ST_SetSRID(func.ST_GeomFromGeoJSON(json.dumps(geometry)), 4326)
+        return or_(
+            *(func.ST_Intersects(column, area) for column in SpatialService._columns(point))
+        )
+
+    @staticmethod
+    def radius_condition(lat: float, lon: float, radius_m: float, point: str) -> ColumnElement:
+        """
+        Полеты, точка которых не дальше radius_m метров от центра.
+        ST_DWithin по geography использует индексы idx_flights_*_geography
+        """
+        center = func.geography(
+            func.ST_SetSRID(
+                func.ST_MakePoint(
+                    bindparam("center_lon", lon, type_=Float),
+                    bindparam("center_lat", lat, type_=Float),
+                ),
+                4326,
+            )
+        )
+        radius = bindparam("radius_m", radius_m, type_=Float)
+        return or_(
+            *(
+                func.ST_DWithin(func.geography(column), center, radius)
+                for column in SpatialService._columns(point)
+            )
+        )
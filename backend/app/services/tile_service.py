@@ -0,0 +1,120 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Integer, Select, bindparam, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.constants import (
+    TILE_BUFFER,
+    TILE_CLUSTER_GRID,
+    TILE_CLUSTER_MAX_ZOOM,
+    TILE_EXTENT,
+)
+from backend.app.models.flight import Flight
+from backend.app.services.flight_service import FlightService
+
+# Ширина мира в проекции EPSG:3857, метры
+WEB_MERCATOR_WIDTH = 40075016.68557849
+
+
+class TileService:
+    @staticmethod
+    def _coordinates_column(layer: str):
+        if layer == "takeoff":
+            return Flight.takeoff_coordinates
+        return Flight.landing_coordinates
+
+    @staticmethod
+    def _tile_envelope(z: int, x: int, y: int):
+        return func.ST_TileEnvelope(
+            bindparam("tile_z", z, type_=Integer),
+            bindparam("tile_x", x, type_=Integer),
+            bindparam("tile_y", y, type_=Integer),
+        )
+
+    @staticmethod
+    def _mvt_geom(geometry, envelope):
+        return func.ST_AsMVTGeom(
+            geometry,
+            envelope,
+            literal_column(str(TILE_EXTENT)),
+            literal_column(str(TILE_BUFFER)),
+            literal_column("true"),
+        )
+
+    @staticmethod
+    def _points_layer(
+        layer: str,
+        z: int,
+        x: int,
+        y: int,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> Select:
+        """
+        Подзапрос с точками слоя в координатах тайла.
+
+        Отбор идет по && с конвертом тайла в EPSG:4326, поэтому работает
+        пространственный индекс по координатам. На мелких зумах точки
+        снапятся к сетке TILE_CLUSTER_GRID x TILE_CLUSTER_GRID ячеек
+        на тайл и отдаются с количеством полетов в ячейке.
+        """
+        column = TileService._coordinates_column(layer)
+        envelope = TileService._tile_envelope(z, x, y)
+        mercator = func.ST_Transform(column, 3857)
+        condition = column.op("&&")(func.ST_Transform(envelope, 4326))
+
+        if z > TILE_CLUSTER_MAX_ZOOM:
+            query = select(
+                TileService._mvt_geom(mercator, envelope).label("geom"),
+                Flight.id,
+                Flight.flight_id,
+                Flight.drone_type,
+                func.to_char(Flight.flight_date, "YYYY-MM-DD").label("flight_date"),
+                Flight.region_id,
+            ).where(condition)
+            return FlightService._filter_flights(query, region_id, from_date, to_date)
+
+        # Размер ячейки подставляется литералом: он зависит только от зума,
+        # а в GROUP BY должно повторяться то же выражение
+        cell_size = WEB_MERCATOR_WIDTH / (2 ** z) / TILE_CLUSTER_GRID
+        cells = select(
+            func.ST_SnapToGrid(mercator, literal_column(repr(cell_size))).label("cell")
+        ).where(condition)
+        cells = FlightService._filter_flights(
+            cells, region_id, from_date, to_date
+        ).subquery("cells")
+        return select(
+            TileService._mvt_geom(cells.c.cell, envelope).label("geom"),
+            func.count().label("flights_count"),
+        ).group_by(cells.c.cell)
+
+    @staticmethod
+    async def get_tile(
+        db: AsyncSession,
+        z: int,
+        x: int,
+        y: int,
+        layers: tuple,
+        region_id: Optional[int] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> bytes:
+        """Векторный тайл MVT: по слою на каждый вид точек (взлет, посадка)"""
+        tile = b""
+        for layer in layers:
+            points = TileService._points_layer(
+                layer, z, x, y, region_id, from_date, to_date
+            ).subquery("layer")
+            query = select(
+                func.ST_AsMVT(
+                    literal_column("layer"),
+                    literal_column(f"'{layer}'"),
+                    literal_column(str(TILE_EXTENT)),
+                    literal_column("'geom'"),
+                )
+            ).select_from(points)
+            # Слои MVT можно склеивать конкатенацией
+            tile += await db.scalar(query) or b""
+        return tile
@@ -0,0 +1,242 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import struct
+from typing import Optional
+import zlib
+
+from backend.app.config import (
+    EXPORT_BROTLI_LEVEL,
+    EXPORT_COMPRESSION_THREADS,
+    EXPORT_DEFAULT_CODEC,
+    EXPORT_GZIP_LEVEL,
+    EXPORT_NEGOTIATED_CODECS,
+    EXPORT_PARALLEL_BLOCK_SIZE,
+    EXPORT_PARALLEL_THRESHOLD,
+    EXPORT_ZSTD_LEVEL,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - зависит от окружения
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+# Размер окна deflate: последние 32 КБ предыдущего блока
+# используются как словарь для следующего (как в pigz)
+DEFLATE_WINDOW_SIZE = 32 * 1024
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+
+class Codec(ABC):
+    """Базовый класс кодека сжатия выгрузок"""
+
+    name: str = ""
+    media_type: str = ""
+    extension: str = ""
+    min_level: int = 0
+    max_level: int = 0
+    default_level: int = 0
+
+    def validate_level(self, level: Optional[int]) -> int:
+        """Возвращает уровень сжатия или уровень по умолчанию"""
+        if level is None:
+            return self.default_level
+        if not self.min_level <= level <= self.max_level:
+            raise ValueError(
+                f"Уровень сжатия {self.name} должен быть "
+                f"от {self.min_level} до {self.max_level}"
+            )
+        return level
+
+    @abstractmethod
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        """Сжимает data целиком"""
+
+    @abstractmethod
+    def compressobj(self, level: Optional[int] = None):
+        """Потоковый компрессор с методами compress(data) и flush()"""
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+    media_type = "application/gzip"
+    extension = ".gz"
+    min_level = 1
+    max_level = 9
+    default_level = EXPORT_GZIP_LEVEL
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        level = self.validate_level(level)
+        if len(data) >= EXPORT_PARALLEL_THRESHOLD and EXPORT_COMPRESSION_THREADS > 1:
+            return gzip_parallel(data, level)
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+    def compressobj(self, level: Optional[int] = None):
+        return zlib.compressobj(
+            self.validate_level(level), zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+
+class _ZstdStreamCompressor:
+    def __init__(self, compressor):
+        self._compressor = compressor.compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+    media_type = "application/zstd"
+    extension = ".zst"
+    min_level = 1
+    max_level = 22
+    default_level = EXPORT_ZSTD_LEVEL
+
+    def _compressor(self, level: int, size: int):
+        threads = EXPORT_COMPRESSION_THREADS if size >= EXPORT_PARALLEL_THRESHOLD else 0
+        return zstandard.ZstdCompressor(level=level, threads=threads)
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        level = self.validate_level(level)
+        return self._compressor(level, len(data)).compress(data)
+
+    def compressobj(self, level: Optional[int] = None):
+        # Размер потока заранее неизвестен, поэтому сразу включаем воркеры
+        compressor = self._compressor(
+            self.validate_level(level), EXPORT_PARALLEL_THRESHOLD
+        )
+        return _ZstdStreamCompressor(compressor)
+
+
+class _BrotliStreamCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class BrotliCodec(Codec):
+    name = "br"
+    media_type = "application/x-brotli"
+    extension = ".br"
+    min_level = 0
+    max_level = 11
+    default_level = EXPORT_BROTLI_LEVEL
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        return brotli.compress(data, quality=self.validate_level(level))
+
+    def compressobj(self, level: Optional[int] = None):
+        return _BrotliStreamCompressor(self.validate_level(level))
+
+
+CODECS = {GzipCodec.name: GzipCodec()}
+if zstandard is not None:
+    CODECS[ZstdCodec.name] = ZstdCodec()
+if brotli is not None:
+    CODECS[BrotliCodec.name] = BrotliCodec()
+
+
+def gzip_parallel(
+    data: bytes,
+    level: int = EXPORT_GZIP_LEVEL,
+    block_size: int = EXPORT_PARALLEL_BLOCK_SIZE,
+    threads: int = EXPORT_COMPRESSION_THREADS,
+) -> bytes:
+    """
+    Многопоточное сжатие в один gzip-поток по схеме pigz.
+
+    Данные режутся на блоки, каждый блок сжимается raw deflate в отдельном
+    потоке (zlib отпускает GIL) со словарем из хвоста предыдущего блока.
+    Промежуточные блоки завершаются Z_SYNC_FLUSH, поэтому их конкатенация
+    остается корректным deflate-потоком, который читает любой gzip-клиент.
+    """
+    view = memoryview(data)
+    offsets = list(range(0, len(data), block_size)) or [0]
+
+    def deflate_block(index: int) -> bytes:
+        start = offsets[index]
+        options = {}
+        if start:
+            options["zdict"] = bytes(view[max(0, start - DEFLATE_WINDOW_SIZE):start])
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, **options)
+        block = compressor.compress(view[start:start + block_size])
+        is_last = index == len(offsets) - 1
+        return block + compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        blocks = list(executor.map(deflate_block, range(len(offsets))))
+
+    trailer = struct.pack("<II", zlib.crc32(data), len(data) & 0xFFFFFFFF)
+    return b"".join([GZIP_HEADER, *blocks, trailer])
+
+
+def get_codec(name: str) -> Codec:
+    """Возвращает кодек по имени или бросает ValueError"""
+    codec = CODECS.get(name.lower())
+    if codec is None:
+        raise ValueError(
+            f"Кодек '{name}' не поддерживается. Доступные: {', '.join(CODECS)}"
+        )
+    return codec
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict:
+    """Разбирает Accept-Encoding в словарь {кодек: q}"""
+    weights = {}
+    if not header:
+        return weights
+    for item in header.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    return weights
+
+
+def negotiate_codec(
+    requested: Optional[str] = None, accept_encoding: Optional[str] = None
+) -> Codec:
+    """
+    Выбирает кодек выгрузки.
+
+    Явный параметр запроса важнее заголовка. По Accept-Encoding выбираются
+    только кодеки из EXPORT_NEGOTIATED_CODECS: браузер сам объявляет br и zstd,
+    а фронтенд умеет распаковывать только gzip. При равных q побеждает
+    порядок кодеков в настройке сервера.
+    """
+    if requested:
+        return get_codec(requested)
+
+    weights = parse_accept_encoding(accept_encoding)
+    best_codec, best_q = None, 0.0
+    for name in EXPORT_NEGOTIATED_CODECS:
+        codec = CODECS.get(name)
+        if codec is None:
+            continue
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best_codec, best_q = codec, q
+
+    return best_codec or get_codec(EXPORT_DEFAULT_CODEC)
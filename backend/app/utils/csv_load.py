@@ -1,43 +1,75 @@
 import csv
 from datetime import datetime, timedelta
+import hashlib
+from itertools import islice
+import os
 from os import getenv
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 
 from dotenv import load_dotenv
-from geoalchemy2 import WKTElement
+from sqlalchemy import (
+    Column,
+    Date,
+    Float,
+    Integer,
+    Interval,
+    MetaData,
+    String,
+    Table,
+    Time,
+    case,
+    exists,
+    func,
+    null,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy import text, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
+from backend.app.config import INGEST_BATCH_SIZE, INGEST_CLAIM_TIMEOUT
 from backend.app.models.flight import Flight
+from backend.app.models.ingest_run import IngestRun
 from backend.app.models.region import Region
-from backend.app.logging import log_function, logger
+from backend.app.logging import count_calls, log_call_stats, log_function, logger
+from backend.app.services.export_cache import bump_dataset_version
+from backend.app.services.rollup_service import aggregate_flights, insert_aggregates
 
 
 
-@log_function(logger)
-def parse_coordinates(coord_str):
-    """Парсит строку координат вида 'lat lon' и возвращает WKT POINT. Возвращает None для 'Нет данных'."""
+@count_calls
+def parse_point(coord_str):
+    """Парсит строку координат вида 'lat lon' и возвращает (lon, lat). Возвращает None для 'Нет данных'."""
     coord_str = coord_str.strip()
     if coord_str.lower() in ["нет данных", "нет_данных", "", "null"]:
-        logger.info(f"Получено пустое значение координат: '{coord_str}'")
+        logger.debug("Получено пустое значение координат: '%s'", coord_str)
         return None
     try:
         lat_str, lon_str = coord_str.split()
-        lat = float(lat_str)
-        lon = float(lon_str)
-        logger.debug(f"Успешно распарсены координаты: lat={lat}, lon={lon}")
-        return f"POINT({lon} {lat})"
+        return float(lon_str), float(lat_str)
     except (ValueError, IndexError) as e:
-        logger.error(f"Ошибка парсинга координат '{coord_str}': {e}")
+        logger.error("Ошибка парсинга координат '%s': %s", coord_str, e)
         return None
 
 
-@log_function(logger)
+@count_calls
+def parse_coordinates(coord_str):
+    """Парсит строку координат вида 'lat lon' и возвращает WKT POINT. Возвращает None для 'Нет данных'."""
+    point = parse_point(coord_str)
+    if point is None:
+        return None
+    lon, lat = point
+    return f"POINT({lon} {lat})"
+
+
+@count_calls
 def parse_duration(duration_str):
     """Парсит строку длительности вида 'HH:MM' в объект timedelta. Возвращает None для 'Нет данных'."""
     duration_str = duration_str.strip()
     if duration_str.lower() in ["нет данных", "нет_данных", "", "null"]:
-        logger.info(f"Получено пустое значение длительности: '{duration_str}'")
+        logger.debug("Получено пустое значение длительности: '%s'", duration_str)
         return None
     try:
         parts = duration_str.split(":")
@@ -46,19 +78,19 @@ def parse_duration(duration_str):
         hours = int(parts[0])
         minutes = int(parts[1])
         result = timedelta(hours=hours, minutes=minutes)
-        logger.debug(f"Успешно распарсена длительность: {result}")
+        logger.debug("Успешно распарсена длительность: %s", result)
         return result
     except (ValueError, IndexError) as e:
-        logger.error(f"Ошибка парсинга длительности '{duration_str}': {e}")
+        logger.error("Ошибка парсинга длительности '%s': %s", duration_str, e)
         return None
 
 
-@log_function(logger)
+@count_calls
 def parse_time(time_str):
     """Парсит строку времени вида 'HH:MM' в объект time. Возвращает None для 'Нет данных'."""
     time_str = time_str.strip()
     if time_str.lower() in ["нет данных", "нет_данных", "", "null"]:
-        logger.info(f"Получено пустое значение времени: '{time_str}'")
+        logger.debug("Получено пустое значение времени: '%s'", time_str)
         return None
 
     try:
@@ -67,160 +99,469 @@ def parse_time(time_str):
 
         return datetime.strptime(time_str, "%H:%M").time()
     except ValueError as e:
-        logger.error(f"Ошибка парсинга времени '{time_str}': {e}")
+        logger.error("Ошибка парсинга времени '%s': %s", time_str, e)
         return None
 
 
-@log_function(logger)
+@count_calls
 def parse_date(date_str):
     """Парсит строку даты вида 'DD.MM.YY' в объект date. Возвращает None для 'Нет данных'."""
     date_str = date_str.strip()
     if date_str.lower() in ["нет данных", "нет_данных", "", "null"]:
-        logger.info(f"Получено пустое значение даты: '{date_str}'")
+        logger.debug("Получено пустое значение даты: '%s'", date_str)
         return None
     try:
         result = datetime.strptime(date_str, "%d.%m.%y").date()
-        logger.debug(f"Успешно распарсена дата: {result}")
+        logger.debug("Успешно распарсена дата: %s", result)
         return result
     except ValueError as e:
-        logger.error(f"Ошибка парсинга даты '{date_str}': {e}")
+        logger.error("Ошибка парсинга даты '%s': %s", date_str, e)
         return None
 
 
-@log_function(logger)
+@count_calls
 def parse_drone_type(drone_type_str):
     """Парсит тип дрона, обрабатывает 'Нет данных'."""
     drone_type_str = drone_type_str.strip()
     if drone_type_str.lower() in ["нет данных", "нет_данных", "", "null"]:
-        logger.info(f"Получен пустой тип дрона: '{drone_type_str}'")
+        logger.debug("Получен пустой тип дрона: '%s'", drone_type_str)
         return "Неизвестный"
-    logger.debug(f"Успешно определен тип дрона: {drone_type_str}")
+    logger.debug("Успешно определен тип дрона: %s", drone_type_str)
     return drone_type_str
 
 
-@log_function(logger)
-async def load_csv_to_db(csv_file_path, db_engine):
-    """Асинхронно загружает данные из CSV в базу данных."""
-    logger.info(f"Начало загрузки данных из файла: {csv_file_path}")
+STAGING_TABLE = Table(
+    "flights_staging",
+    MetaData(),
+    Column("row_num", Integer),
+    Column("flight_id", String),
+    Column("drone_type", String),
+    Column("takeoff_lon", Float),
+    Column("takeoff_lat", Float),
+    Column("landing_lon", Float),
+    Column("landing_lat", Float),
+    Column("flight_date", Date),
+    Column("takeoff_time", Time),
+    Column("landing_time", Time),
+    Column("flight_duration", Interval),
+    Column("region_name", String),
+    Column("region_id", Integer),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+STAGING_COLUMNS = [column.name for column in STAGING_TABLE.columns]
+
+
+def parse_record(row_num: int, row: list) -> Optional[tuple]:
+    """Строка CSV -> запись для staging-таблицы. None, если строку нельзя загрузить"""
+    if len(row) < 10:
+        logger.warning("Строка %d пропущена: недостаточно полей (%d)", row_num + 1, len(row))
+        return None
+
+    (
+        flight_id,
+        drone_type_str,
+        takeoff_coords_str,
+        landing_coords_str,
+        flight_date_str,
+        takeoff_time_str,
+        landing_time_str,
+        flight_duration_str,
+        region_name,
+        region_id,
+    ) = row[:10]
+
+    takeoff_lon, takeoff_lat = parse_point(takeoff_coords_str) or (None, None)
+    landing_lon, landing_lat = parse_point(landing_coords_str) or (None, None)
+    try:
+        region_id = int(region_id)
+    except ValueError:
+        region_id = None
+
+    return (
+        row_num,
+        flight_id.strip(),
+        parse_drone_type(drone_type_str),
+        takeoff_lon,
+        takeoff_lat,
+        landing_lon,
+        landing_lat,
+        parse_date(flight_date_str),
+        parse_time(takeoff_time_str),
+        parse_time(landing_time_str),
+        parse_duration(flight_duration_str),
+        region_name.strip(),
+        region_id,
+    )
+
+
+def iter_row_batches(
+    rows: Iterable[list], batch_size: int, start_row: int = 0
+) -> Iterator[Tuple[list, int, int]]:
+    """
+    Разбирает строки и отдает пачки (записи, отброшено строк, следующая строка).
+    rows - строки файла начиная со строки start_row: уже загруженные строки
+    пропускает источник, до разбора и поиска регионов.
+    """
+    batch, invalid, row_num = [], 0, start_row - 1
+    for row_num, row in enumerate(rows, start_row):
+        if row_num == 0 and row and row[0].lower() == "flight_id":
+            logger.info("Пропущена строка заголовка")
+            continue
+        record = parse_record(row_num, row)
+        if record is None:
+            invalid += 1
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch, invalid, row_num + 1
+            batch, invalid = [], 0
+    if batch or invalid:
+        yield batch, invalid, row_num + 1
+
+
+def count_lines(path: str) -> int:
+    """Число строк файла, оценка объема для прогресса загрузки"""
+    with open(path, "rb") as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(1024 * 1024), b""))
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _point(lon_column, lat_column):
+    return case(
+        (
+            lon_column.is_not(None),
+            func.ST_SetSRID(func.ST_MakePoint(lon_column, lat_column), 4326),
+        ),
+        else_=null(),
+    )
+
+
+def _merge_regions_statement():
+    """Новые регионы из staging: id берется из первой строки с таким названием"""
+    staging = STAGING_TABLE.c
+    new_regions = (
+        select(staging.region_id, staging.region_name)
+        .distinct(staging.region_name)
+        .where(
+            staging.region_id.is_not(None),
+            staging.region_name.not_in(select(Region.name).where(Region.name.is_not(None))),
+        )
+        .order_by(staging.region_name, staging.row_num)
+    )
+    return (
+        insert(Region)
+        .from_select(["region_id", "name"], new_regions)
+        .on_conflict_do_nothing()
+    )
+
+
+def _merge_flights_statement():
+    """
+    Переносит полеты из staging в flights одним INSERT ... SELECT.
+
+    Повтор flight_id внутри файла отсекает DISTINCT ON (остается первая
+    строка), уже загруженные полеты - ON CONFLICT DO NOTHING. Вставленные
+    строки через RETURNING сразу агрегируются в сводную таблицу в том же
+    запросе. Строки, для названия региона которых нет записи в regions
+    (регион без region_id или id занят регионом с другим названием),
+    не загружаются. Результат - (вставлено полетов, строк без региона).
+    """
+    staging = STAGING_TABLE.c
+    rows = (
+        select(
+            staging.flight_id,
+            staging.drone_type,
+            _point(staging.takeoff_lon, staging.takeoff_lat),
+            _point(staging.landing_lon, staging.landing_lat),
+            staging.flight_date,
+            staging.takeoff_time,
+            staging.landing_time,
+            staging.flight_duration,
+            Region.region_id,
+        )
+        .select_from(STAGING_TABLE.join(Region, Region.name == staging.region_name))
+        .distinct(staging.flight_id)
+        .order_by(staging.flight_id, staging.row_num)
+    )
+    inserted = (
+        insert(Flight)
+        .from_select(
+            [
+                "flight_id",
+                "drone_type",
+                "takeoff_coordinates",
+                "landing_coordinates",
+                "flight_date",
+                "takeoff_time",
+                "landing_time",
+                "flight_duration",
+                "region_id",
+            ],
+            rows,
+        )
+        .on_conflict_do_nothing(index_elements=["flight_id"])
+        .returning(
+            Flight.region_id,
+            Flight.flight_date,
+            Flight.takeoff_time,
+            Flight.drone_type,
+            Flight.flight_duration,
+            Flight.takeoff_coordinates,
+            Flight.landing_coordinates,
+        )
+        .cte("inserted")
+    )
+    rollup = insert_aggregates(aggregate_flights(source=inserted), merge=True).cte(
+        "rollup"
+    )
+    unmatched = (
+        select(func.count())
+        .select_from(STAGING_TABLE)
+        .where(~exists().where(Region.name == staging.region_name))
+        .scalar_subquery()
+    )
+    return select(func.count(), unmatched).select_from(inserted).add_cte(rollup)
+
+
+async def copy_records(session: AsyncSession, records: list) -> None:
+    """Передает пачку записей в staging-таблицу через COPY"""
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE.name, records=records, columns=STAGING_COLUMNS
+    )
+
+
+async def claim_ingest_run(
+    session: AsyncSession, file_hash: str, file_name: str
+) -> Tuple[IngestRun, bool]:
+    """
+    Находит запись о загрузке файла по хешу содержимого или создает новую
+    и атомарно помечает ее выполняемой. Возвращает (запись, захвачена ли).
+
+    Не захватывается завершенная загрузка и загрузка, которую сейчас ведет
+    другой процесс или воркер приложения: status running и запись
+    обновлялась не раньше INGEST_CLAIM_TIMEOUT секунд назад. Более старая
+    running-запись считается оставшейся от упавшего процесса.
+    """
+    run_id = await session.scalar(
+        insert(IngestRun)
+        .values(file_hash=file_hash, file_name=file_name, status=IngestRun.STATUS_RUNNING)
+        .on_conflict_do_nothing(index_elements=["file_hash"])
+        .returning(IngestRun.id)
+    )
+    if run_id is None:
+        last_update = func.coalesce(IngestRun.updated_at, IngestRun.started_at)
+        run_id = await session.scalar(
+            update(IngestRun)
+            .where(
+                IngestRun.file_hash == file_hash,
+                IngestRun.status != IngestRun.STATUS_COMPLETED,
+                or_(
+                    IngestRun.status != IngestRun.STATUS_RUNNING,
+                    last_update < func.now() - timedelta(seconds=INGEST_CLAIM_TIMEOUT),
+                ),
+            )
+            .values(status=IngestRun.STATUS_RUNNING, error=None)
+            .returning(IngestRun.id)
+        )
+    await session.commit()
+
+    run = await session.scalar(select(IngestRun).where(IngestRun.file_hash == file_hash))
+    return run, run_id is not None
+
+
+async def load_batch(session: AsyncSession, records: list) -> Tuple[int, int]:
+    """
+    Загружает пачку через staging-таблицу.
+    Возвращает (новых полетов, строк без региона в regions).
+    """
+    connection = await session.connection()
+    await connection.run_sync(STAGING_TABLE.create)
+    if records:
+        await copy_records(session, records)
+        await session.execute(_merge_regions_statement())
+        inserted, unmatched = (await session.execute(_merge_flights_statement())).one()
+        return inserted, unmatched
+    return 0, 0
+
+
+async def load_rows_to_db(
+    rows_from: Callable[[int], Tuple[int, Iterable[list]]],
+    db_engine,
+    file_hash: str,
+    file_name: str,
+    batch_size: int = INGEST_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Optional[dict]:
+    """
+    Загружает полеты из потока строк в формате CSV в базу через COPY.
+
+    Строки разбираются пачками по batch_size и копируются во временную
+    staging-таблицу, затем регионы и полеты переносятся set-based запросами.
+    Каждая пачка вместе со сводной таблицей и чекпоинтом в ingest_runs
+    фиксируется своей транзакцией, поэтому ошибка откатывает только текущую
+    пачку, а повторная загрузка того же файла (file_hash) продолжается
+    с чекпоинта.
+
+    Запись о загрузке захватывается в базе (claim_ingest_run), поэтому
+    один файл не загружается одновременно несколькими воркерами: если его
+    уже загружает другой процесс, возвращается отчет со status running.
+
+    Возвращает отчет: total - корректных строк, inserted - новых полетов,
+    skipped - уже загруженных и повторов, invalid - отброшенных строк,
+    в том числе с регионом, которого нет в regions.
+    None, если загрузка не удалась. progress(строк обработано, всего)
+    вызывается после каждой пачки.
+
+    rows_from(start_row) возвращает (оценка числа строк, строки начиная
+    с start_row). Вызывается только если файл еще не загружен, start_row -
+    чекпоинт, поэтому при продолжении загрузки уже загруженные строки
+    не разбираются заново. Итератор строк закрывается по окончании загрузки.
+    """
     AsyncSessionLocal = async_sessionmaker(bind=db_engine, expire_on_commit=False)
 
     async with AsyncSessionLocal() as session:
+        run, changed, rows = None, False, None
         try:
-            with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-                reader = csv.reader(csvfile)
-                logger.info("Файл CSV успешно открыт")
-
-                first_row = next(reader, None)
-                if first_row and first_row[0].lower() == "flight_id":
-                    logger.info("Пропущена строка заголовка")
-                elif first_row:
-                    rows_to_process = [first_row]
-                    rows_to_process.extend(list(reader))
-                    reader = iter(rows_to_process)
-
-                for row_num, row in enumerate(reader):
-                    if len(row) < 9:
-                        logger.warning(
-                            f"Строка {row_num + 1} пропущена: недостаточно полей ({len(row)})"
-                        )
-                        continue
-
-                    flight_id = row[0].strip()
-                    logger.info(f"Обработка полета ID: {flight_id}")
-
-                    (
-                        flight_id,
-                        drone_type_str,
-                        takeoff_coords_str,
-                        landing_coords_str,
-                        flight_date_str,
-                        takeoff_time_str,
-                        landing_time_str,
-                        flight_duration_str,
-                        region_name,
-                        region_id,
-                    ) = row[:10]
-
-                    takeoff_wkt = parse_coordinates(takeoff_coords_str)
-                    landing_wkt = parse_coordinates(landing_coords_str)
-                    flight_date = parse_date(flight_date_str)
-                    takeoff_time_obj = parse_time(takeoff_time_str)
-                    landing_time_obj = parse_time(landing_time_str)
-                    flight_duration = parse_duration(flight_duration_str)
-                    drone_type = parse_drone_type(drone_type_str)
-
-                    region_name = region_name.strip()
-
-                    result = await session.execute(
-                        select(Region).filter(Region.name == region_name)
-                    )
-                    region = result.scalars().first()
-
-                    if not region:
-                        logger.info(f"Создан новый регион: {region_name}")
-                        region = Region(name=region_name, region_id=int(region_id))
-                        session.add(region)
-                        await session.flush()
-
-                    result = await session.execute(
-                        select(Flight).filter(Flight.flight_id == flight_id)
+            run, claimed = await claim_ingest_run(session, file_hash, file_name)
+            if not claimed:
+                if run.status == IngestRun.STATUS_COMPLETED:
+                    logger.info(f"Файл уже загружен ранее (ingest run {run.id}), пропущен")
+                else:
+                    logger.info(f"Файл уже загружается другим процессом (ingest run {run.id})")
+                # Чужую запись нельзя помечать ошибкой при сбое ниже
+                report, run = run.report(), None
+                return report
+            if run.rows_committed:
+                logger.info(f"Продолжение загрузки со строки {run.rows_committed}")
+
+            rows_total, rows = rows_from(run.rows_committed)
+            batches = iter_row_batches(rows, batch_size, run.rows_committed)
+            for records, invalid, next_row in batches:
+                inserted, unmatched = await load_batch(session, records)
+                if unmatched:
+                    logger.warning(
+                        "Строк без региона в справочнике regions: %d, не загружены",
+                        unmatched,
                     )
-                    existing_flight = result.scalars().first()
-
-                    if existing_flight:
-                        logger.info(f"Полет с ID {flight_id} уже существует. Пропущен.")
-                        continue
-
-                    flight_params = {
-                        "flight_id": flight_id.strip(),
-                        "drone_type": drone_type,
-                        "takeoff_coordinates": text(
-                            f"ST_GeomFromText('{takeoff_wkt}', 4326)"
-                        ),
-                        "flight_date": flight_date,
-                        "takeoff_time": takeoff_time_obj,
-                        "region_id": region.region_id,
-                    }
-
-                    if takeoff_wkt:
-                        flight_params["takeoff_coordinates"] = WKTElement(
-                            takeoff_wkt, srid=4326
-                        )
-                    else:
-                        flight_params["takeoff_coordinates"] = None
-
-                    if landing_wkt:
-                        flight_params["landing_coordinates"] = WKTElement(
-                            landing_wkt, srid=4326
-                        )
-                    else:
-                        flight_params["landing_coordinates"] = None
-
-                    if landing_time_obj:
-                        flight_params["landing_time"] = landing_time_obj
-                    if flight_duration:
-                        flight_params["flight_duration"] = flight_duration
-
-                    new_flight = Flight(**flight_params)
-                    session.add(new_flight)
-                    logger.info(f"Добавлен новый полет: {flight_id}")
-
+                run.rows_committed = next_row
+                run.total += len(records) - unmatched
+                run.inserted += inserted
+                run.skipped += len(records) - unmatched - inserted
+                run.invalid += invalid + unmatched
                 await session.commit()
-                logger.info("Загрузка данных завершена успешно")
+                changed = changed or inserted > 0
+                if progress:
+                    progress(run.rows_committed, max(rows_total, run.rows_committed))
+                logger.info(
+                    f"Пачка зафиксирована: строк файла {run.rows_committed}, "
+                    f"вставлено всего {run.inserted}"
+                )
+
+            run.status = IngestRun.STATUS_COMPLETED
+            run.finished_at = func.now()
+            await session.commit()
+
+            logger.info(
+                f"Загрузка данных завершена успешно: вставлено {run.inserted}, "
+                f"пропущено {run.skipped} (уже загружены или повторы), "
+                f"некорректных строк {run.invalid}"
+            )
+            await session.refresh(run)
+            return run.report()
 
-        except FileNotFoundError:
-            logger.error(f"Ошибка: Файл {csv_file_path} не найден")
-            await session.rollback()
         except SQLAlchemyError as e:
             logger.error(f"Ошибка базы данных при загрузке: {str(e)}")
-            await session.rollback()
+            await mark_run_failed(session, run, e)
         except Exception as e:
             logger.error(f"Произошла неожиданная ошибка при загрузке: {str(e)}")
-            await session.rollback()
+            await mark_run_failed(session, run, e)
+        finally:
+            # Генератор строк сохраняет свое состояние (например, кеш регионов)
+            # при закрытии, в том числе если загрузка остановилась раньше конца
+            if hasattr(rows, "close"):
+                rows.close()
+            log_call_stats(logger)
+            # Уже зафиксированные пачки меняют данные даже при ошибке
+            if changed:
+                bump_dataset_version()
+        return None
+
+
+@log_function(logger)
+async def load_csv_to_db(
+    csv_file_path,
+    db_engine,
+    batch_size: int = INGEST_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+    file_hash: Optional[str] = None,
+) -> Optional[dict]:
+    """
+    Загружает полеты из CSV в базу, см. load_rows_to_db.
+    file_hash - уже посчитанный SHA-256 файла.
+    """
+    logger.info(f"Начало загрузки данных из файла: {csv_file_path}")
+    try:
+        file_hash = file_hash or file_sha256(csv_file_path)
+        with open(csv_file_path, "r", encoding="utf-8-sig", newline="") as csvfile:
+            logger.info("Файл CSV успешно открыт")
+
+            def rows_from(start_row: int) -> Tuple[int, Iterable[list]]:
+                rows_total = count_lines(csv_file_path) if progress else 0
+                return rows_total, islice(csv.reader(csvfile), start_row, None)
+
+            return await load_rows_to_db(
+                rows_from,
+                db_engine,
+                file_hash,
+                os.path.basename(csv_file_path),
+                batch_size,
+                progress=progress,
+            )
+    except FileNotFoundError:
+        logger.error(f"Ошибка: Файл {csv_file_path} не найден")
+        return None
+
+
+async def mark_run_failed(session: AsyncSession, run: Optional[IngestRun], error: Exception):
+    """Откатывает текущую пачку и сохраняет ошибку в записи о загрузке"""
+    await session.rollback()
+    if run is None:
+        return
+    try:
+        await session.refresh(run)
+        run.status = IngestRun.STATUS_FAILED
+        run.error = str(error)
+        await session.commit()
+        logger.info(f"Загрузку можно продолжить со строки {run.rows_committed}")
+    except SQLAlchemyError as e:
+        logger.error(f"Не удалось сохранить статус загрузки: {str(e)}")
+        await session.rollback()
 
 
 @log_function(logger)
-async def main(csv_path):
+async def main(
+    csv_path,
+    batch_size: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    file_hash: Optional[str] = None,
+    rows_from: Optional[Callable[[int], Tuple[int, Iterable[list]]]] = None,
+):
+    """
+    Загрузка CSV файла csv_path в базу. Если передан источник строк
+    rows_from (см. load_rows_to_db), загружаются его строки, а csv_path -
+    исходный файл, по которому определяется запись о загрузке.
+    """
     logger.info("Запуск процесса загрузки CSV")
     load_dotenv()
 
@@ -235,6 +576,23 @@ async def main(csv_path):
 
     engine = create_async_engine(DATABASE_URL, echo=False)
 
-    await load_csv_to_db(csv_path, engine)
+    if rows_from is None:
+        report = await load_csv_to_db(
+            csv_path,
+            engine,
+            batch_size or INGEST_BATCH_SIZE,
+            progress=progress,
+            file_hash=file_hash,
+        )
+    else:
+        report = await load_rows_to_db(
+            rows_from,
+            engine,
+            file_hash or file_sha256(csv_path),
+            os.path.basename(csv_path),
+            batch_size or INGEST_BATCH_SIZE,
+            progress=progress,
+        )
     await engine.dispose()
     logger.info("Процесс загрузки CSV завершен")
+    return report
@@ -0,0 +1,23 @@
+import base64
+from datetime import date
+import json
+from typing import Optional, Tuple
+
+
+def encode_cursor(flight_date: Optional[date], flight_pk: int) -> str:
+    """Непрозрачный курсор страницы: позиция (flight_date, id) последнего полета"""
+    payload = {"d": flight_date.isoformat() if flight_date else None, "id": flight_pk}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[date], int]:
+    """Разбирает курсор, при любой ошибке бросает ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        flight_date = date.fromisoformat(payload["d"]) if payload["d"] else None
+        flight_pk = int(payload["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
+    return flight_date, flight_pk
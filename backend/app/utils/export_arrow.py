@@ -0,0 +1,77 @@
+from typing import Iterable
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - зависит от окружения
+    pa = None
+    pq = None
+
+# Формат -> (media type, расширение файла)
+BINARY_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrow"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+DICTIONARY_COLUMNS = {"drone_type", "region_name"}
+
+
+def _flights_schema() -> "pa.Schema":
+    """Типизированная схема выгрузки, порядок колонок как в FlightService.get_data"""
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            pa.field("flight_id", pa.string()),
+            pa.field("drone_type", dictionary),
+            pa.field("takeoff_lat", pa.float64()),
+            pa.field("takeoff_lon", pa.float64()),
+            pa.field("landing_lat", pa.float64()),
+            pa.field("landing_lon", pa.float64()),
+            pa.field("flight_date", pa.date32()),
+            pa.field("takeoff_time", pa.time32("s")),
+            pa.field("landing_time", pa.time32("s")),
+            pa.field("flight_duration", pa.duration("s")),
+            pa.field("region_name", dictionary),
+        ]
+    )
+
+
+def flights_to_table(flights_data: Iterable) -> "pa.Table":
+    """
+    Собирает Arrow-таблицу из строк запроса FlightService.get_data.
+    Пустые значения остаются null, а не 'Нет данных'.
+    """
+    schema = _flights_schema()
+    rows = list(flights_data)
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name in DICTIONARY_COLUMNS:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def create_arrow_ipc_sync(flights_data: Iterable) -> bytes:
+    """Выгрузка в формате Arrow IPC stream"""
+    table = flights_to_table(flights_data)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def create_parquet_sync(flights_data: Iterable) -> bytes:
+    """Выгрузка в формате Parquet со сжатием zstd"""
+    table = flights_to_table(flights_data)
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+
+BINARY_BUILDERS = {
+    "arrow": create_arrow_ipc_sync,
+    "parquet": create_parquet_sync,
+}
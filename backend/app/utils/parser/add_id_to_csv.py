@@ -2,13 +2,26 @@ import csv
 import json
 import os
 import tempfile
+from typing import Dict, Iterable, Iterator
 
 from backend.app.config import STATIC_DIR
+from backend.app.utils.parser.region_cache import cached_region_ids
 
+# TODO: Fix hardcoded region_id for unknown regions
+UNKNOWN_REGION_ID = "91"
 
-def add_id_to_csv(input_file: str) -> str:
-    """Добавляет столбец с region_id в csv файл."""
+
+def load_region_ids() -> Dict[str, object]:
+    """
+    Название региона -> region_id из статического GeoJSON. Разобранный файл
+    кешируется на диске и в памяти процесса до изменения файла.
+    """
     polygon_path = os.path.join(STATIC_DIR, "russia_regions_id.geo.json")
+    return cached_region_ids(polygon_path, read_region_ids)
+
+
+def read_region_ids(polygon_path: str) -> Dict[str, object]:
+    """Название региона -> region_id напрямую из GeoJSON"""
     with open(polygon_path, "r", encoding="utf-8-sig") as f:
         data = json.load(f)
 
@@ -18,6 +31,21 @@ def add_id_to_csv(input_file: str) -> str:
             region_with_id[feature["properties"]["region"]] = feature["properties"][
                 "region_id"
             ]
+    return region_with_id
+
+
+def add_region_ids(
+    rows: Iterable[list], region_with_id: Dict[str, object]
+) -> Iterator[list]:
+    """Добавляет region_id по названию региона в последнем поле строки"""
+    for row in rows:
+        row.append(region_with_id.get(row[-1], UNKNOWN_REGION_ID))
+        yield row
+
+
+def add_id_to_csv(input_file: str) -> str:
+    """Добавляет столбец с region_id в csv файл."""
+    region_with_id = load_region_ids()
 
     with (
         open(input_file, "r", encoding="utf-8-sig", newline="") as infile,
@@ -30,13 +58,6 @@ def add_id_to_csv(input_file: str) -> str:
 
         next(csv_reader, None)
 
-        for row in csv_reader:
-            try:
-                row.append(region_with_id[row[-1]])
-            except KeyError:
-                # TODO: Fix hardcoded region_id for unknown regions
-                row.append("91")
-
-            csv_writer.writerow(row)
+        csv_writer.writerows(add_region_ids(csv_reader, region_with_id))
 
     return outfile.name
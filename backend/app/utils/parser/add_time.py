@@ -1,6 +1,7 @@
 import csv
 from datetime import datetime, timedelta
 import tempfile
+from typing import Iterable, Iterator
 
 
 def parse_time(time_str):
@@ -36,6 +37,26 @@ def calculate_flight_time(takeoff_time, landing_time):
         return "Нет данных"
 
 
+def add_duration(rows: Iterable[list]) -> Iterator[list]:
+    """Вставляет время полета восьмым полем в каждую строку"""
+    for row in rows:
+        if len(row) >= 8:
+            if (
+                row[5] not in ["Нет данных", ""]
+                and row[6] not in ["Нет данных", ""]
+                and row[5] is not None
+                and row[6] is not None
+            ):
+                flight_time = calculate_flight_time(row[5], row[6])
+            else:
+                flight_time = "Нет данных"
+
+            yield list(row[:7]) + [flight_time] + list(row[7:])
+        else:
+            flight_time = "Нет данных"
+            yield list(row) + [flight_time] + ([""] * (8 - len(row)))
+
+
 def add_duration_time(input_file):
     """Обрабатывает CSV файл и добавляет время полета, сохраняет в tempfile"""
     with (
@@ -46,24 +67,6 @@ def add_duration_time(input_file):
     ):
         reader = csv.reader(infile)
         writer = csv.writer(outfile)
-
-        for row in reader:
-            if len(row) >= 8:
-                if (
-                    row[5] not in ["Нет данных", ""]
-                    and row[6] not in ["Нет данных", ""]
-                    and row[5] is not None
-                    and row[6] is not None
-                ):
-                    flight_time = calculate_flight_time(row[5], row[6])
-                else:
-                    flight_time = "Нет данных"
-
-                new_row = row[:7] + [flight_time] + row[7:]
-                writer.writerow(new_row)
-            else:
-                flight_time = "Нет данных"
-                new_row = row + [flight_time] + ([""] * (8 - len(row)))
-                writer.writerow(new_row)
+        writer.writerows(add_duration(reader))
 
     return outfile.name
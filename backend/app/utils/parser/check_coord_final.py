@@ -1,19 +1,53 @@
 import csv
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from itertools import islice
 import json
+import math
 import tempfile
+from typing import Dict, Iterable, Iterator, Optional
 
+import numpy as np
+import shapely
 from shapely.geometry import Point, Polygon
+from shapely.strtree import STRtree
+
+from backend.app.config import (
+    REGION_CACHE_DIR,
+    REGION_GRID_CELL_SIZE,
+    REGION_MEMO_PERSIST,
+    REGION_MEMO_SIZE,
+)
+from backend.app.utils.parser.region_cache import (
+    cached_region_polygons,
+    load_region_memo,
+    save_region_memo,
+    source_hash,
+)
+from backend.app.utils.parser.region_grid import BORDER, OUTSIDE, load_or_build_grid
+
+# Строк в одной пачке пакетного поиска регионов
+REGION_BATCH_SIZE = 10000
 
 
 class AdvancedRegionFinder:
     """Класс для поиска регионов в России с улучшенными методами"""
 
-    def __init__(self, geojson_file):
-        self.geojson_data = self.load_geojson_data(geojson_file)
-        self.region_polygons = self.create_region_polygons()
+    def __init__(self, geojson_file, grid_cell_size=None, memo_size=None):
+        self.source_hash = source_hash(geojson_file)
+        # Полигоны готовятся по GeoJSON один раз и дальше берутся из кеша
+        self.region_polygons = cached_region_polygons(
+            geojson_file, self.read_region_polygons
+        )
+        self.build_spatial_index()
+        self.setup_region_grid(grid_cell_size)
+        self.setup_region_memo(memo_size)
         self.setup_advanced_methods()
 
+    def read_region_polygons(self, geojson_file):
+        """Полигоны регионов напрямую из GeoJSON, без кеша"""
+        self.geojson_data = self.load_geojson_data(geojson_file)
+        return self.create_region_polygons()
+
     def load_geojson_data(self, filename):
         """Загрузка GeoJSON данных"""
         with open(filename, "r", encoding="utf-8") as f:
@@ -93,13 +127,233 @@ class AdvancedRegionFinder:
         lats = [coord[1] for coord in all_coords]
         return (sum(lons) / len(lons), sum(lats) / len(lats))
 
-    def setup_advanced_methods(self):
-        """Настройка дополнительных методов поиска"""
-        self.region_index = []
+    def build_spatial_index(self):
+        """
+        STRtree по всем полигонам регионов. Полигоны идут в порядке регионов,
+        поэтому из нескольких подходящих побеждает полигон с меньшим номером -
+        тот же, что нашел бы перебор регионов по порядку.
+        """
+        self.polygon_regions = []
+        polygons = []
         for name, data in self.region_polygons.items():
-            bbox = data["bbox"]
-            self.region_index.append((bbox, name))
+            polygons.extend(data["polygons"])
+            self.polygon_regions.extend([name] * len(data["polygons"]))
+        self.polygons = np.array(polygons, dtype=object)
+        shapely.prepare(self.polygons)
+        self.polygon_tree = STRtree(self.polygons)
+
+    def setup_region_grid(self, cell_size=None):
+        """
+        Сетка поиска регионов (см. RegionGrid) для файла полигонов;
+        при шаге 0 точный поиск идет только по геометрии
+        """
+        cell_size = REGION_GRID_CELL_SIZE if cell_size is None else cell_size
+        self.region_grid = None
+        if cell_size > 0 and len(self.polygons):
+            self.region_grid = load_or_build_grid(
+                self.polygons,
+                self.polygon_tree,
+                self.source_hash,
+                cell_size,
+                REGION_CACHE_DIR,
+            )
+
+    def setup_region_memo(self, size=None):
+        """
+        LRU-кеш координаты -> регион: операторы летают с одних и тех же мест,
+        и координаты (округленные парсером до сотых) в файле повторяются.
+        При REGION_MEMO_PERSIST загружается кеш, сохраненный прошлой загрузкой.
+        """
+        self.memo_size = REGION_MEMO_SIZE if size is None else size
+        self.region_memo = OrderedDict()
+        self.memo_hits = self.memo_misses = 0
+        if self.memo_size > 0 and REGION_MEMO_PERSIST:
+            self.region_memo.update(load_region_memo(self.source_hash, self.memo_size))
+
+    def remember_region(self, key, region):
+        if self.memo_size <= 0 or not (math.isfinite(key[0]) and math.isfinite(key[1])):
+            return
+        self.region_memo[key] = region
+        if len(self.region_memo) > self.memo_size:
+            self.region_memo.popitem(last=False)
+
+    def region_memo_stats(self):
+        """Статистика кеша: hits - точек без поиска по геометрии, misses - с поиском"""
+        lookups = self.memo_hits + self.memo_misses
+        return {
+            "hits": self.memo_hits,
+            "misses": self.memo_misses,
+            "hit_rate": round(self.memo_hits / lookups, 4) if lookups else None,
+            "size": len(self.region_memo),
+        }
+
+    def save_region_memo(self):
+        """Сохраняет кеш координат для следующих загрузок, если это включено"""
+        if REGION_MEMO_PERSIST and self.memo_size > 0 and self.region_memo:
+            save_region_memo(self.source_hash, self.region_memo)
+
+    def finish_region_memo(self, region_stats=None):
+        """Сохраняет кеш координат и дописывает его статистику в region_stats"""
+        self.save_region_memo()
+        if region_stats is not None:
+            region_stats.update(self.region_memo_stats())
+
+    def nearest_polygon(self, point, max_distance=None):
+        """
+        Номер ближайшего полигона и расстояние до него, (None, inf) если
+        полигонов нет или ближайший не ближе max_distance
+        """
+        indices, distances = self.polygon_tree.query_nearest(
+            point, max_distance=max_distance, return_distance=True, all_matches=True
+        )
+        if not len(indices):
+            return None, float("inf")
+        # При равных расстояниях - первый полигон, как при переборе
+        return int(indices.min()), float(distances.min())
+
+    def contained_polygons(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Для каждой точки - номер первого содержащего ее полигона, -1 если
+        такого нет. С сеткой геометрия проверяется только в граничных ячейках.
+        """
+        if self.region_grid is None:
+            return self.contained_polygons_exact(lats, lons)
+        result = self.region_grid.lookup(lons, lats)
+        border = np.flatnonzero(result == BORDER)
+        result[result == OUTSIDE] = -1
+        result[border] = self.contained_polygons_exact(lats[border], lons[border])
+        return result
+
+    def contained_polygons_exact(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """contained_polygons по геометрии полигонов, без сетки"""
+        missing = len(self.polygons)
+        result = np.full(len(lats), missing)
+        point_idx, polygon_idx = self.polygon_tree.query(shapely.points(lons, lats))
+        inside = shapely.contains_xy(
+            self.polygons[polygon_idx], lons[point_idx], lats[point_idx]
+        )
+        np.minimum.at(result, point_idx[inside], polygon_idx[inside])
+        result[result == missing] = -1
+        return result
+
+    def nearest_polygons(
+        self, lats: np.ndarray, lons: np.ndarray, max_distance: Optional[float] = None
+    ) -> tuple:
+        """
+        Для каждой точки - номер ближайшего полигона и расстояние до него,
+        -1 и inf если полигонов нет или ближайший дальше max_distance;
+        при равных расстояниях - первый полигон
+        """
+        missing = len(self.polygons)
+        result = np.full(len(lats), missing)
+        distances = np.full(len(lats), np.inf)
+        (point_idx, polygon_idx), distance = self.polygon_tree.query_nearest(
+            shapely.points(lons, lats),
+            max_distance=max_distance,
+            return_distance=True,
+            all_matches=True,
+        )
+        np.minimum.at(result, point_idx, polygon_idx)
+        np.minimum.at(distances, point_idx, distance)
+        result[result == missing] = -1
+        return result, distances
+
+    def find_regions_russian_priority(self, lats, lons) -> np.ndarray:
+        """
+        Пакетный find_region_russian_priority: регионы для массивов широт
+        и долгот. Координаты из LRU-кеша и повторы внутри пакета по геометрии
+        заново не ищутся.
+        """
+        positions = {}
+        codes = np.fromiter(
+            (
+                positions.setdefault(key, len(positions))
+                for key in zip(
+                    np.asarray(lats, dtype=float).tolist(),
+                    np.asarray(lons, dtype=float).tolist(),
+                )
+            ),
+            dtype=np.intp,
+        )
+        keys = list(positions)
+        found = np.empty(len(keys), dtype=object)
+        missing = []
+        for i, key in enumerate(keys):
+            region = self.region_memo.get(key)
+            if region is None:
+                missing.append(i)
+            else:
+                self.region_memo.move_to_end(key)
+                found[i] = region
+        self.memo_hits += len(codes) - len(missing)
+        self.memo_misses += len(missing)
+
+        if missing:
+            resolved = self.resolve_regions(
+                [keys[i][0] for i in missing], [keys[i][1] for i in missing]
+            ).tolist()
+            found[missing] = resolved
+            for i, region in zip(missing, resolved):
+                self.remember_region(keys[i], region)
+        return found[codes]
+
+    def resolve_regions(self, lats, lons) -> np.ndarray:
+        """
+        Регионы для массивов широт и долгот без кеша, с тем же порядком
+        методов и тем же результатом, что у find_region_russian_priority.
+
+        Точный поиск и расстояния до полигонов считаются векторно для всех
+        точек сразу, по одной точке проверяются только приграничные зоны
+        и эвристики для тех, что не попали ни в один полигон.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        names = np.array(self.polygon_regions + ["Регион не найден"], dtype=object)
+
+        # Номер -1 (точка вне полигонов) дает последнее имя - "Регион не найден"
+        contained = self.contained_polygons(lats, lons)
+        regions = names[contained]
+        # Для NaN и бесконечных координат ни один метод региона не находит
+        rest = np.flatnonzero((contained < 0) & np.isfinite(lats) & np.isfinite(lons))
+
+        unresolved = []
+        for i, lat, lon in zip(rest.tolist(), lats[rest].tolist(), lons[rest].tolist()):
+            region = self.find_region_border_zone(lat, lon)
+            if region:
+                regions[i] = region
+            else:
+                unresolved.append(i)
+        if not unresolved:
+            return regions
+
+        # Поиск ближайшего ограничен 1.0 - дальше всех порогов методов
+        # близости; без ограничения ищутся только оставшиеся далекие точки
+        rest = np.array(unresolved)
+        nearest, distances = self.nearest_polygons(lats[rest], lons[rest], 1.0)
+        far = []
+        for i, lat, lon, index, distance in zip(
+            rest.tolist(),
+            lats[rest].tolist(),
+            lons[rest].tolist(),
+            nearest.tolist(),
+            distances.tolist(),
+        ):
+            region = None if distance < 0.5 else self.find_region_extended_heuristics(lat, lon)
+            if region:
+                regions[i] = region
+            elif index >= 0:
+                regions[i] = names[index]
+            else:
+                far.append(i)
+
+        if far:
+            # Финальная попытка - ближайший полигон, даже если далеко
+            far = np.array(far)
+            regions[far] = names[self.nearest_polygons(lats[far], lons[far])[0]]
+        return regions
 
+    def setup_advanced_methods(self):
+        """Настройка дополнительных методов поиска"""
         # Приграничные зоны и их российские соседи
         self.border_zones = {
             # Граница с Латвией -> Псковская область
@@ -143,37 +397,23 @@ class AdvancedRegionFinder:
 
     def find_region_exact(self, lat, lon):
         """Точный поиск по полигонам"""
-        point = Point(lon, lat)
-
-        candidate_regions = []
-        for bbox, name in self.region_index:
-            if self.point_in_bbox(point, bbox):
-                candidate_regions.append(name)
-
-        for name in candidate_regions:
-            for polygon in self.region_polygons[name]["polygons"]:
-                if polygon.contains(point):
-                    return name
-
-        return None
+        if self.region_grid is not None:
+            cell = self.region_grid.lookup_one(lon, lat)
+            if cell >= 0:
+                return self.polygon_regions[cell]
+            if cell == OUTSIDE:
+                return None
+        candidates = self.polygon_tree.query(Point(lon, lat))
+        if not len(candidates):
+            return None
+        candidates.sort()
+        hits = candidates[shapely.contains_xy(self.polygons[candidates], lon, lat)]
+        return self.polygon_regions[hits[0]] if len(hits) else None
 
     def find_region_proximity(self, lat, lon, max_distance=1.0):
         """Поиск по близости с улучшенным алгоритмом"""
-        point = Point(lon, lat)
-        best_region = None
-        min_distance = float("inf")
-
-        for name, data in self.region_polygons.items():
-            for polygon in data["polygons"]:
-                try:
-                    distance = point.distance(polygon)
-                    if distance < min_distance:
-                        min_distance = distance
-                        best_region = name
-                except Exception:
-                    continue
-
-        return best_region if min_distance < max_distance else None
+        index, distance = self.nearest_polygon(Point(lon, lat), max_distance)
+        return self.polygon_regions[index] if distance < max_distance else None
 
     def find_region_border_zone(self, lat, lon):
         """Поиск в приграничных зонах - ВСЕГДА возвращает российский регион"""
@@ -202,10 +442,9 @@ class AdvancedRegionFinder:
 
     def find_region_extended_heuristics(self, lat, lon):
         """Расширенные географические эвристики"""
-        point = Point(lon, lat)
-
         for heuristic in self.extended_heuristics:
-            if self.point_in_bbox(point, heuristic["bbox"]):
+            bbox = heuristic["bbox"]
+            if bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]:
                 return heuristic["region"]
 
         if 55.5 < lat < 56.0 and 37.0 < lon < 38.0:
@@ -224,7 +463,21 @@ class AdvancedRegionFinder:
         return None
 
     def find_region_russian_priority(self, lat, lon):
-        """Главный метод поиска с приоритетом российских регионов"""
+        """Главный метод поиска с приоритетом российских регионов, через LRU-кеш"""
+        key = (lat, lon)
+        region = self.region_memo.get(key)
+        if region is not None:
+            self.region_memo.move_to_end(key)
+            self.memo_hits += 1
+            return region
+
+        self.memo_misses += 1
+        region = self.resolve_region(lat, lon)
+        self.remember_region(key, region)
+        return region
+
+    def resolve_region(self, lat, lon):
+        """Поиск региона по цепочке методов, без кеша"""
         methods = [
             self.find_region_exact,  # 1. Точный поиск
             self.find_region_border_zone,  # 2. Приграничные зоны (российские регионы)
@@ -246,21 +499,8 @@ class AdvancedRegionFinder:
                 continue
 
         # 6. Финальная попытка - ближайший российский регион (даже если далеко)
-        point = Point(lon, lat)
-        best_region = None
-        min_distance = float("inf")
-
-        for name, data in self.region_polygons.items():
-            for polygon in data["polygons"]:
-                try:
-                    distance = point.distance(polygon)
-                    if distance < min_distance:
-                        min_distance = distance
-                        best_region = name
-                except Exception:
-                    continue
-
-        return best_region if best_region else "Регион не найден"
+        index, _ = self.nearest_polygon(Point(lon, lat))
+        return self.polygon_regions[index] if index is not None else "Регион не найден"
 
 
 def parse_coordinates(coord_str):
@@ -283,8 +523,56 @@ def parse_coordinates(coord_str):
     return None, None
 
 
-def process_csv_russian_priority(input_csv, geojson_file):
-    """Обработка с приоритетом российских регионов"""
+def assign_regions(
+    rows: Iterable[list],
+    finder: AdvancedRegionFinder,
+    region_index: int,
+    takeoff_coords_index: int,
+    stats: Optional[Dict[str, int]] = None,
+    batch_size: int = REGION_BATCH_SIZE,
+) -> Iterator[list]:
+    """
+    Заменяет регион в строках на найденный по координатам взлета.
+    Строки обрабатываются пачками по batch_size через
+    find_regions_russian_priority, порядок строк сохраняется.
+    """
+    stats = defaultdict(int) if stats is None else stats
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+
+        located, lats, lons = [], [], []
+        for row in batch:
+            if len(row) <= max(region_index, takeoff_coords_index):
+                stats["Ошибка формата"] += 1
+                continue
+
+            lat, lon = parse_coordinates(row[takeoff_coords_index])
+            if lat is not None and lon is not None:
+                located.append(row)
+                lats.append(lat)
+                lons.append(lon)
+                stats["Успешно"] += 1
+            else:
+                row[region_index] = "Неверные координаты"
+                stats["Ошибка парсинга"] += 1
+
+        if located:
+            regions = finder.find_regions_russian_priority(lats, lons)
+            for row, region in zip(located, regions):
+                row[region_index] = region
+
+        yield from batch
+
+
+def process_csv_russian_priority(input_csv, geojson_file, region_stats=None):
+    """
+    Обработка с приоритетом российских регионов. В region_stats
+    записывается статистика кеша регионов по координатам.
+    """
     finder = AdvancedRegionFinder(geojson_file)
 
     with (
@@ -301,26 +589,11 @@ def process_csv_russian_priority(input_csv, geojson_file):
         takeoff_coords_index = header.index("Координаты взлета")
 
         writer.writerow(header)
-
-        stats = defaultdict(int)
-
-        for row in reader:
-            if len(row) <= max(region_index, takeoff_coords_index):
-                writer.writerow(row)
-                stats["Ошибка формата"] += 1
-                continue
-
-            takeoff_coord_str = row[takeoff_coords_index]
-            lat, lon = parse_coordinates(takeoff_coord_str)
-
-            if lat is not None and lon is not None:
-                region = finder.find_region_russian_priority(lat, lon)
-                row[region_index] = region
-                stats["Успешно"] += 1
-            else:
-                row[region_index] = "Неверные координаты"
-                stats["Ошибка парсинга"] += 1
-
-            writer.writerow(row)
+        try:
+            writer.writerows(
+                assign_regions(reader, finder, region_index, takeoff_coords_index)
+            )
+        finally:
+            finder.finish_region_memo(region_stats)
 
         return outfile.name
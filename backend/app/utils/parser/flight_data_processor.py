@@ -1,44 +1,120 @@
+from itertools import islice
 import os
 import logging
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
-from backend.app.config import STATIC_DIR
+from backend.app.config import PARSER_WORKERS, STATIC_DIR
 from backend.app.constants import RUSSIA_FULL_POLYGON
-from backend.app.utils.parser.add_id_to_csv import add_id_to_csv
-from backend.app.utils.parser.add_time import add_duration_time
-from backend.app.utils.parser.check_coord_final import process_csv_russian_priority
-from backend.app.utils.parser.ready_parser_2025 import FlightDataParser
-from backend.app.utils.parser.xls_to_csv import convert_xls_to_csv
+from backend.app.utils.parser.add_id_to_csv import (
+    add_id_to_csv,
+    add_region_ids,
+    load_region_ids,
+)
+from backend.app.utils.parser.add_time import add_duration, add_duration_time
+from backend.app.utils.parser.check_coord_final import (
+    AdvancedRegionFinder,
+    assign_regions,
+    process_csv_russian_priority,
+)
+from backend.app.utils.parser.ready_parser_2025 import FLIGHT_COLUMNS, FlightDataParser
+from backend.app.utils.parser.xls_to_csv import convert_xls_to_csv, read_sheet_rows
 from backend.app.logging import log_function
 
 logger = logging.getLogger(__name__)
 
+# Индексы полей строки после добавления длительности полета
+TAKEOFF_COORDINATES_INDEX = FLIGHT_COLUMNS.index("Координаты взлета")
+REGION_INDEX = FLIGHT_COLUMNS.index("Регион") + 1
+
 
 @log_function(logger)
-def main(path_raw_data: str) -> Optional[str]:
-    """Основная функция обработки xls файла с данными о полетах."""
+def flight_rows(
+    path_raw_data: str,
+    workers: Optional[int] = None,
+    region_stats: Optional[dict] = None,
+    start_row: int = 0,
+) -> Tuple[int, Iterator[list]]:
+    """
+    Потоковая обработка xls файла с данными о полетах.
+
+    Строки листа проходят разбор, расчет длительности, поиск региона и
+    добавление region_id без промежуточных файлов. Возвращает (число строк
+    листа, итератор строк в формате CSV для csv_load). Первые start_row
+    сообщений (уже загруженные строки) пропускаются до разбора и поиска
+    регионов, номера строк итератора начинаются с start_row. Когда итератор
+    пройден или закрыт (close), в region_stats записывается статистика кеша
+    регионов по координатам.
+    """
+    logger.info(f"Начало потоковой обработки файла: {path_raw_data}")
+    rows_total, sheet_rows = read_sheet_rows(path_raw_data)
+
+    parser = FlightDataParser()
+    finder = AdvancedRegionFinder(os.path.join(STATIC_DIR, RUSSIA_FULL_POLYGON))
+    region_with_id = load_region_ids()
+
+    messages = islice(parser.messages_from_rows(sheet_rows), start_row, None)
+    records = parser.iter_flight_records(messages, workers=workers or PARSER_WORKERS)
+    rows = add_duration(records)
+    rows = assign_regions(rows, finder, REGION_INDEX, TAKEOFF_COORDINATES_INDEX)
+    rows = add_region_ids(rows, region_with_id)
+    return rows_total, _finish_regions(rows, finder, region_stats)
+
+
+def _finish_regions(
+    rows: Iterator[list], finder: AdvancedRegionFinder, region_stats: Optional[dict]
+) -> Iterator[list]:
+    """
+    Отдает строки, затем сохраняет кеш регионов и его статистику, в том
+    числе если загрузка остановилась раньше конца файла
+    """
+    try:
+        yield from rows
+    finally:
+        finder.finish_region_memo(region_stats)
+        logger.info("Кеш регионов по координатам: %s", finder.region_memo_stats())
+
+
+@log_function(logger)
+def main(
+    path_raw_data: str, keep_files: bool = False, region_stats: Optional[dict] = None
+) -> Optional[str]:
+    """
+    Основная функция обработки xls файла с данными о полетах через файлы.
+
+    Каждый этап пишет свой CSV. Промежуточные файлы удаляются после
+    следующего этапа, при keep_files остаются для отладки. В region_stats
+    записывается статистика кеша регионов по координатам.
+    """
+    stage_files = []
     try:
         logger.info(f"Начало обработки файла: {path_raw_data}")
 
         logger.info("Конвертация XLS в CSV")
         csv_file_path = convert_xls_to_csv(path_raw_data)
+        stage_files.append(csv_file_path)
         logger.info(f"Файл успешно конвертирован в CSV: {csv_file_path}")
 
         logger.info("Парсинг данных полетов")
         parser = FlightDataParser()
         parser_file = parser.parse_csv_file(csv_file_path)
+        stage_files.append(parser_file)
         logger.info("Данные полетов успешно распарсены")
 
         logger.info("Добавление расчета длительности полетов")
         parser_file_with_duration = add_duration_time(parser_file)
+        stage_files.append(parser_file_with_duration)
         logger.info("Длительность полетов успешно добавлена")
 
         logger.info("Проверка координат по полигону России")
         polygon_path = os.path.join(STATIC_DIR, RUSSIA_FULL_POLYGON)
+        if region_stats is None:
+            region_stats = {}
         parser_file_check_coordinate = process_csv_russian_priority(
-            parser_file_with_duration, polygon_path
+            parser_file_with_duration, polygon_path, region_stats
         )
+        stage_files.append(parser_file_check_coordinate)
         logger.info("Координаты успешно проверены")
+        logger.info("Кеш регионов по координатам: %s", region_stats)
 
         logger.info("Добавление ID к записям")
         data_ready_for_db = add_id_to_csv(parser_file_check_coordinate)
@@ -48,3 +124,10 @@ def main(path_raw_data: str) -> Optional[str]:
     except Exception as e:
         logger.error(f"Ошибка при обработке файла: {str(e)}")
         raise
+    finally:
+        if keep_files:
+            logger.info(f"Промежуточные файлы этапов: {stage_files}")
+        else:
+            for stage_file in stage_files:
+                if stage_file and os.path.exists(stage_file):
+                    os.unlink(stage_file)
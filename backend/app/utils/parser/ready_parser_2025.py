@@ -1,10 +1,86 @@
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 import csv
+from functools import partial
+from itertools import islice
+import multiprocessing
 import re
 import tempfile
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
+from backend.app.config import PARSER_CHUNK_SIZE, PARSER_WORKERS
+
+NO_DATA = "Нет данных"
+
+COORDINATES = re.compile(r"(\d{2})(\d{2})([NS])(\d{3})(\d{2})([EW])")
+COORDINATES_EXTENDED = re.compile(
+    r"(\d{2})(\d{2})(\d{2})([NS])(\d{3})(\d{2})(\d{2})([EW])"
+)
+TIME = re.compile(r"\d{4}")
+
+# Поля сообщений. У каждого выражения постоянный префикс, по которому re
+# ищет совпадение быстрым поиском подстроки, поэтому отдельный поиск
+# по полю дешевле общего выражения с альтернативами по всем ключам
+SID = re.compile(r"SID/(\d+)")
+SID_DASH = re.compile(r"-SID (\d+)")
+REG = re.compile(r"REG/([A-Z0-9,]+)")
+REG_DASH = re.compile(r"-REG ([A-Z0-9,]+)")
+TYP = re.compile(r"TYP/([A-Z0-9]+)")
+DOF = re.compile(r"DOF/(\d{6})")
+ADD = re.compile(r"ADD (\d{6})")
+DEP = re.compile(r"DEP/([^\s]+)")
+DEST = re.compile(r"DEST/([^\s]+)")
+ADEPZ = re.compile(r"-ADEPZ ([^\n]+)")
+ADARRZ = re.compile(r"-ADARRZ ([^\n]+)")
+RMK = re.compile(r"RMK/(.+?)(?:SID/|$)", re.DOTALL)
+ZZZZ = re.compile(r"-ZZZZ(\d{4})")
+ATD = re.compile(r"-ATD (\d{4})")
+ATA = re.compile(r"-ATA (\d{4})")
+# Координаты в тексте в расширенном и обычном формате. Совпадения двух
+# форматов не пересекаются, поэтому один findall находит то же,
+# что два findall в extract_coordinates_from_text
+TEXT_COORDINATES = re.compile(r"(\d{6}[NS]\d{7}[EW])|(\d{4}[NS]\d{5}[EW])")
+
+FlightRecord = namedtuple(
+    "FlightRecord",
+    [
+        "flight_id",
+        "drone_type",
+        "takeoff_coordinates",
+        "landing_coordinates",
+        "flight_date",
+        "takeoff_time",
+        "landing_time",
+        "region",
+    ],
+)
+
+# Колонки результата разбора в порядке полей FlightRecord
+FLIGHT_COLUMNS = [
+    "ID полета",
+    "Тип БПЛА",
+    "Координаты взлета",
+    "Координаты посадки",
+    "Дата (DD.MM.YY)",
+    "Время взлета (UTC)",
+    "Время посадки (UTC)",
+    "Регион",
+]
+
+
+def _parse_chunk(messages: List[Tuple[str, str, str, str]]) -> List[FlightRecord]:
+    """Разбор порции сообщений в процессе пула"""
+    parser = FlightDataParser()
+    return [parser.parse_flight_record(*message) for message in messages]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 
 class FlightDataParser:
     """Класс для парсинга данных полетов из CSV файла"""
@@ -14,8 +90,7 @@ class FlightDataParser:
         if not coord_str:
             return None
 
-        coord_pattern = r"(\d{2})(\d{2})([NS])(\d{3})(\d{2})([EW])"
-        match = re.search(coord_pattern, coord_str)
+        match = COORDINATES.search(coord_str)
         if match:
             lat_deg = int(match.group(1))
             lat_min = int(match.group(2))
@@ -64,8 +139,7 @@ class FlightDataParser:
         if not coord_str:
             return None
 
-        coord_pattern = r"(\d{2})(\d{2})(\d{2})([NS])(\d{3})(\d{2})(\d{2})([EW])"
-        match = re.search(coord_pattern, coord_str)
+        match = COORDINATES_EXTENDED.search(coord_str)
         if match:
             lat_deg = int(match.group(1))
             lat_min = int(match.group(2))
@@ -93,7 +167,7 @@ class FlightDataParser:
         if not time_str or len(time_str) < 4:
             return None
 
-        time_match = re.search(r"\d{4}", time_str)
+        time_match = TIME.search(time_str)
         if time_match:
             time_val = time_match.group()
             return f"{time_val[:2]}:{time_val[2:]}"
@@ -155,119 +229,196 @@ class FlightDataParser:
 
         return None
 
-    def parse_single_flight(
+    def parse_flight_record(
         self, region: str, flight_data: str, idep_data: str = "", iarr_data: str = ""
-    ) -> Dict:
-        """Парсинг данных одного полета"""
-
+    ) -> FlightRecord:
+        """
+        Разбор данных одного полета в FlightRecord.
+
+        Результат совпадает с прежним разбором отдельным поиском каждого поля
+        (эталон в backend/benchmarks/flight_record.py), но выражения
+        скомпилированы заранее, а каждое поле ищется только если оно нужно:
+        ADEPZ - если нет DEP, координаты в тексте - если не хватает обеих.
+        """
         all_data = f"{flight_data} {idep_data} {iarr_data}"
+        match = (
+            SID.search(all_data)
+            or SID_DASH.search(all_data)
+            or REG.search(all_data)
+            or REG_DASH.search(all_data)
+        )
+        flight_id = match.group(1) if match else NO_DATA
+
+        match = TYP.search(flight_data)
+        aircraft_type = match.group(1) if match else NO_DATA
+
+        match = DOF.search(flight_data) or ADD.search(flight_data)
+        if not match and idep_data:
+            match = DOF.search(idep_data) or ADD.search(idep_data)
+        flight_date = NO_DATA
+        if match:
+            date_val = match.group(1)
+            flight_date = f"{date_val[4:6]}.{date_val[2:4]}.{date_val[:2]}"
 
-        flight_id = self.extract_flight_id(all_data)
-
-        aircraft_type = self.extract_aircraft_type(flight_data)
-
-        flight_date = self.extract_date(flight_data) or self.extract_date(idep_data)
-
-        dep_coords = None
-        dep_match = re.search(r"DEP/([^\s]+)", flight_data)
-        if dep_match:
-            dep_coords = self.extract_coordinates(dep_match.group(1))
-
-        if not dep_coords:
-            adepz_match = re.search(r"-ADEPZ ([^\n]+)", idep_data)
-            if adepz_match:
-                dep_coords = self.extract_coordinates(adepz_match.group(1))
-
-        dest_coords = None
-        dest_match = re.search(r"DEST/([^\s]+)", flight_data)
-        if dest_match:
-            dest_coords = self.extract_coordinates(dest_match.group(1))
+        match = DEP.search(flight_data) or ADEPZ.search(idep_data)
+        dep_coords = self.extract_coordinates(match.group(1)) if match else None
 
-        if not dest_coords:
-            adarrz_match = re.search(r"-ADARRZ ([^\n]+)", iarr_data)
-            if adarrz_match:
-                dest_coords = self.extract_coordinates(adarrz_match.group(1))
+        match = DEST.search(flight_data) or ADARRZ.search(iarr_data)
+        dest_coords = self.extract_coordinates(match.group(1)) if match else None
 
         if not dep_coords or not dest_coords:
-            rmk_match = re.search(r"RMK/(.+?)(?:SID/|$)", flight_data, re.DOTALL)
-            rmk_coordinates = []
-            if rmk_match:
-                rmk_text = rmk_match.group(1)
-                rmk_coordinates = self.extract_coordinates_from_text(rmk_text)
-
-            if not rmk_coordinates:
-                all_coordinates = self.extract_coordinates_from_text(flight_data)
-            else:
-                all_coordinates = rmk_coordinates
+            all_coordinates = []
+            match = RMK.search(flight_data)
+            if match:
+                all_coordinates = self._text_coordinates(flight_data, *match.span(1))
+            if not all_coordinates:
+                all_coordinates = self._text_coordinates(flight_data)
 
             if all_coordinates:
-                if not dep_coords and all_coordinates:
-                    dep_coords = all_coordinates[0]
-
-                if not dest_coords and len(all_coordinates) > 1:
-                    dest_coords = all_coordinates[-1]
-                elif not dest_coords and len(all_coordinates) == 1:
-                    dest_coords = all_coordinates[0]
+                dep_coords = dep_coords or all_coordinates[0]()
+                dest_coords = dest_coords or all_coordinates[-1]()
 
         if dep_coords and not dest_coords:
             dest_coords = dep_coords
         elif dest_coords and not dep_coords:
             dep_coords = dest_coords
 
-        dep_time = None
-        arr_time = None
-
-        zzzz_matches = re.findall(r"-ZZZZ(\d{4})", flight_data)
-        if zzzz_matches:
-            dep_time = self.extract_time(zzzz_matches[0])  # Первое время - взлет
-
-        if len(zzzz_matches) >= 2:
-            arr_time = self.extract_time(zzzz_matches[-1])  # Последнее время - посадка
+        zzzz_matches = ZZZZ.findall(flight_data)
+        dep_time = zzzz_matches[0] if zzzz_matches else None  # Первое время - взлет
+        # Последнее время - посадка
+        arr_time = zzzz_matches[-1] if len(zzzz_matches) >= 2 else None
 
         if not dep_time:
-            atd_match = re.search(r"-ATD (\d{4})", idep_data)
-            if atd_match:
-                dep_time = self.extract_time(atd_match.group(1))
+            match = ATD.search(idep_data)
+            dep_time = match.group(1) if match else None
 
         if not arr_time:
-            ata_match = re.search(r"-ATA (\d{4})", iarr_data)
-            if ata_match:
-                arr_time = self.extract_time(ata_match.group(1))
-
-        return {
-            "ID полета": flight_id or "Нет данных",
-            "Тип БПЛА": aircraft_type,
-            "Координаты взлета": dep_coords or "Нет данных",
-            "Координаты посадки": dest_coords or "Нет данных",
-            "Дата (DD.MM.YY)": flight_date or "Нет данных",
-            "Время взлета (UTC)": dep_time or "Нет данных",
-            "Время посадки (UTC)": arr_time or "Нет данных",
-            "Регион": region,
-        }
-
-    def parse_csv_file(self, csv_file_path: str) -> str:
-        """Парсинг данных из CSV файла"""
-        flights = []
+            match = ATA.search(iarr_data)
+            arr_time = match.group(1) if match else None
+
+        return FlightRecord(
+            flight_id,
+            aircraft_type,
+            dep_coords or NO_DATA,
+            dest_coords or NO_DATA,
+            flight_date,
+            f"{dep_time[:2]}:{dep_time[2:]}" if dep_time else NO_DATA,
+            f"{arr_time[:2]}:{arr_time[2:]}" if arr_time else NO_DATA,
+            region,
+        )
+
+    def _text_coordinates(self, text: str, start: int = 0, end: Optional[int] = None) -> list:
+        """
+        Координаты в тексте в порядке extract_coordinates_from_text: сначала
+        расширенный формат, затем обычный. Перевод в градусы откладывается,
+        нужны только первая и последняя
+        """
+        extended, normal = [], []
+        found = TEXT_COORDINATES.findall(text, start, len(text) if end is None else end)
+        for extended_coord, coord in found:
+            if extended_coord:
+                extended.append(partial(self.extract_coordinates_extended, extended_coord))
+            else:
+                normal.append(partial(self.extract_coordinates, coord))
+        return extended + normal
 
+    def parse_single_flight(
+        self, region: str, flight_data: str, idep_data: str = "", iarr_data: str = ""
+    ) -> Dict:
+        """Парсинг данных одного полета"""
+        return dict(
+            zip(
+                FLIGHT_COLUMNS,
+                self.parse_flight_record(region, flight_data, idep_data, iarr_data),
+            )
+        )
+
+    @staticmethod
+    def messages_from_rows(rows: Iterable[list]) -> Iterator[Tuple[str, str, str, str]]:
+        """Строки исходного листа в виде (регион, FPL, IDEP, IARR)"""
+        for row in rows:
+            if len(row) >= 2:
+                region = row[0].strip()
+                flight_data = row[1].strip().strip('"') if len(row) > 1 else ""
+                idep_data = row[2].strip().strip('"') if len(row) > 2 else ""
+                iarr_data = row[3].strip().strip('"') if len(row) > 3 else ""
+
+                if region and flight_data:
+                    yield region, flight_data, idep_data, iarr_data
+
+    def read_messages(self, file) -> Iterator[Tuple[str, str, str, str]]:
+        """Строки исходного CSV в виде (регион, FPL, IDEP, IARR)"""
+        return self.messages_from_rows(csv.reader(file, delimiter=";"))
+
+    def iter_flight_records(
+        self,
+        messages: Iterable[Tuple[str, str, str, str]],
+        workers: int = 1,
+        chunk_size: int = PARSER_CHUNK_SIZE,
+    ) -> Iterator[FlightRecord]:
+        """
+        Потоковый разбор сообщений о полетах.
+
+        При workers > 1 сообщения делятся на порции по chunk_size и
+        разбираются в пуле процессов. В работе одновременно не больше
+        2 * workers порций, результаты отдаются в порядке порций, поэтому
+        итог совпадает с последовательным разбором.
+        """
+        if workers <= 1:
+            for message in messages:
+                yield self.parse_flight_record(*message)
+            return
+
+        chunks = _chunks(messages, chunk_size)
+        first_chunk = next(chunks, [])
+        second_chunk = next(chunks, None)
+        if second_chunk is None:
+            for message in first_chunk:
+                yield self.parse_flight_record(*message)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            pending = deque(
+                executor.submit(_parse_chunk, chunk)
+                for chunk in (first_chunk, second_chunk)
+            )
+            for chunk in chunks:
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(_parse_chunk, chunk))
+            while pending:
+                yield from pending.popleft().result()
+
+    def parse_messages(
+        self,
+        messages: Iterable[Tuple[str, str, str, str]],
+        workers: int = 1,
+        chunk_size: int = PARSER_CHUNK_SIZE,
+    ) -> List[FlightRecord]:
+        """Разбор сообщений о полетах списком, см. iter_flight_records"""
+        return list(self.iter_flight_records(messages, workers, chunk_size))
+
+    def parse_csv_file(
+        self,
+        csv_file_path: str,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> str:
+        """
+        Парсинг данных из CSV файла.
+        workers - число процессов для разбора, по умолчанию PARSER_WORKERS.
+        """
         try:
             with open(csv_file_path, "r", encoding="utf-8-sig", newline="") as file:
-                csv_reader = csv.reader(file, delimiter=";")
-
-                for row in csv_reader:
-                    if len(row) >= 2:
-                        region = row[0].strip()
-                        flight_data = row[1].strip().strip('"') if len(row) > 1 else ""
-                        idep_data = row[2].strip().strip('"') if len(row) > 2 else ""
-                        iarr_data = row[3].strip().strip('"') if len(row) > 3 else ""
-
-                        # Парсим полет
-                        if region and flight_data:
-                            flight_info = self.parse_single_flight(
-                                region, flight_data, idep_data, iarr_data
-                            )
-                            flights.append(flight_info)
-
-            df = pd.DataFrame(flights)
+                flights = self.parse_messages(
+                    self.read_messages(file),
+                    workers=workers or PARSER_WORKERS,
+                    chunk_size=chunk_size or PARSER_CHUNK_SIZE,
+                )
+
+            df = pd.DataFrame(flights, columns=FLIGHT_COLUMNS) if flights else pd.DataFrame()
             with tempfile.TemporaryDirectory() as tmpdirname:
                 parser_file = f"{tmpdirname}.csv"
 
@@ -0,0 +1,237 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import shapely
+
+from backend.app.config import REGION_CACHE_DIR
+from backend.app.logging import logger
+
+CACHE_FORMAT_VERSION = 1
+# Версия кеша координаты -> регион; менять при изменении правил поиска регионов
+MEMO_FORMAT_VERSION = 1
+
+# Загруженные в этом процессе данные по хешу исходного файла
+_source_hashes: Dict[str, tuple] = {}
+_region_polygons: Dict[str, dict] = {}
+_region_ids: Dict[str, dict] = {}
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def source_hash(path: str) -> str:
+    """SHA-256 файла; пересчитывается, только если изменились размер или mtime"""
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    cached = _source_hashes.get(path)
+    if cached is None or cached[0] != key:
+        cached = _source_hashes[path] = (key, file_sha256(path))
+    return cached[1]
+
+
+def _replace_dir(tmp_dir: str, path: str) -> None:
+    """Атомарно публикует каталог; если другой процесс успел раньше - оставляет его"""
+    try:
+        os.replace(tmp_dir, path)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def save_region_polygons(path: str, source: str, regions: dict) -> None:
+    """
+    Сохраняет полигоны регионов в каталог path: WKB всех полигонов одним
+    массивом байт со смещениями (в порядке регионов - том же, в котором
+    по ним строится STRtree), bbox и центры регионов, названия в meta.json.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    names = list(regions)
+    wkb = shapely.to_wkb([p for name in names for p in regions[name]["polygons"]])
+    offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(item) for item in wkb])
+
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path))
+    try:
+        np.save(os.path.join(tmp_dir, "wkb.npy"), np.frombuffer(b"".join(wkb), dtype=np.uint8))
+        np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+        np.save(
+            os.path.join(tmp_dir, "bboxes.npy"),
+            np.array([regions[name]["bbox"] for name in names], dtype=np.float64),
+        )
+        np.save(
+            os.path.join(tmp_dir, "centers.npy"),
+            np.array([regions[name]["center"] for name in names], dtype=np.float64),
+        )
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": CACHE_FORMAT_VERSION,
+                    "source_hash": source,
+                    "regions": names,
+                    "counts": [len(regions[name]["polygons"]) for name in names],
+                },
+                f,
+                ensure_ascii=False,
+            )
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    _replace_dir(tmp_dir, path)
+
+
+def load_region_polygons(path: str, source: str) -> Optional[dict]:
+    """
+    Полигоны регионов из каталога path в формате create_region_polygons.
+    None, если кеша нет или он построен по другому файлу.
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("source_hash") != source:
+            return None
+        wkb = np.load(os.path.join(path, "wkb.npy"), mmap_mode="r")
+        offsets = np.load(os.path.join(path, "offsets.npy"))
+        bboxes = np.load(os.path.join(path, "bboxes.npy"))
+        centers = np.load(os.path.join(path, "centers.npy"))
+    except (OSError, ValueError):
+        return None
+
+    polygons = shapely.from_wkb(
+        [wkb[start:end].tobytes() for start, end in zip(offsets[:-1], offsets[1:])]
+    ).tolist()
+    regions, start = {}, 0
+    for name, count, bbox, center in zip(
+        meta["regions"], meta["counts"], bboxes.tolist(), centers.tolist()
+    ):
+        regions[name] = {
+            "polygons": polygons[start:start + count],
+            "bbox": tuple(bbox),
+            "center": tuple(center),
+        }
+        start += count
+    return regions
+
+
+def cached_region_polygons(geojson_file: str, build: Callable[[str], dict]) -> dict:
+    """
+    Полигоны регионов из GeoJSON: из памяти процесса, из кеша в
+    REGION_CACHE_DIR или, если файл изменился, - build(geojson_file)
+    с сохранением в кеш. Полигоны общие для всех, кто их получил в процессе,
+    и не должны изменяться.
+    """
+    source = source_hash(geojson_file)
+    regions = _region_polygons.get(source)
+    if regions is not None:
+        return regions
+
+    path = os.path.join(REGION_CACHE_DIR, f"regions_{source[:16]}")
+    regions = load_region_polygons(path, source)
+    if regions is None:
+        logger.info("Подготовка полигонов регионов из %s", geojson_file)
+        regions = build(geojson_file)
+        try:
+            save_region_polygons(path, source, regions)
+        except OSError as e:
+            logger.warning("Не удалось сохранить полигоны регионов в %s: %s", path, e)
+    _region_polygons[source] = regions
+    return regions
+
+
+def cached_region_ids(polygon_path: str, build: Callable[[str], dict]) -> dict:
+    """
+    Название региона -> region_id: из памяти процесса, из кеша в
+    REGION_CACHE_DIR или build(polygon_path) с сохранением в кеш
+    """
+    source = source_hash(polygon_path)
+    region_ids = _region_ids.get(source)
+    if region_ids is not None:
+        return region_ids
+
+    path = os.path.join(REGION_CACHE_DIR, f"region_ids_{source[:16]}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") == CACHE_FORMAT_VERSION and saved.get("source_hash") == source:
+            region_ids = saved["region_ids"]
+    except (OSError, ValueError):
+        pass
+
+    if region_ids is None:
+        region_ids = build(polygon_path)
+        try:
+            os.makedirs(REGION_CACHE_DIR, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=REGION_CACHE_DIR, encoding="utf-8", delete=False
+            ) as f:
+                json.dump(
+                    {
+                        "version": CACHE_FORMAT_VERSION,
+                        "source_hash": source,
+                        "region_ids": region_ids,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning("Не удалось сохранить region_id регионов в %s: %s", path, e)
+    _region_ids[source] = region_ids
+    return region_ids
+
+
+def region_memo_path(source: str) -> str:
+    return os.path.join(REGION_CACHE_DIR, f"region_memo_{source[:16]}.npz")
+
+
+def save_region_memo(source: str, memo: OrderedDict) -> None:
+    """
+    Сохраняет кеш координаты -> регион (от старых записей к новым):
+    координаты массивом float64, регионы - номерами в списке названий
+    """
+    names = sorted(set(memo.values()))
+    codes = {name: code for code, name in enumerate(names)}
+    path = region_memo_path(source)
+    try:
+        os.makedirs(REGION_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=REGION_CACHE_DIR, suffix=".npz", delete=False
+        ) as f:
+            np.savez(
+                f,
+                version=MEMO_FORMAT_VERSION,
+                source_hash=source,
+                coords=np.array(list(memo), dtype=np.float64).reshape(-1, 2),
+                codes=np.array([codes[name] for name in memo.values()], dtype=np.int32),
+                names=np.array(names),
+            )
+        os.replace(f.name, path)
+    except OSError as e:
+        logger.warning("Не удалось сохранить кеш регионов по координатам в %s: %s", path, e)
+
+
+def load_region_memo(source: str, size: int) -> list:
+    """
+    Сохраненный кеш координаты -> регион: не более size последних записей
+    ((lat, lon), регион) от старых к новым. Пустой, если кеша нет или он
+    построен по другому файлу или прежним правилам поиска.
+    """
+    try:
+        with np.load(region_memo_path(source), allow_pickle=False) as data:
+            if int(data["version"]) != MEMO_FORMAT_VERSION or str(data["source_hash"]) != source:
+                return []
+            coords = data["coords"][-size:].tolist()
+            names = data["names"].tolist()
+            regions = [names[code] for code in data["codes"][-size:].tolist()]
+    except (OSError, ValueError, KeyError):
+        return []
+    return list(zip(map(tuple, coords), regions))
@@ -0,0 +1,184 @@
+import json
+import math
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from backend.app.logging import logger
+
+GRID_FORMAT_VERSION = 1
+
+# Значения ячеек кроме номера полигона
+OUTSIDE = -2  # ячейку не задевает ни один полигон
+BORDER = -1  # по ячейке проходит граница, нужна точная проверка
+
+# Во сколько раз грубая ячейка больше итоговой при построении
+COARSE_FACTOR = 8
+
+
+class RegionGrid:
+    """
+    Растр поиска регионов: равномерная сетка по охвату полигонов, в ячейке -
+    номер полигона, который содержит ее целиком (и раньше него ни один
+    полигон ячейку не задевает), OUTSIDE или BORDER.
+
+    Для точки во внутренней ячейке результат точного поиска - индекс массива,
+    для ячейки OUTSIDE - "вне полигонов"; проверять геометрию нужно только
+    в ячейках BORDER.
+    """
+
+    def __init__(self, cells: np.ndarray, origin: tuple, cell_size: float):
+        self.cells = cells
+        self.x0, self.y0 = origin
+        self.cell_size = cell_size
+        self.rows, self.cols = cells.shape
+
+    @classmethod
+    def build(cls, polygons: np.ndarray, tree: STRtree, cell_size: float) -> "RegionGrid":
+        """
+        Строит сетку по полигонам из STRtree. Сначала классифицируются
+        грубые ячейки, и только граничные из них делятся на итоговые.
+        """
+        x0, y0, x1, y1 = shapely.total_bounds(polygons)
+        cols = max(math.ceil((x1 - x0) / cell_size), 1)
+        rows = max(math.ceil((y1 - y0) / cell_size), 1)
+        dtype = np.int16 if len(polygons) < np.iinfo(np.int16).max else np.int32
+        cells = np.full((rows, cols), OUTSIDE, dtype=dtype)
+
+        coarse = cell_size * COARSE_FACTOR
+        coarse_y, coarse_x = np.divmod(
+            np.arange(math.ceil(rows / COARSE_FACTOR) * math.ceil(cols / COARSE_FACTOR)),
+            math.ceil(cols / COARSE_FACTOR),
+        )
+        values = cls._classify(polygons, tree, x0, y0, coarse, coarse_x, coarse_y)
+
+        for cx, cy, value in zip(coarse_x, coarse_y, values):
+            if value != BORDER:
+                cells[
+                    cy * COARSE_FACTOR:(cy + 1) * COARSE_FACTOR,
+                    cx * COARSE_FACTOR:(cx + 1) * COARSE_FACTOR,
+                ] = value
+
+        border = values == BORDER
+        offsets_y, offsets_x = np.divmod(np.arange(COARSE_FACTOR**2), COARSE_FACTOR)
+        fine_x = (coarse_x[border, None] * COARSE_FACTOR + offsets_x).ravel()
+        fine_y = (coarse_y[border, None] * COARSE_FACTOR + offsets_y).ravel()
+        inside = (fine_x < cols) & (fine_y < rows)
+        fine_x, fine_y = fine_x[inside], fine_y[inside]
+        cells[fine_y, fine_x] = cls._classify(
+            polygons, tree, x0, y0, cell_size, fine_x, fine_y
+        )
+        return cls(cells, (float(x0), float(y0)), cell_size)
+
+    @staticmethod
+    def _classify(polygons, tree, x0, y0, size, xs, ys) -> np.ndarray:
+        """Значения ячеек с номерами xs, ys для сетки с шагом size"""
+        # Ячейки чуть расширены, чтобы погрешность при вычислении номера
+        # ячейки точки не выводила ее за проверенную область
+        eps = size * 1e-6
+        boxes = shapely.box(
+            x0 + xs * size - eps,
+            y0 + ys * size - eps,
+            x0 + (xs + 1) * size + eps,
+            y0 + (ys + 1) * size + eps,
+        )
+        missing = len(polygons)
+        first = np.full(len(boxes), missing)
+        box_idx, polygon_idx = tree.query(boxes, predicate="intersects")
+        np.minimum.at(first, box_idx, polygon_idx)
+
+        values = np.full(len(boxes), OUTSIDE)
+        touched = np.flatnonzero(first < missing)
+        inside = shapely.contains_properly(polygons[first[touched]], boxes[touched])
+        values[touched] = np.where(inside, first[touched], BORDER)
+        return values
+
+    def lookup(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Значения ячеек для точек; вне сетки и для NaN - OUTSIDE"""
+        with np.errstate(invalid="ignore"):
+            cols = np.floor((xs - self.x0) / self.cell_size)
+            rows = np.floor((ys - self.y0) / self.cell_size)
+            valid = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        values = np.full(len(xs), OUTSIDE, dtype=np.int32)
+        values[valid] = self.cells[rows[valid].astype(np.intp), cols[valid].astype(np.intp)]
+        return values
+
+    def lookup_one(self, x: float, y: float) -> int:
+        col = (x - self.x0) / self.cell_size
+        row = (y - self.y0) / self.cell_size
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return int(self.cells[int(row), int(col)])
+        return OUTSIDE
+
+    def save(self, path: str, meta: dict) -> None:
+        """
+        Сохраняет сетку в path (.npy) и описание в path.json. Файлы пишутся
+        во временные и переименовываются, чтобы параллельные процессы
+        не прочитали недописанную сетку.
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        meta = dict(
+            meta,
+            version=GRID_FORMAT_VERSION,
+            origin=[self.x0, self.y0],
+            cell_size=self.cell_size,
+            shape=list(self.cells.shape),
+        )
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".npy", delete=False) as f:
+            np.save(f, self.cells)
+        os.replace(f.name, path)
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+            json.dump(meta, f)
+        os.replace(f.name, path + ".json")
+
+    @classmethod
+    def load(cls, path: str, meta: dict) -> Optional["RegionGrid"]:
+        """
+        Открывает сохраненную сетку через mmap. None, если файла нет или он
+        построен для другой версии формата или других полигонов (meta).
+        """
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") != GRID_FORMAT_VERSION or any(
+                saved.get(key) != value for key, value in meta.items()
+            ):
+                return None
+            cells = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if list(cells.shape) != saved["shape"]:
+            return None
+        return cls(cells, tuple(saved["origin"]), saved["cell_size"])
+
+
+def load_or_build_grid(
+    polygons: np.ndarray,
+    tree: STRtree,
+    source_hash: str,
+    cell_size: float,
+    cache_dir: str,
+) -> RegionGrid:
+    """
+    Сетка для полигонов из файла с хешем source_hash: из кеша, если она
+    уже построена, иначе строится и сохраняется в cache_dir.
+    """
+    meta = {"source_hash": source_hash, "cell_size": cell_size, "polygons": len(polygons)}
+    path = os.path.join(cache_dir, f"region_grid_{source_hash[:16]}_{cell_size:g}.npy")
+    grid = RegionGrid.load(path, meta)
+    if grid is not None:
+        return grid
+
+    logger.info("Построение сетки регионов с шагом %s", cell_size)
+    grid = RegionGrid.build(polygons, tree, cell_size)
+    try:
+        grid.save(path, meta)
+        logger.info("Сетка регионов %s сохранена в %s", grid.cells.shape, path)
+    except OSError as e:
+        logger.warning("Не удалось сохранить сетку регионов в %s: %s", path, e)
+    return grid
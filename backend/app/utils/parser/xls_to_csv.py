@@ -1,19 +1,152 @@
+import csv
+from datetime import date, datetime
 import tempfile
+from typing import Iterable, Iterator, Tuple
 
+import openpyxl
 import pandas as pd
 
+from backend.app.config import XLSX_READER
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # pragma: no cover - зависит от окружения
+    CalamineWorkbook = None
+
+# Строки, которые pandas.read_excel по умолчанию считает пустыми значениями
+NA_VALUES = frozenset(
+    [
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+    ]
+)
+
+
+def cell_to_str(value) -> str:
+    """Значение ячейки в том виде, в каком его дает pandas.read_excel(dtype=str)"""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return "" if value in NA_VALUES else value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return str(datetime(value.year, value.month, value.day))
+    return str(value)
+
+
+def _header_to_str(values: Iterable) -> list:
+    """Названия колонок как у pandas: пустые - Unnamed: N, повторы - с суффиксом .N"""
+    header, seen = [], {}
+    for index, value in enumerate(values):
+        if value is None or value == "":
+            name = f"Unnamed: {index}"
+        elif isinstance(value, str):
+            name = value
+        else:
+            name = cell_to_str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def _rows_to_str(rows: Iterator) -> Iterator[list]:
+    """
+    Строки листа как у pandas.read_excel(dtype=str): заголовок, затем данные
+    шириной в заголовок. Пустые строки в конце листа отбрасываются, поэтому
+    пустые строки придерживаются до первой непустой.
+    """
+    header = _header_to_str(next(rows, ()))
+    yield header
+    width = len(header)
+    empty = 0
+    for values in rows:
+        row = [cell_to_str(value) for value in values[:width]]
+        if not any(row):
+            empty += 1
+            continue
+        for _ in range(empty):
+            yield [""] * width
+        empty = 0
+        yield row + [""] * (width - len(row))
+
+
+def _read_calamine(xlsx_path) -> Tuple[int, Iterator[list]]:
+    sheet = CalamineWorkbook.from_path(xlsx_path).get_sheet_by_index(0)
+    return sheet.height, _rows_to_str(iter(sheet.iter_rows()))
 
-def convert_xls_to_csv(xlsx_path):
-    """Конвертация xls/xlsx файла в csv."""
 
-    xlsx = pd.ExcelFile(xlsx_path)
-    sheet_names = xlsx.sheet_names
+def _read_openpyxl(xlsx_path) -> Tuple[int, Iterator[list]]:
+    workbook = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    sheet = workbook.worksheets[0]
 
-    df = pd.read_excel(xlsx_path, sheet_name=sheet_names[0], dtype=str)
+    def rows() -> Iterator[list]:
+        try:
+            yield from _rows_to_str(sheet.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+    return sheet.max_row or 0, rows()
+
+
+def _read_pandas(xlsx_path) -> Tuple[int, Iterator[list]]:
+    df = pd.read_excel(xlsx_path, sheet_name=0, dtype=str)
+
+    def rows() -> Iterator[list]:
+        yield [str(column) for column in df.columns]
+        for values in df.itertuples(index=False, name=None):
+            yield ["" if pd.isna(value) else value for value in values]
+
+    return len(df) + 1, rows()
+
+
+def read_sheet_rows(xlsx_path) -> Tuple[int, Iterator[list]]:
+    """
+    Строки первого листа xls/xlsx файла: заголовок, затем данные.
+    Значения - строки, пустые ячейки - "", как у pandas.read_excel(dtype=str).
+    Возвращает (оценка числа строк с заголовком, итератор строк).
+
+    xlsx читается openpyxl в режиме read_only построчно, без загрузки листа
+    в память, xls - через pandas. С XLSX_READER=calamine и установленным
+    python-calamine оба формата читаются им: в разы быстрее, но лист
+    целиком загружается в память.
+    """
+    if XLSX_READER == "calamine" and CalamineWorkbook is not None:
+        return _read_calamine(xlsx_path)
+    if str(xlsx_path).lower().endswith(".xls"):
+        return _read_pandas(xlsx_path)
+    return _read_openpyxl(xlsx_path)
+
+
+def convert_xls_to_csv(xlsx_path):
+    """Конвертация xls/xlsx файла в csv."""
 
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        csv_file_name = f"{tmpdirname}.csv"
+    _, rows = read_sheet_rows(xlsx_path)
 
-    df.to_csv(csv_file_name, encoding="utf-8-sig", index=False, sep=";")
+    with tempfile.NamedTemporaryFile(
+        "w", newline="", encoding="utf-8-sig", suffix=".csv", delete=False
+    ) as csv_file:
+        csv.writer(csv_file, delimiter=";", lineterminator="\n").writerows(rows)
 
-    return csv_file_name
+    return csv_file.name
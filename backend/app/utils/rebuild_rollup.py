@@ -0,0 +1,26 @@
+"""
+Полный пересчет сводной таблицы flight_rollups.
+
+Запуск из корня проекта:
+    python -m backend.app.utils.rebuild_rollup
+"""
+import asyncio
+
+from backend.app.database import AsyncSessionLocal, async_engine, create_tables
+from backend.app.logging import logger
+from backend.app.services.export_cache import bump_dataset_version
+from backend.app.services.rollup_service import rebuild_rollup
+
+
+async def main():
+    await create_tables()
+    async with AsyncSessionLocal() as session:
+        await rebuild_rollup(session)
+        await session.commit()
+    bump_dataset_version()
+    await async_engine.dispose()
+    logger.info("Сводная таблица полетов пересчитана")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import hashlib
+import os
+import tempfile
+from typing import Tuple
+
+from fastapi import UploadFile
+
+from backend.app.config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES
+
+
+class UploadTooLargeError(Exception):
+    """Загружаемый файл больше UPLOAD_MAX_BYTES"""
+
+
+async def save_upload(
+    file: UploadFile,
+    suffix: str,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Tuple[str, int, str]:
+    """
+    Копирует загруженный файл во временный файл кусками по chunk_size.
+
+    В памяти одновременно находится только один кусок. По ходу копирования
+    считается SHA-256 для поиска повторных загрузок и проверяется размер:
+    при превышении max_bytes файл удаляется и бросается UploadTooLargeError.
+    Возвращает путь, размер в байтах и SHA-256.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        tmp_path = tmp_file.name
+        try:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"Файл больше допустимых {max_bytes / 1024 / 1024:.0f} MB"
+                    )
+                digest.update(chunk)
+                tmp_file.write(chunk)
+        except BaseException:
+            tmp_file.close()
+            os.unlink(tmp_path)
+            raise
+    return tmp_path, size, digest.hexdigest()
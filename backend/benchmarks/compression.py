@@ -0,0 +1,70 @@
+"""
+Сравнение кодеков выгрузки полетов по скорости и степени сжатия.
+
+Запуск из корня проекта:
+    python -m backend.benchmarks.compression --rows 500000
+"""
+import argparse
+import gzip
+from time import perf_counter
+
+from backend.app.services.flight_service import FlightService
+from backend.app.utils.compression import CODECS, gzip_parallel
+from backend.benchmarks.datasets import make_flight_rows
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "zstd": [1, 3, 9, 19],
+    "br": [1, 5, 9],
+}
+
+
+def measure(compress, data: bytes, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        started = perf_counter()
+        compressed = compress(data)
+        best = min(best, perf_counter() - started)
+    return best, len(compressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    data = FlightService._format_csv_chunk(make_flight_rows(args.rows), with_header=True)
+    size_mb = len(data) / 1024 / 1024
+    print(f"CSV: {args.rows} строк, {size_mb:.1f} MB")
+    print(f"{'кодек':<14}{'уровень':>8}{'MB/s':>10}{'ratio':>8}{'размер, MB':>12}")
+
+    cases = []
+    for level in LEVELS["gzip"]:
+        cases.append(("gzip", level, lambda d, lv=level: gzip.compress(d, lv)))
+        cases.append(
+            (
+                f"gzip x{args.threads}",
+                level,
+                lambda d, lv=level: gzip_parallel(d, lv, threads=args.threads),
+            )
+        )
+    for name in ("zstd", "br"):
+        codec = CODECS.get(name)
+        if codec is None:
+            print(f"{name:<14} не установлен, пропущен")
+            continue
+        for level in LEVELS[name]:
+            cases.append((name, level, lambda d, c=codec, lv=level: c.compress(d, lv)))
+
+    for name, level, compress in cases:
+        elapsed, compressed_size = measure(compress, data, args.repeat)
+        print(
+            f"{name:<14}{level:>8}{size_mb / elapsed:>10.1f}"
+            f"{len(data) / compressed_size:>8.2f}{compressed_size / 1024 / 1024:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Скорость форматирования CSV выгрузки: прежнее построчное (format_row) и
+пакетное по колонкам (utils.csv_format). Проверяет, что байты совпадают.
+
+Запуск из корня проекта:
+    python -m backend.benchmarks.csv_format --rows 500000
+"""
+import argparse
+import csv
+from datetime import date, time, timedelta
+from io import StringIO
+from time import perf_counter
+from typing import Any, Optional
+
+from backend.app.services.flight_service import FlightService
+from backend.app.utils.csv_format import write_csv
+from backend.benchmarks.datasets import make_flight_rows
+
+
+def _format_csv_value(value: Any) -> str:
+    if value is None:
+        return "Нет данных"
+    return str(value)
+
+
+def _format_coordinates(lat: Optional[float], lon: Optional[float]) -> str:
+    if lat is None or lon is None:
+        return "Нет данных"
+    return f"{lat} {lon}"
+
+
+def _format_date(flight_date: Optional[date]) -> str:
+    if not flight_date:
+        return "Нет данных"
+    return flight_date.strftime("%d.%m.%y")
+
+
+def _format_time(time_obj: Optional[time]) -> str:
+    if not time_obj:
+        return "Нет данных"
+    return time_obj.strftime("%H:%M")
+
+
+def _format_duration(duration: Optional[timedelta]) -> str:
+    if not duration:
+        return "Нет данных"
+    total_seconds = int(duration.total_seconds())
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    return f"{hours:01d}:{minutes:02d}"
+
+
+def format_row(flight) -> list:
+    """Прежнее форматирование строки результата запроса в строку CSV"""
+    takeoff_coords = _format_coordinates(
+        float(flight.takeoff_lat) if flight.takeoff_lat else None,
+        float(flight.takeoff_lon) if flight.takeoff_lon else None,
+    )
+    landing_coords = _format_coordinates(
+        float(flight.landing_lat) if flight.landing_lat else None,
+        float(flight.landing_lon) if flight.landing_lon else None,
+    )
+    return [
+        _format_csv_value(flight.flight_id),
+        _format_csv_value(flight.drone_type),
+        takeoff_coords,
+        landing_coords,
+        _format_date(flight.flight_date),
+        _format_time(flight.takeoff_time),
+        _format_time(flight.landing_time),
+        _format_duration(flight.flight_duration),
+        _format_csv_value(flight.region_name),
+    ]
+
+
+def format_per_row(rows) -> str:
+    csv_buffer = StringIO()
+    writer = csv.writer(csv_buffer)
+    writer.writerow(FlightService.CSV_HEADER)
+    for flight in rows:
+        writer.writerow(format_row(flight))
+    return csv_buffer.getvalue()
+
+
+def format_batched(rows) -> str:
+    return write_csv(rows, FlightService.CSV_HEADER)
+
+
+def measure(format_rows, rows, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        started = perf_counter()
+        text = format_rows(rows)
+        best = min(best, perf_counter() - started)
+    return best, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_flight_rows(args.rows)
+    baseline, expected = measure(format_per_row, rows, args.repeat)
+    batched, actual = measure(format_batched, rows, args.repeat)
+
+    if actual != expected:
+        raise SystemExit("Пакетный формат отличается от построчного")
+
+    print(f"CSV: {args.rows} строк, вывод совпадает побайтово")
+    print(f"{'способ':<12}{'строк/с':>14}{'время, с':>10}")
+    print(f"{'построчно':<12}{args.rows / baseline:>14,.0f}{baseline:>10.2f}")
+    print(f"{'пакетно':<12}{args.rows / batched:>14,.0f}{batched:>10.2f}")
+    print(f"ускорение: x{baseline / batched:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Синтетические, но похожие на реальные данные о полетах для бенчмарков."""
+from collections import namedtuple
+from datetime import date, time, timedelta
+import json
+import os
+import random
+
+from backend.app.config import STATIC_DIR
+
+FlightRow = namedtuple(
+    "FlightRow",
+    [
+        "flight_id",
+        "drone_type",
+        "takeoff_lat",
+        "takeoff_lon",
+        "landing_lat",
+        "landing_lon",
+        "flight_date",
+        "takeoff_time",
+        "landing_time",
+        "flight_duration",
+        "region_name",
+    ],
+)
+
+DRONE_TYPES = ["BLA", "AER", "SHAR", "GYRO", "HELI", "Неизвестный"]
+
+
+def load_region_names() -> list:
+    """Названия регионов из статического GeoJSON"""
+    polygon_path = os.path.join(STATIC_DIR, "russia_regions_id.geo.json")
+    with open(polygon_path, "r", encoding="utf-8-sig") as f:
+        data = json.load(f)
+    return [feature["properties"]["region"] for feature in data["features"]]
+
+
+def make_flight_rows(count: int, sites: int = 3000, seed: int = 42) -> list:
+    """
+    Генерирует строки в формате результата FlightService.get_data.
+
+    Полеты распределены по ограниченному числу площадок взлета,
+    как в реальных выгрузках, около 3% полей пустые.
+    """
+    rnd = random.Random(seed)
+    regions = load_region_names()
+    launch_sites = [
+        (
+            round(rnd.uniform(43.0, 69.0), 2),
+            round(rnd.uniform(28.0, 135.0), 2),
+            rnd.choice(regions),
+        )
+        for _ in range(sites)
+    ]
+    start = date(2023, 1, 1)
+
+    def maybe(value):
+        return None if rnd.random() < 0.03 else value
+
+    rows = []
+    for index in range(count):
+        lat, lon, region = rnd.choice(launch_sites)
+        minutes = rnd.randint(5, 600)
+        takeoff = time(rnd.randint(0, 23), rnd.randint(0, 59))
+        landing_minutes = (takeoff.hour * 60 + takeoff.minute + minutes) % (24 * 60)
+        rows.append(
+            FlightRow(
+                flight_id=str(7000000 + index),
+                drone_type=maybe(rnd.choice(DRONE_TYPES)),
+                takeoff_lat=maybe(lat),
+                takeoff_lon=maybe(lon),
+                landing_lat=maybe(lat),
+                landing_lon=maybe(lon),
+                flight_date=maybe(start + timedelta(days=index * 1000 // count)),
+                takeoff_time=maybe(takeoff),
+                landing_time=maybe(time(landing_minutes // 60, landing_minutes % 60)),
+                flight_duration=maybe(timedelta(minutes=minutes)),
+                region_name=region,
+            )
+        )
+    return rows
+
+
+def _dms(value: float, width: int, positive: str, negative: str) -> str:
+    direction = positive if value >= 0 else negative
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = int(((value - degrees) * 60 - minutes) * 60)
+    return f"{degrees:0{width}d}{minutes:02d}{seconds:02d}{direction}"
+
+
+def make_flight_messages(count: int, seed: int = 42) -> list:
+    """
+    Генерирует строки исходного файла (регион;FPL;IDEP;IARR),
+    которые разбирает FlightDataParser.
+
+    Примерно в трети строк нет DEP/DEST в плане полета, и координаты берутся
+    из ADEPZ/ADARRZ или из текста RMK, часть времен есть только в IDEP/IARR.
+    """
+    rnd = random.Random(seed)
+    regions = load_region_names()
+    rows = []
+    for index in range(count):
+        sid = 7700000000 + index
+        lat, lon = rnd.uniform(43.0, 69.0), rnd.uniform(28.0, 135.0)
+        coords = _dms(lat, 2, "N", "S") + _dms(lon, 3, "E", "W")
+        short_coords = coords[:4] + coords[6] + coords[7:12] + coords[-1]
+        day = date(2025, 1, 1) + timedelta(days=rnd.randint(0, 364))
+        dof = day.strftime("%y%m%d")
+        takeoff = f"{rnd.randint(0, 23):02d}{rnd.randint(0, 59):02d}"
+        landing = f"{rnd.randint(0, 23):02d}{rnd.randint(0, 59):02d}"
+        typ = rnd.choice(DRONE_TYPES[:-1])
+        variant = rnd.randint(0, 2)
+
+        if variant == 0:
+            flight_data = (
+                f"(SHR-ZZZZZ -ZZZZ{takeoff} -M0000/M0005 /ZONA R0,5 {short_coords}/ "
+                f"-ZZZZ{landing} -DEP/{short_coords} DEST/{short_coords} DOF/{dof} "
+                f"OPR/ИВАНОВ ИВАН REG/0{index % 9}K{index % 7}01 "
+                f"TYP/{typ} RMK/ПОЛЕТ НАД ГОРОДОМ SID/{sid})"
+            )
+        elif variant == 1:
+            flight_data = (
+                f"(SHR-ZZZZZ -ZZZZ{takeoff} -M0000/M0010 -ZZZZ{landing} "
+                f"DOF/{dof} TYP/{typ} RMK/WR{short_coords} {coords} "
+                f"ОБЕСПЕЧЕНИЕ СЪЕМКИ SID/{sid})"
+            )
+        else:
+            flight_data = f"(SHR-ZZZZZ -M0000/M0003 DOF/{dof} TYP/{typ} REG/RF{index % 1000})"
+
+        idep_data = (
+            f"-TITLE IDEP -SID {sid} -ADD {dof} -ATD {takeoff} -ADEP ZZZZ "
+            f"-ADEPZ {short_coords}"
+        )
+        iarr_data = (
+            f"-TITLE IARR -SID {sid} -ADA {dof} -ATA {landing} -ADARR ZZZZ "
+            f"-ADARRZ {short_coords}"
+        )
+        if rnd.random() < 0.2:
+            idep_data = iarr_data = ""
+        rows.append((rnd.choice(regions), flight_data, idep_data, iarr_data))
+    return rows
@@ -0,0 +1,218 @@
+"""
+Скорость разбора одного полета: прежний разбор в словарь
+(ReferenceFlightParser.parse_single_flight) и разбор в FlightRecord
+заранее скомпилированными выражениями (FlightDataParser.parse_flight_record).
+
+Перед замером сравнивает результаты на синтетическом корпусе и на
+случайно искаженных сообщениях (--fuzz).
+
+Запуск из корня проекта:
+    python -m backend.benchmarks.flight_record --rows 200000 --fuzz 200000
+"""
+import argparse
+import random
+import re
+from time import perf_counter
+from typing import Dict
+
+from backend.app.utils.parser.ready_parser_2025 import FlightDataParser
+from backend.benchmarks.datasets import make_flight_messages
+
+FRAGMENTS = [
+    "SID/",
+    "-SID ",
+    "REG/",
+    "-REG ",
+    "TYP/",
+    "DOF/",
+    "ADD ",
+    "DEP/",
+    "DEST/",
+    "RMK/",
+    "-ZZZZ",
+    "-ADEPZ ",
+    "-ADARRZ ",
+    "-ATD ",
+    "-ATA ",
+    " ",
+    "\n",
+    "/",
+    "-",
+    "0",
+    "1234",
+    "250201",
+    "5957N02905E",
+    "595723N0290512E",
+    "5957S02905W",
+    "ZZZZ",
+    "-SID",
+    "-ATD",
+    "N",
+    "E",
+    "ABC",
+]
+
+
+class ReferenceFlightParser(FlightDataParser):
+    """Прежний разбор отдельным поиском каждого поля"""
+
+    def parse_single_flight(
+        self, region: str, flight_data: str, idep_data: str = "", iarr_data: str = ""
+    ) -> Dict:
+        all_data = f"{flight_data} {idep_data} {iarr_data}"
+
+        flight_id = self.extract_flight_id(all_data)
+
+        aircraft_type = self.extract_aircraft_type(flight_data)
+
+        flight_date = self.extract_date(flight_data) or self.extract_date(idep_data)
+
+        dep_coords = None
+        dep_match = re.search(r"DEP/([^\s]+)", flight_data)
+        if dep_match:
+            dep_coords = self.extract_coordinates(dep_match.group(1))
+
+        if not dep_coords:
+            adepz_match = re.search(r"-ADEPZ ([^\n]+)", idep_data)
+            if adepz_match:
+                dep_coords = self.extract_coordinates(adepz_match.group(1))
+
+        dest_coords = None
+        dest_match = re.search(r"DEST/([^\s]+)", flight_data)
+        if dest_match:
+            dest_coords = self.extract_coordinates(dest_match.group(1))
+
+        if not dest_coords:
+            adarrz_match = re.search(r"-ADARRZ ([^\n]+)", iarr_data)
+            if adarrz_match:
+                dest_coords = self.extract_coordinates(adarrz_match.group(1))
+
+        if not dep_coords or not dest_coords:
+            rmk_match = re.search(r"RMK/(.+?)(?:SID/|$)", flight_data, re.DOTALL)
+            rmk_coordinates = []
+            if rmk_match:
+                rmk_text = rmk_match.group(1)
+                rmk_coordinates = self.extract_coordinates_from_text(rmk_text)
+
+            if not rmk_coordinates:
+                all_coordinates = self.extract_coordinates_from_text(flight_data)
+            else:
+                all_coordinates = rmk_coordinates
+
+            if all_coordinates:
+                if not dep_coords and all_coordinates:
+                    dep_coords = all_coordinates[0]
+
+                if not dest_coords and len(all_coordinates) > 1:
+                    dest_coords = all_coordinates[-1]
+                elif not dest_coords and len(all_coordinates) == 1:
+                    dest_coords = all_coordinates[0]
+
+        if dep_coords and not dest_coords:
+            dest_coords = dep_coords
+        elif dest_coords and not dep_coords:
+            dep_coords = dest_coords
+
+        dep_time = None
+        arr_time = None
+
+        zzzz_matches = re.findall(r"-ZZZZ(\d{4})", flight_data)
+        if zzzz_matches:
+            dep_time = self.extract_time(zzzz_matches[0])  # Первое время - взлет
+
+        if len(zzzz_matches) >= 2:
+            arr_time = self.extract_time(zzzz_matches[-1])  # Последнее время - посадка
+
+        if not dep_time:
+            atd_match = re.search(r"-ATD (\d{4})", idep_data)
+            if atd_match:
+                dep_time = self.extract_time(atd_match.group(1))
+
+        if not arr_time:
+            ata_match = re.search(r"-ATA (\d{4})", iarr_data)
+            if ata_match:
+                arr_time = self.extract_time(ata_match.group(1))
+
+        return {
+            "ID полета": flight_id or "Нет данных",
+            "Тип БПЛА": aircraft_type,
+            "Координаты взлета": dep_coords or "Нет данных",
+            "Координаты посадки": dest_coords or "Нет данных",
+            "Дата (DD.MM.YY)": flight_date or "Нет данных",
+            "Время взлета (UTC)": dep_time or "Нет данных",
+            "Время посадки (UTC)": arr_time or "Нет данных",
+            "Регион": region,
+        }
+
+
+def mutate(rnd: random.Random, text: str) -> str:
+    """Вставляет, удаляет и переставляет куски сообщения"""
+    for _ in range(rnd.randint(1, 6)):
+        position = rnd.randint(0, len(text))
+        action = rnd.random()
+        if action < 0.6:
+            text = text[:position] + rnd.choice(FRAGMENTS) + text[position:]
+        elif action < 0.85:
+            text = text[:position] + text[position + rnd.randint(1, 8):]
+        else:
+            text = text[position:] + " " + text[:position]
+    return text
+
+
+def fuzz_messages(rows: list, count: int, seed: int = 7) -> list:
+    rnd = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        region, *parts = rnd.choice(rows)
+        parts = [mutate(rnd, part) if rnd.random() < 0.7 else part for part in parts]
+        messages.append((region, *parts))
+    return messages
+
+
+def check(
+    parser: FlightDataParser, reference: ReferenceFlightParser, messages: list, name: str
+) -> None:
+    for message in messages:
+        expected = reference.parse_single_flight(*message)
+        actual = parser.parse_single_flight(*message)
+        if actual != expected:
+            raise SystemExit(f"{name}: результат отличается для {message!r}")
+
+
+def measure(parse, messages: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = perf_counter()
+        for message in messages:
+            parse(*message)
+        best = min(best, perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--fuzz", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    flight_parser = FlightDataParser()
+    reference = ReferenceFlightParser()
+    messages = make_flight_messages(args.rows)
+    check(flight_parser, reference, messages, "корпус")
+    check(flight_parser, reference, fuzz_messages(messages, args.fuzz), "fuzz")
+    print(
+        f"Разбор: {args.rows} сообщений и {args.fuzz} искаженных, "
+        "результаты совпадают"
+    )
+
+    baseline = measure(reference.parse_single_flight, messages, args.repeat)
+    record = measure(flight_parser.parse_flight_record, messages, args.repeat)
+    print(f"{'способ':<16}{'строк/с':>14}{'время, с':>10}")
+    print(f"{'прежний':<16}{args.rows / baseline:>14,.0f}{baseline:>10.2f}")
+    print(f"{'FlightRecord':<16}{args.rows / record:>14,.0f}{record:>10.2f}")
+    print(f"ускорение: x{baseline / record:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Скорость разбора исходных сообщений о полетах (FlightDataParser.parse_csv_file)
+последовательно и в пуле процессов. Проверяет, что файлы результата совпадают.
+
+Запуск из корня проекта:
+    python -m backend.benchmarks.parser --rows 200000 --workers 1 4 16
+"""
+import argparse
+import csv
+import os
+import tempfile
+from time import perf_counter
+
+from backend.app.utils.parser.ready_parser_2025 import FlightDataParser
+from backend.benchmarks.datasets import make_flight_messages
+
+
+def write_source(rows, path: str) -> None:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        csv.writer(f, delimiter=";").writerows(rows)
+
+
+def measure(source_path: str, workers: int) -> tuple:
+    parser = FlightDataParser()
+    started = perf_counter()
+    result_path = parser.parse_csv_file(source_path, workers=workers)
+    elapsed = perf_counter() - started
+    with open(result_path, "rb") as f:
+        content = f.read()
+    os.unlink(result_path)
+    return elapsed, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_path = os.path.join(tmpdir, "source.csv")
+        write_source(make_flight_messages(args.rows), source_path)
+
+        baseline, expected = measure(source_path, 1)
+        print(f"Разбор: {args.rows} строк")
+        print(f"{'процессов':<12}{'строк/с':>14}{'время, с':>10}{'ускорение':>12}")
+        print(f"{1:<12}{args.rows / baseline:>14,.0f}{baseline:>10.2f}{'x1.0':>12}")
+        for workers in args.workers:
+            if workers <= 1:
+                continue
+            elapsed, actual = measure(source_path, workers)
+            if actual != expected:
+                raise SystemExit(f"Результат при {workers} процессах отличается")
+            speedup = f"x{baseline / elapsed:.1f}"
+            print(
+                f"{workers:<12}{args.rows / elapsed:>14,.0f}{elapsed:>10.2f}{speedup:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Скорость поиска региона по координатам (AdvancedRegionFinder): прежний
+перебор всех полигонов, STRtree по одной точке и пакетный поиск
+find_regions_russian_priority. Проверяет, что регионы совпадают.
+Отдельно - пакетный поиск с LRU-кешем координат на точках с повторяющихся
+мест взлета (координаты округлены до сотых, как у парсера).
+
+Запуск из корня проекта:
+    python -m backend.benchmarks.region_finder --points 20000 --batch-points 500000 --sites 3000
+"""
+import argparse
+from itertools import islice
+import json
+import os
+import random
+import tempfile
+from time import perf_counter
+
+import numpy as np
+from shapely.geometry import Point
+
+from backend.app.config import STATIC_DIR
+from backend.app.constants import RUSSIA_FULL_POLYGON
+from backend.app.utils.parser.check_coord_final import (
+    REGION_BATCH_SIZE,
+    AdvancedRegionFinder,
+)
+
+
+class LinearRegionFinder(AdvancedRegionFinder):
+    """Прежний поиск: перебор bbox регионов и расстояний до всех полигонов"""
+
+    def find_region_exact(self, lat, lon):
+        point = Point(lon, lat)
+        for name, data in self.region_polygons.items():
+            if self.point_in_bbox(point, data["bbox"]):
+                for polygon in data["polygons"]:
+                    if polygon.contains(point):
+                        return name
+        return None
+
+    def nearest_region(self, lat, lon):
+        point = Point(lon, lat)
+        best_region = None
+        min_distance = float("inf")
+        for name, data in self.region_polygons.items():
+            for polygon in data["polygons"]:
+                distance = point.distance(polygon)
+                if distance < min_distance:
+                    min_distance = distance
+                    best_region = name
+        return best_region, min_distance
+
+    def find_region_proximity(self, lat, lon, max_distance=1.0):
+        best_region, min_distance = self.nearest_region(lat, lon)
+        return best_region if min_distance < max_distance else None
+
+    def find_region_russian_priority(self, lat, lon):
+        for method in [
+            self.find_region_exact,
+            self.find_region_border_zone,
+            lambda lat, lon: self.find_region_proximity(lat, lon, 0.5),
+            self.find_region_extended_heuristics,
+            lambda lat, lon: self.find_region_proximity(lat, lon, 1.0),
+        ]:
+            result = method(lat, lon)
+            if result:
+                return result
+        best_region, _ = self.nearest_region(lat, lon)
+        return best_region if best_region else "Регион не найден"
+
+
+def geojson_path(tmpdir: str) -> str:
+    """Полигоны регионов; если полного файла нет, - копия файла с id без BOM"""
+    path = os.path.join(STATIC_DIR, RUSSIA_FULL_POLYGON)
+    if os.path.exists(path):
+        return path
+    with open(os.path.join(STATIC_DIR, "russia_regions_id.geo.json"), encoding="utf-8-sig") as f:
+        data = json.load(f)
+    path = os.path.join(tmpdir, "regions.geo.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return path
+
+
+def make_points(finder: AdvancedRegionFinder, count: int, seed: int = 42) -> list:
+    """Случайные точки по России и вокруг нее, часть - на вершинах полигонов"""
+    rnd = random.Random(seed)
+    vertices = [
+        coord for polygon in finder.polygons for coord in polygon.exterior.coords
+    ]
+    points = []
+    for _ in range(count):
+        if rnd.random() < 0.05:
+            lon, lat = rnd.choice(vertices)
+        else:
+            lat, lon = rnd.uniform(40.0, 78.0), rnd.uniform(18.0, 180.0)
+        points.append((lat, lon))
+    return points
+
+
+def measure(finder: AdvancedRegionFinder, points: list) -> tuple:
+    started = perf_counter()
+    regions = [finder.find_region_russian_priority(lat, lon) for lat, lon in points]
+    return perf_counter() - started, regions
+
+
+def measure_batch(finder: AdvancedRegionFinder, points: list) -> tuple:
+    lats, lons = zip(*points)
+    started = perf_counter()
+    regions = finder.find_regions_russian_priority(lats, lons)
+    return perf_counter() - started, regions.tolist()
+
+
+def measure_batches(finder: AdvancedRegionFinder, points: list) -> tuple:
+    """Поиск пачками, как в assign_regions"""
+    started = perf_counter()
+    regions = []
+    for start in range(0, len(points), REGION_BATCH_SIZE):
+        lats, lons = zip(*points[start:start + REGION_BATCH_SIZE])
+        regions.extend(finder.find_regions_russian_priority(lats, lons).tolist())
+    return perf_counter() - started, regions
+
+
+def print_row(name: str, points: int, elapsed: float, baseline: float) -> None:
+    speedup = f"x{baseline / elapsed:.1f}"
+    print(f"{name:<12}{points / elapsed:>14,.0f}{elapsed:>10.2f}{speedup:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=5_000)
+    parser.add_argument("--batch-points", type=int, default=100_000)
+    parser.add_argument("--sites", type=int, default=3_000)
+    parser.add_argument(
+        "--grid-cell-size", type=float, default=None,
+        help="шаг сетки регионов, 0 - без сетки (по умолчанию REGION_GRID_CELL_SIZE)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = geojson_path(tmpdir)
+        started = perf_counter()
+        finder = AdvancedRegionFinder(path, args.grid_cell_size, memo_size=0)
+        print(f"Построение индекса: {perf_counter() - started:.2f} с, полигонов {len(finder.polygons)}")
+        linear = LinearRegionFinder(path, grid_cell_size=0, memo_size=0)
+        memo_finder = AdvancedRegionFinder(path, args.grid_cell_size)
+
+    points = make_points(finder, args.points)
+    baseline, expected = measure(linear, points)
+    elapsed, actual = measure(finder, points)
+    batch_elapsed, batch_actual = measure_batch(finder, points)
+    for name, regions in [("STRtree", actual), ("пакетный", batch_actual)]:
+        mismatches = sum(a != b for a, b in zip(expected, regions))
+        if mismatches:
+            raise SystemExit(f"{name}: регион отличается для {mismatches} точек")
+
+    print(f"Поиск региона: {args.points} точек")
+    print(f"{'способ':<12}{'точек/с':>14}{'время, с':>10}{'ускорение':>12}")
+    print_row("перебор", args.points, baseline, baseline)
+    print_row("STRtree", args.points, elapsed, baseline)
+    print_row("пакетный", args.points, batch_elapsed, baseline)
+
+    # Полеты в основном внутри регионов: 97% точек внутри полигонов
+    points = make_points(finder, args.batch_points * 10, seed=7)
+    lats, lons = (np.array(values) for values in zip(*points))
+    inside = finder.contained_polygons(lats, lons) >= 0
+    points = [
+        *islice((p for p, flag in zip(points, inside) if flag), args.batch_points * 97 // 100),
+        *islice((p for p, flag in zip(points, inside) if not flag), args.batch_points * 3 // 100),
+    ]
+    elapsed, _ = measure_batch(finder, points)
+    print(f"Пакетный поиск: {len(points)} точек (97% внутри регионов) за {elapsed:.2f} с")
+
+    rnd = random.Random(11)
+    sites = [(round(lat, 2), round(lon, 2)) for lat, lon in rnd.sample(points, args.sites)]
+    points = [rnd.choice(sites) for _ in range(args.batch_points)]
+    elapsed, expected = measure_batches(finder, points)
+    memo_elapsed, actual = measure_batches(memo_finder, points)
+    if actual != expected:
+        raise SystemExit("Регионы с кешем координат отличаются")
+    stats = memo_finder.region_memo_stats()
+    print(
+        f"Повторяющиеся места ({args.sites} мест, {args.batch_points} точек): "
+        f"без кеша {elapsed:.2f} с, с кешем {memo_elapsed:.2f} с, "
+        f"попаданий {stats['hit_rate']:.1%}"
+    )
+
+if __name__ == "__main__":
+    main()
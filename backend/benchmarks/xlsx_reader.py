@@ -0,0 +1,119 @@
+"""
+Скорость чтения листа XLSX: pandas.read_excel (прежний способ), openpyxl в
+режиме read_only и python-calamine (если установлен). Проверяет, что строки
+совпадают с результатом pandas.
+
+Память - прирост пикового RSS (VmHWM, где его нет - ru_maxrss) при проходе
+по строкам, каждый способ в отдельном процессе: tracemalloc не видит память,
+которую выделяют openpyxl/lxml и calamine вне Python.
+
+Запуск из корня проекта:
+    python -m backend.benchmarks.xlsx_reader --rows 100000
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import resource
+import tempfile
+from time import perf_counter
+
+import openpyxl
+
+from backend.app.utils.parser import xls_to_csv
+from backend.benchmarks.datasets import make_flight_messages
+
+HEADER = ("Центр ЕС ОрВД", "SHR", "DEP", "ARR")
+
+
+def write_source(rows, path: str) -> None:
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def measure(reader, path: str) -> tuple:
+    started = perf_counter()
+    _, rows = reader(path)
+    rows = list(rows)
+    elapsed = perf_counter() - started
+    return elapsed, rows
+
+
+READERS = {
+    "pandas": xls_to_csv._read_pandas,
+    "openpyxl": xls_to_csv._read_openpyxl,
+    "calamine": xls_to_csv._read_calamine,
+}
+
+
+def _peak_rss() -> int:
+    """
+    Пиковый RSS процесса в байтах. ru_maxrss в Linux сохраняется при exec
+    и у нового процесса начинается с пика родителя, поэтому, где можно,
+    берется VmHWM.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss в Linux - в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _rss_growth(name: str, path: str) -> int:
+    """Прирост пикового RSS процесса при проходе по строкам без их накопления"""
+    before = _peak_rss()
+    _, rows = READERS[name](path)
+    for _ in rows:
+        pass
+    return _peak_rss() - before
+
+
+def peak_memory(name: str, path: str) -> int:
+    """Прирост пикового RSS в новом процессе, чтобы пики способов не смешивались"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_rss_growth, name, path).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    names = ["pandas", "openpyxl"]
+    if xls_to_csv.CalamineWorkbook is not None:
+        names.append("calamine")
+    else:
+        print("python-calamine не установлен, пропускаем")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_path = os.path.join(tmpdir, "source.xlsx")
+        write_source(make_flight_messages(args.rows), source_path)
+
+        print(f"Чтение XLSX: {args.rows} строк, {os.path.getsize(source_path):,} байт")
+        print(f"{'способ':<12}{'строк/с':>14}{'время, с':>10}{'RSS, МБ':>10}{'ускорение':>12}")
+        baseline = expected = None
+        for name in names:
+            elapsed, rows = measure(READERS[name], source_path)
+            if expected is None:
+                baseline, expected = elapsed, rows
+            elif rows != expected:
+                raise SystemExit(f"Строки {name} отличаются от pandas")
+            peak = peak_memory(name, source_path)
+            speedup = f"x{baseline / elapsed:.1f}"
+            print(
+                f"{name:<12}{args.rows / elapsed:>14,.0f}{elapsed:>10.2f}"
+                f"{peak / 2**20:>10.1f}{speedup:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
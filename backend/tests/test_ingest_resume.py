@@ -0,0 +1,64 @@
+import openpyxl
+
+from backend.app.utils import csv_load
+from backend.app.utils.parser import flight_data_processor
+from backend.app.utils.parser.ready_parser_2025 import FlightDataParser
+
+FPL = "-TYP/BLA SID/{} DOF/250201 DEP/5957N02905E DEST/5957N02905E -ZZZZ0900 -ZZZZ1000"
+
+
+class RegionFinderStub:
+    def finish_region_memo(self, region_stats=None):
+        pass
+
+    def region_memo_stats(self):
+        return {}
+
+
+def write_sheet(path, count):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(("Центр ЕС ОрВД", "SHR", "DEP", "ARR"))
+    for number in range(count):
+        sheet.append(("Москва", FPL.format(number), "", ""))
+    workbook.save(path)
+
+
+def test_flight_rows_resume_skips_rows_before_parsing(tmp_path, monkeypatch):
+    parsed, located = [], []
+    parse_flight_record = FlightDataParser.parse_flight_record
+
+    def counting_parse(self, region, flight_data, *args):
+        parsed.append(flight_data)
+        return parse_flight_record(self, region, flight_data, *args)
+
+    def assign_regions(rows, finder, region_index, takeoff_coords_index):
+        for row in rows:
+            located.append(row[0])
+            yield row
+
+    monkeypatch.setattr(FlightDataParser, "parse_flight_record", counting_parse)
+    monkeypatch.setattr(
+        flight_data_processor, "AdvancedRegionFinder", lambda path: RegionFinderStub()
+    )
+    monkeypatch.setattr(flight_data_processor, "assign_regions", assign_regions)
+    monkeypatch.setattr(flight_data_processor, "load_region_ids", dict)
+
+    path = tmp_path / "flights.xlsx"
+    write_sheet(path, 10)
+    # Строка 0 - заголовок листа, строки 1..10 - полеты SID 0..9
+    _, rows = flight_data_processor.flight_rows(str(path), workers=1, start_row=7)
+    rows = list(rows)
+
+    assert [row[0] for row in rows] == ["6", "7", "8", "9"]
+    assert parsed == [FPL.format(number) for number in range(6, 10)]
+    assert located == ["6", "7", "8", "9"]
+
+
+def test_iter_row_batches_numbers_rows_from_start_row(monkeypatch):
+    monkeypatch.setattr(csv_load, "parse_record", lambda row_num, row: (row_num, *row))
+    rows = [["a"], ["b"], ["c"]]
+
+    batches = list(csv_load.iter_row_batches(rows, batch_size=2, start_row=5))
+
+    assert batches == [([(5, "a"), (6, "b")], 0, 7), ([(7, "c")], 0, 8)]